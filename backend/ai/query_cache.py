@@ -0,0 +1,130 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache key for a query: lowercase, punctuation dropped, whitespace collapsed.
+    """
+    query = re.sub(r"[^\w\s]", " ", query.lower())
+    return " ".join(query.split())
+
+
+class QueryCache:
+    """
+    LRU cache of processed queries with a TTL, backed by a SQLite file so
+    entries survive restarts. Keys are expected to be normalized already.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 1000, ttl_seconds: int = 7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # The store is opened on first use, so importing the module creates no files
+        self._store_ready = False
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if now - created_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    return dict(value)
+                del self._entries[key]
+
+        entry = self._load(key)
+        if entry is None:
+            return None
+        value, created_at = entry
+        if now - created_at >= self.ttl_seconds:
+            return None
+        with self._lock:
+            self._remember(key, value, created_at)
+        return dict(value)
+
+    def set(self, key: str, value: Dict) -> None:
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, dict(value), created_at)
+        self._store(key, value, created_at)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, value: Dict, created_at: float) -> None:
+        """Insert into the in-memory LRU. Caller holds the lock."""
+        self._entries[key] = (value, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_store(self) -> None:
+        with self._lock:
+            if self._store_ready:
+                return
+            self._store_ready = True
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS query_cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+                conn.execute("DELETE FROM query_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        except sqlite3.Error as e:
+            logger.warning(f"Query cache store unavailable, using memory only: {str(e)}")
+            self.path = None
+
+    def _load(self, key: str):
+        if self.path:
+            self._init_store()
+        if not self.path:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT value, created_at FROM query_cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read query cache: {str(e)}")
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _store(self, key: str, value: Dict, created_at: float) -> None:
+        if self.path:
+            self._init_store()
+        if not self.path:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO query_cache (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), created_at)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to write query cache: {str(e)}")
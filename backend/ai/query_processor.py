@@ -1,17 +1,109 @@
-from openai import OpenAI
+from openai import OpenAI, APITimeoutError
 import os
+import threading
 from dotenv import load_dotenv
+from .query_cache import QueryCache, normalize_query
+from .query_rules import parse_simple_query
+from jobs.deadline import as_deadline
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Set the OpenAI API key
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# The OpenAI client is created on first use so rule-parsed and cached
+# queries work without an API key
+_client = None
+_client_lock = threading.Lock()
 
-def process_query(query):
+query_cache = QueryCache(
+    path=os.getenv("QUERY_CACHE_PATH", os.path.join("scrape_state", "query_cache.db")),
+    max_entries=int(os.getenv("QUERY_CACHE_SIZE", "1000")),
+    ttl_seconds=int(os.getenv("QUERY_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+)
+
+# Upper bound for one model call; a request deadline can shorten it
+MODEL_TIMEOUT_SECONDS = float(os.getenv("MODEL_TIMEOUT_SECONDS", "30"))
+
+_stats = {"rule_hits": 0, "cache_hits": 0, "cache_misses": 0, "llm_calls": 0, "llm_parse_failures": 0,
+          "llm_deadline_skips": 0}
+_stats_lock = threading.Lock()
+
+
+def _get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return _client
+
+
+def _count(stat):
+    with _stats_lock:
+        _stats[stat] += 1
+
+
+def get_query_stats():
+    """
+    Counters for the rule parser, the query cache and model calls.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["cache_size"] = len(query_cache)
+    return stats
+
+
+def process_query(query, deadline=None):
     """
     Interpret natural language queries and convert them into LinkedIn search parameters.
     Returns a dictionary of search parameters.
+    Simple queries are parsed by rules and model results are cached, so the
+    model is only called for new, non-trivial queries.
+    The model call is bounded by the deadline; if it has run out, or the call
+    times out because of it, the basic keyword query is returned instead.
+    """
+    deadline = as_deadline(deadline)
+    parsed = parse_simple_query(query)
+    if parsed is not None:
+        _count("rule_hits")
+        return parsed
+
+    cache_key = normalize_query(query)
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        _count("cache_hits")
+        return cached
+    _count("cache_misses")
+
+    result = None
+    if deadline.expired:
+        _count("llm_deadline_skips")
+    else:
+        try:
+            # With a deadline a timed-out call is not retried, so one call stays within the budget
+            result = _process_query_with_model(query, timeout=deadline.cap(MODEL_TIMEOUT_SECONDS),
+                                               retry=deadline.remaining() is None)
+        except APITimeoutError:
+            if not deadline.expired:
+                raise
+            _count("llm_deadline_skips")
+    if result is not None:
+        query_cache.set(cache_key, result)
+        return result
+
+    # If parsing fails, return a basic structured query
+    return {
+        "keywords": query,
+        "title": "",
+        "location": "",
+        "industry": "",
+        "company": ""
+    }
+
+
+def _process_query_with_model(query, timeout=MODEL_TIMEOUT_SECONDS, retry=True):
+    """
+    Ask the model for search parameters. Returns None if the reply isn't valid JSON.
+    Without retry the client's automatic retries are turned off, so the call
+    takes at most timeout seconds.
     """
     system_prompt = """
     Convert natural language queries into LinkedIn search parameters. Return ONLY a JSON object with these keys:
@@ -31,6 +123,8 @@ def process_query(query):
     }
     """
 
+    _count("llm_calls")
+    client = _get_client() if retry else _get_client().with_options(max_retries=0)
     response = client.chat.completions.create(
         model="gpt-3.5-turbo",
         messages=[
@@ -38,7 +132,8 @@ def process_query(query):
             {"role": "user", "content": query}
         ],
         max_tokens=150,
-        temperature=0.3
+        temperature=0.3,
+        timeout=timeout
     )
     
     # Parse the response into a dictionary
@@ -48,14 +143,8 @@ def process_query(query):
         processed_query = response.choices[0].message.content.strip()
         return json.loads(processed_query)
     except json.JSONDecodeError:
-        # If parsing fails, return a basic structured query
-        return {
-            "keywords": query,
-            "title": "",
-            "location": "",
-            "industry": "",
-            "company": ""
-        }
+        _count("llm_parse_failures")
+        return None
 
 def build_linkedin_url(query_params):
     """
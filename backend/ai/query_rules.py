@@ -0,0 +1,98 @@
+import re
+from typing import Dict, Optional
+
+# Leading phrases that carry no search meaning
+_PREFIX = r"^(?:please\s+)?(?:find|search(?:\s+for)?|show(?:\s+me)?|get|list|look\s+for)?\s*(?:me\s+)?"
+
+_PATTERNS = [
+    re.compile(_PREFIX + r"(?P<title>.+?)\s+in\s+(?P<location>.+?)\s+at\s+(?P<company>.+)$"),
+    re.compile(_PREFIX + r"(?P<title>.+?)\s+at\s+(?P<company>.+?)\s+in\s+(?P<location>.+)$"),
+    re.compile(_PREFIX + r"(?P<title>.+?)\s+in\s+(?P<location>.+)$"),
+    re.compile(_PREFIX + r"(?P<title>.+?)\s+at\s+(?P<company>.+)$"),
+]
+
+# Words that mean the query says more than title/location/company, so it
+# needs the model
+_COMPLEX_WORDS = {
+    'with', 'who', 'that', 'which', 'and', 'or', 'not', 'working', 'experience',
+    'experienced', 'startup', 'startups', 'companies', 'company', 'fortune', 'years',
+    'industry', 'profiles', 'people', 'linkedin', 'in', 'at',
+}
+
+_MAX_PART_WORDS = 4
+
+# Head nouns of job titles whose plural is known to be the noun plus -s, -es
+# or -ies; a title whose head noun isn't listed goes to the model
+_TITLE_NOUNS = {
+    'accountant', 'administrator', 'advisor', 'adviser', 'analyst', 'architect', 'assistant', 'associate',
+    'attorney', 'coach', 'consultant', 'coordinator', 'designer', 'developer', 'director', 'editor', 'engineer',
+    'executive', 'founder', 'head', 'intern', 'lawyer', 'lead', 'manager', 'marketer', 'nurse', 'officer',
+    'owner', 'partner', 'physician', 'president', 'programmer', 'recruiter', 'representative', 'researcher',
+    'scientist', 'secretary', 'specialist', 'strategist', 'teacher', 'technician', 'tester', 'writer',
+    'ceo', 'cfo', 'cmo', 'coo', 'cto', 'vp',
+}
+
+
+def _singular(title: str) -> Optional[str]:
+    """
+    The title with its head noun made singular, keeping the user's casing:
+    "software engineers" -> "software engineer", "Heads of Sales" -> "Head of
+    Sales", "CEOs" -> "CEO". None when the head noun isn't a known title noun.
+    """
+    words = title.split()
+    lowered = [word.lower() for word in words]
+    # In "<head> of <department>" the head noun comes before "of"
+    index = lowered.index('of') - 1 if 'of' in lowered else len(words) - 1
+    if index < 0:
+        return None
+    head, low = words[index], lowered[index]
+    if low in _TITLE_NOUNS:
+        return title
+    if low.endswith('ies') and low[:-3] + 'y' in _TITLE_NOUNS:
+        words[index] = head[:-3] + ('Y' if head[-3:].isupper() else 'y')
+    elif low.endswith('es') and low[:-2] in _TITLE_NOUNS:
+        words[index] = head[:-2]
+    elif low.endswith('s') and low[:-1] in _TITLE_NOUNS:
+        words[index] = head[:-1]
+    else:
+        return None
+    return ' '.join(words)
+
+
+def _clean(part: str) -> str:
+    return ' '.join(part.strip(' .,!?').split())
+
+
+def parse_simple_query(query: str) -> Optional[Dict]:
+    """
+    Parse "<title> in <location> at <company>" style queries without the model.
+    Returns None when the query is not simple enough to parse reliably,
+    including titles whose head noun can't be made singular safely.
+    """
+    text = ' '.join(query.strip().rstrip('.?!').split())
+    for pattern in _PATTERNS:
+        match = pattern.match(text.lower())
+        if not match:
+            continue
+        parts = {}
+        for name, value in match.groupdict().items():
+            if value is None:
+                continue
+            # Slice the original text to keep the user's casing
+            value = _clean(text[match.start(name):match.end(name)])
+            words = value.lower().split()
+            if not words or len(words) > _MAX_PART_WORDS or _COMPLEX_WORDS & set(words):
+                return None
+            parts[name] = value
+
+        title = _singular(parts['title'])
+        if title is None:
+            return None
+        return {
+            'keywords': title.lower(),
+            'title': title,
+            'company': parts.get('company', ''),
+            'location': parts.get('location', ''),
+            'industry': ''
+        }
+    return None
@@ -1,58 +1,207 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from scraper.linkedin_profile_scraper import scrape_linkedin_profiles
-from scraper.linkedin_comment_scraper import scrape_comments_from_post
-from ai.query_processor import process_query
-from database.firebase_client import save_to_firebase  # Replace with your database implementation
-from scraper.utils import export_to_csv, ensure_gdpr_compliance
+from scraper.linkedin_profile_scraper import (iter_linkedin_profiles, iter_profiles_for_queries, MAX_PAGES_LIMIT,
+                                              RESULTS_PER_PAGE, FINAL_STOP_REASONS)
+from scraper.linkedin_comment_scraper import iter_comments_from_post
+from scraper.comment_batch import scrape_comment_batch, dedupe_post_urls, canonical_post_url
+from ai.query_processor import process_query, get_query_stats
+from database.firebase_client import save_to_firebase, fetch_profiles_page, iter_profiles, InvalidCursor  # Replace with your database implementation
+from database.record_store import record_store, SORT_COLUMNS, SORT_ORDERS, InvalidCursor as InvalidQueryCursor
+from scraper.utils import progress_fields
+from scraper.records import Profile, apply_gdpr, serialize_record, json_default
+from scraper.email_validator import validate_emails_bulk, mx_cache
+from exports.streaming_export import export_stream, ExportFormatUnavailable, PROFILE_COLUMNS
+from scraper.dedup import DedupIndex, profile_key, comment_key, DEDUP_STATE_DIR
+from scraper.result_cache import search_cache, canonical_search_key, STALE
+from jobs.job_manager import job_manager
+from jobs.deadline import Deadline
+from scraper.driver_pool import driver_pool
+from scraper.browser_profiles import BROWSER_PROFILES, DEFAULT_BROWSER_PROFILE
+from scraper.fetch_backends import FETCH_BACKENDS
+from scraper.rate_scheduler import rate_scheduler, PRIORITIES
+from observability.metrics import registry, stage_timer, timed_iter, stats_samples, HTTP_REQUEST_SECONDS
+from observability.request_context import (configure_logging, install_log_context, set_request_id, reset_request_id,
+                                          get_request_id)
+import os
+import json
 import logging
+import itertools
 from werkzeug.serving import WSGIRequestHandler
-from functools import wraps
 import time
+import cProfile
+from datetime import datetime
 
 # Increase the timeout for the WSGI server
 WSGIRequestHandler.timeout = 300  # 5 minutes timeout
 
+
+class RecordJSONProvider(DefaultJSONProvider):
+    """Serialize scraped records (job results, responses) in their client shape."""
+
+    @staticmethod
+    def default(o):
+        try:
+            return json_default(o)
+        except TypeError:
+            return DefaultJSONProvider.default(o)
+
+
 # Initialize the Flask app
 app = Flask(__name__)
+app.json = RecordJSONProvider(app)
 CORS(app)
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Setup logging; every line can carry the id of the request or job it belongs to.
+# The server entry points install LOG_FORMAT with configure_logging().
+install_log_context()
 logger = logging.getLogger(__name__)
 
+# Opt-in per-request cProfile dumps, requested with an X-Profile: 1 header
+PROFILING_ENABLED = os.getenv('ENABLE_PROFILING', '').lower() in ('1', 'true', 'yes')
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join('scrape_state', 'profiles'))
+
+MAX_BULK_EMAILS = int(os.getenv('MAX_BULK_EMAILS', '10000'))
+
+# Time budgets for synchronous and streamed scrapes; a request can set its own with "timeout"
+SEARCH_TIMEOUT_SECONDS = float(os.getenv('SEARCH_TIMEOUT_SECONDS', '300'))
+COMMENTS_TIMEOUT_SECONDS = float(os.getenv('COMMENTS_TIMEOUT_SECONDS', '180'))
+
+# Chrome profile per endpoint ("full" or "lean"); a request can pick its own with "browser_profile"
+SEARCH_BROWSER_PROFILE = os.getenv('SEARCH_BROWSER_PROFILE', DEFAULT_BROWSER_PROFILE)
+COMMENTS_BROWSER_PROFILE = os.getenv('COMMENTS_BROWSER_PROFILE', DEFAULT_BROWSER_PROFILE)
+
+# Batch comment scrapes: posts per request, browser sessions per batch and posts per browser checkout
+MAX_BATCH_POSTS = int(os.getenv('MAX_BATCH_POSTS', '500'))
+BATCH_SESSIONS = int(os.getenv('BATCH_SESSIONS', str(driver_pool.max_size)))
+BATCH_POSTS_PER_SESSION = int(os.getenv('BATCH_POSTS_PER_SESSION', '25'))
+BATCH_TIMEOUT_SECONDS = float(os.getenv('BATCH_TIMEOUT_SECONDS', '1800'))
+
+# Bulk searches: queries per request
+MAX_BULK_QUERIES = int(os.getenv('MAX_BULK_QUERIES', '100'))
+
+# Every scrape is written to the local record store; Firestore gets a copy unless this is off
+FIRESTORE_REPLICA = os.getenv('FIRESTORE_REPLICA', 'true').lower() in ('1', 'true', 'yes')
+
+
+def _deadline_for(data: dict, default_seconds=None) -> Deadline:
+    """
+    Time budget for a scrape: the request's "timeout" in seconds if given,
+    otherwise default_seconds (None means no limit, the default for jobs).
+    """
+    timeout = data.get('timeout')
+    return Deadline(float(timeout) if timeout is not None else default_seconds)
+
+
+def _invalid_browser_profile_response(data: dict):
+    profile = data.get('browser_profile')
+    if profile is None or profile in BROWSER_PROFILES:
+        return None
+    return jsonify({
+        'status': 'error',
+        'error': 'Invalid browser profile',
+        'message': f"browser_profile must be one of {', '.join(BROWSER_PROFILES)}"
+    }), 400
+
 
-def handle_timeout(timeout_seconds):
-    """Decorator to handle timeouts for routes"""
-    def decorator(f):
-        @wraps(f)
-        def wrapper(*args, **kwargs):
-            start_time = time.time()
-            while time.time() - start_time < timeout_seconds:
-                try:
-                    return f(*args, **kwargs)
-                except Exception as e:
-                    if "timeout" in str(e).lower():
-                        if time.time() - start_time < timeout_seconds:
-                            logger.warning("Request timed out, retrying...")
-                            time.sleep(2)  # Wait before retry
-                            continue
-                    logger.error(f"Error in route: {str(e)}")
-                    return jsonify({
-                        'status': 'error',
-                        'error': str(e),
-                        'message': 'An error occurred while processing your request'
-                    }), 500
+def _invalid_fetch_backend_response(data: dict):
+    backend = data.get('fetch_backend')
+    if backend is None or backend in FETCH_BACKENDS:
+        return None
+    return jsonify({
+        'status': 'error',
+        'error': 'Invalid fetch backend',
+        'message': f"fetch_backend must be one of {', '.join(FETCH_BACKENDS)}"
+    }), 400
+
+
+def _pagination(data: dict) -> dict:
+    """The request's page loop options, passed to the scrapers as keyword arguments."""
+    return {'max_pages': data.get('max_pages'), 'target_count': data.get('target_count')}
+
+
+def _invalid_pagination_response(data: dict):
+    for field, limit in (('max_pages', MAX_PAGES_LIMIT), ('target_count', MAX_PAGES_LIMIT * RESULTS_PER_PAGE)):
+        value = data.get(field)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool) or not 1 <= value <= limit):
             return jsonify({
                 'status': 'error',
-                'error': 'Operation timed out',
-                'message': 'The request took too long to complete'
-            }), 504
-        return wrapper
-    return decorator
+                'error': 'Invalid request',
+                'message': f"'{field}' must be an integer between 1 and {limit}"
+            }), 400
+    return None
+
+
+def _priority(data: dict) -> str:
+    """
+    Rate budget priority of a scrape: the request's "priority", otherwise
+    high for requests a client is waiting on (submit_job defaults jobs to normal).
+    """
+    return data.get('priority') or 'high'
+
+
+def _invalid_priority_response(data: dict):
+    priority = data.get('priority')
+    if priority is None or priority in PRIORITIES:
+        return None
+    return jsonify({
+        'status': 'error',
+        'error': 'Invalid priority',
+        'message': f"priority must be one of {', '.join(PRIORITIES)}"
+    }), 400
+
+
+def _invalid_timeout_response(data: dict):
+    timeout = data.get('timeout')
+    if timeout is None:
+        return None
+    if isinstance(timeout, (int, float)) and not isinstance(timeout, bool) and timeout > 0:
+        return None
+    return jsonify({
+        'status': 'error',
+        'error': 'Invalid timeout',
+        'message': 'timeout must be a positive number of seconds'
+    }), 400
+
+
+@app.before_request
+def start_request():
+    g.request_id_token = set_request_id(request.headers.get('X-Request-ID'))
+    g.started_at = time.perf_counter()
+    g.profiler = None
+    if PROFILING_ENABLED and request.headers.get('X-Profile') == '1':
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+@app.after_request
+def finish_request(response):
+    response.headers['X-Request-ID'] = get_request_id()
+    profiler = g.get('profiler')
+    if profiler is not None:
+        # Streamed bodies are produced after this point, so only the view itself is profiled
+        profiler.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f'{get_request_id()}.prof')
+        profiler.dump_stats(path)
+        response.headers['X-Profile-File'] = path
+        logger.info(f"Wrote request profile to {path}")
+    if 'started_at' in g:
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - g.started_at,
+            method=request.method,
+            endpoint=request.url_rule.rule if request.url_rule else 'unmatched',
+            status=response.status_code
+        )
+    return response
+
+
+@app.teardown_request
+def end_request(error=None):
+    token = g.pop('request_id_token', None)
+    if token is not None:
+        reset_request_id(token)
+
 
 @app.route('/')
 def home():
@@ -62,80 +211,584 @@ def home():
         'version': '1.0'
     })
 
+def _save_dedup_state(dedup_index: DedupIndex) -> None:
+    try:
+        dedup_index.save()
+    except Exception as e:
+        logger.error(f"Failed to save dedup state: {str(e)}")
+        # Continue execution even if the dedup state can't be saved
+
+
+def iter_search_events(data: dict, progress_callback=None, default_timeout=None):
+    """
+    Run the search pipeline (query processing, scraping, GDPR, storage) and
+    yield events as they happen: the processed query, each compliant profile,
+    and per-page progress. Every stage shares one deadline; when it runs out
+    the scrape stops and a 'deadline' event marks the results as partial.
+    """
+    query = data.get('query')
+    filters = data.get('filters', {})
+    cookies = data.get('cookies')
+    deadline = _deadline_for(data, default_timeout)
+    browser_profile = data.get('browser_profile') or SEARCH_BROWSER_PROFILE
+    fetch_backend = data.get('fetch_backend')
+
+    # AI Processing
+    logger.info(f"Processing query: {query}")
+    with stage_timer('process_query'):
+        query_params = process_query(query, deadline=deadline)
+    logger.info(f"Processed query params: {query_params}")
+    yield {'type': 'query', 'query_params': query_params}
+
+    # Seen profiles are remembered across runs; skip_known drops them from the results
+    dedup_index = DedupIndex(profile_key, path=os.path.join(DEDUP_STATE_DIR, 'profiles.sqlite3'),
+                             skip_known=bool(data.get('skip_known')))
+
+    # Identical searches are served from the result cache unless the client opts out
+    use_cache = data.get('cache', True) is not False
+    cache_key = canonical_search_key(query_params, filters, _pagination(data), cookies)
+    cached, cache_state = None, 'bypass'
+    if use_cache and not data.get('refresh'):
+        cached, cache_state = search_cache.lookup(cache_key)
+    elif use_cache:
+        cache_state = 'refresh'
+    yield {'type': 'cache', 'status': cache_state}
+
+    if cached is not None:
+        logger.info(f"Serving {len(cached)} cached profiles ({cache_state})")
+        if cache_state == STALE:
+            search_cache.refresh_async(cache_key, lambda: _refresh_search(query_params, cookies, filters, data))
+        source_events = [{'type': 'profile', 'data': profile} for profile in cached]
+    else:
+        # LinkedIn Scraping with progress tracking
+        logger.info("Starting LinkedIn scraping")
+        source_events = iter_linkedin_profiles(query_params, cookies, filters, deadline=deadline,
+                                               browser_profile=browser_profile, fetch_backend=fetch_backend,
+                                               priority=_priority(data), **_pagination(data))
+
+    # One collection timestamp for every profile of this search
+    collection_date = datetime.now().isoformat()
+    scraped = []
+    # New profiles of the current page; the scraper yields a page's profiles together
+    page = []
+    # Scraped profiles are stored a page at a time
+    unsaved = []
+    partial = False
+    stop_reason = None
+    try:
+        for event in source_events:
+            if event['type'] == 'profile':
+                scraped.append(event['data'])
+                if dedup_index.add(event['data']):
+                    page.append(Profile.from_dict(event['data']))
+                continue
+            # Apply GDPR compliance to the whole page; the compliant shape is built when a profile is serialized
+            page = apply_gdpr(page, collection_date)
+            if cached is None:
+                unsaved.extend(page)
+            for profile in page:
+                yield {'type': 'profile', 'data': profile}
+            page = []
+            if unsaved:
+                _save_profiles(unsaved, deadline)
+                unsaved = []
+            partial = partial or event['type'] == 'deadline'
+            if event['type'] == 'pagination':
+                stop_reason = event['stop_reason']
+            if progress_callback:
+                progress_callback(progress_fields(event))
+            yield event
+        # Cached results come without page events
+        page = apply_gdpr(page, collection_date)
+        if cached is None:
+            unsaved.extend(page)
+        for profile in page:
+            yield {'type': 'profile', 'data': profile}
+        # Only a search that ran to a natural end is cached as the answer to the query,
+        # not one cut short by its deadline, a page timeout or a page error
+        if cached is None and use_cache and scraped and not partial and stop_reason in FINAL_STOP_REASONS:
+            search_cache.set(cache_key, scraped)
+    finally:
+        # The final flush isn't capped by the deadline, so profiles already shown are not dropped
+        if unsaved:
+            _save_profiles(unsaved)
+        logger.info(f"Found {len(dedup_index)} profiles")
+        _save_dedup_state(dedup_index)
+
+
+def _refresh_search(query_params: dict, cookies: str, filters: dict, data: dict):
+    """
+    Background refresh of a stale cached search. The profiles are stored like
+    those of any search; they replace the cache entry only if the scrape ran
+    to a natural end (None keeps the stale entry).
+    """
+    profiles, stop_reason = [], None
+    for event in iter_linkedin_profiles(query_params, cookies, filters,
+                                        browser_profile=data.get('browser_profile') or SEARCH_BROWSER_PROFILE,
+                                        fetch_backend=data.get('fetch_backend'), priority='low',
+                                        **_pagination(data)):
+        if event['type'] == 'profile':
+            profiles.append(event['data'])
+        elif event['type'] == 'pagination':
+            stop_reason = event['stop_reason']
+    if profiles:
+        collection_date = datetime.now().isoformat()
+        _save_profiles(apply_gdpr([Profile.from_dict(profile) for profile in profiles], collection_date))
+    return profiles if stop_reason in FINAL_STOP_REASONS else None
+
+
+def _save_profiles(profiles, deadline=None) -> None:
+    documents = [serialize_record(profile) for profile in profiles]
+    try:
+        record_store.save_profiles(documents)
+    except Exception as e:
+        logger.error(f"Failed to save profiles to the record store: {str(e)}")
+    if not FIRESTORE_REPLICA:
+        return
+    # Replicate to Firebase (written in batches by a background thread)
+    try:
+        save_to_firebase(documents, deadline=deadline)
+    except Exception as e:
+        logger.error(f"Failed to save to Firebase: {str(e)}")
+        # Continue execution even if Firebase save fails
+
+
+def _save_comments(post_url: str, comments) -> None:
+    try:
+        record_store.save_comments(canonical_post_url(post_url), comments)
+    except Exception as e:
+        logger.error(f"Failed to save comments to the record store: {str(e)}")
+
+
+def run_search(data: dict, progress_callback=None, default_timeout=None) -> dict:
+    """
+    Run the full search pipeline and return the response payload.
+    Used by both the sync route and jobs.
+    """
+    query_params = None
+    cache_status = None
+    pagination = None
+    partial = False
+    compliant_profiles = []
+    for event in iter_search_events(data, progress_callback, default_timeout):
+        if event['type'] == 'deadline':
+            partial = True
+        elif event['type'] == 'pagination':
+            pagination = progress_fields(event)
+        elif event['type'] == 'query':
+            query_params = event['query_params']
+        elif event['type'] == 'cache':
+            cache_status = event['status']
+        elif event['type'] == 'profile':
+            compliant_profiles.append(event['data'])
+
+    if not compliant_profiles:
+        return {
+            'status': 'warning',
+            'message': ('Deadline reached before any profiles were found' if partial
+                        else 'No profiles found matching your criteria'),
+            'profile_count': 0,
+            'profiles': [],
+            'cache': cache_status,
+            'pagination': pagination,
+            'partial': partial
+        }
+
+    return {
+        'status': 'success',
+        'message': ('Deadline reached; returning the profiles collected so far' if partial
+                    else 'Successfully retrieved profiles'),
+        'profile_count': len(compliant_profiles),
+        'profiles': compliant_profiles,
+        'query_params': query_params,  # Return processed query params for reference
+        'cache': cache_status,
+        'pagination': pagination,
+        'partial': partial
+    }
+
+
+def run_bulk_search(data: dict, progress_callback=None, default_timeout=None) -> dict:
+    """
+    Run many searches in one go. Every query is processed first; queries whose
+    query params are the same search collapse into one. Cached searches are
+    served from the result cache and the rest run one after another on a
+    single logged-in driver. Returns the results per query plus the union of
+    all profiles, deduplicated.
+    """
+    queries = data.get('queries')
+    filters = data.get('filters', {})
+    cookies = data.get('cookies')
+    deadline = _deadline_for(data, default_timeout)
+    use_cache = data.get('cache', True) is not False
+
+    # Collapse queries that process to the same search
+    searches = {}
+    query_keys = []
+    with stage_timer('process_query'):
+        for query in queries:
+            query_params = process_query(query, deadline=deadline)
+            key = canonical_search_key(query_params, filters, _pagination(data), cookies)
+            searches.setdefault(key, {'query_params': query_params, 'profiles': [], 'cache': 'bypass',
+                                      'partial': False, 'pagination': None, 'stop_reason': None, 'error': None})
+            query_keys.append(key)
+    logger.info(f"Bulk search: {len(queries)} queries collapse to {len(searches)} searches")
+
+    to_scrape = []
+    for key, search in searches.items():
+        cached = None
+        if use_cache and not data.get('refresh'):
+            cached, search['cache'] = search_cache.lookup(key)
+        elif use_cache:
+            search['cache'] = 'refresh'
+        if cached is None:
+            to_scrape.append(key)
+        else:
+            search['profiles'] = list(cached)
+            if search['cache'] == STALE:
+                search_cache.refresh_async(key, lambda params=search['query_params']: _refresh_search(
+                    params, cookies, filters, data))
+
+    searches_done = len(searches) - len(to_scrape)
+    partial = False
+    login_error = None
+    if to_scrape:
+        logger.info(f"Scraping {len(to_scrape)} searches on one browser session")
+        events = iter_profiles_for_queries([searches[key]['query_params'] for key in to_scrape], cookies, filters,
+                                           deadline=deadline,
+                                           browser_profile=data.get('browser_profile') or SEARCH_BROWSER_PROFILE,
+                                           priority=_priority(data), **_pagination(data))
+        scraped_keys = set()
+        for event in events:
+            if event['type'] == 'login_failed':
+                login_error = event['message']
+                continue
+            key = to_scrape[event['search']]
+            scraped_keys.add(key)
+            if event['type'] == 'profile':
+                searches[key]['profiles'].append(event['data'])
+            elif event['type'] == 'deadline':
+                partial = searches[key]['partial'] = True
+            elif event['type'] == 'pagination':
+                searches[key]['pagination'] = {k: v for k, v in progress_fields(event).items() if k != 'search'}
+                searches[key]['stop_reason'] = event['stop_reason']
+        for key in to_scrape:
+            search = searches[key]
+            if login_error is not None:
+                search['error'] = 'login_failed'
+            # A search the deadline kept from starting has partial (empty) results; one whose login failed has none
+            search['partial'] = search['partial'] or (key not in scraped_keys and login_error is None)
+            partial = partial or search['partial']
+            if (use_cache and search['profiles'] and not search['partial']
+                    and search['stop_reason'] in FINAL_STOP_REASONS):
+                search_cache.set(key, search['profiles'])
+            searches_done += 1
+            if progress_callback:
+                progress_callback({'searches_done': searches_done, 'searches_total': len(searches)})
+
+    # One deduplicated union; seen profiles are remembered across runs as for /search
+    union = DedupIndex(profile_key, path=os.path.join(DEDUP_STATE_DIR, 'profiles.sqlite3'),
+                       skip_known=bool(data.get('skip_known')))
+    for search in searches.values():
+        union.add_all(search['profiles'])
+    _save_dedup_state(union)
+
+    collection_date = datetime.now().isoformat()
+    union_profiles = apply_gdpr([Profile.from_dict(profile) for profile in union.records()], collection_date)
+    # Cached searches were stored when they were scraped
+    scraped = {profile_key(profile) for key in to_scrape for profile in searches[key]['profiles']}
+    _save_profiles([profile for profile in union_profiles if profile_key(profile) in scraped])
+    for search in searches.values():
+        search['profiles'] = apply_gdpr([Profile.from_dict(profile).copy() for profile in search['profiles']
+                                         if profile in union], collection_date)
+
+    results = [{
+        'query': query,
+        'query_params': searches[key]['query_params'],
+        'cache': searches[key]['cache'],
+        'partial': searches[key]['partial'],
+        'error': searches[key]['error'],
+        'pagination': searches[key]['pagination'],
+        'profile_count': len(searches[key]['profiles']),
+        'profiles': searches[key]['profiles']
+    } for query, key in zip(queries, query_keys)]
+
+    if login_error is not None:
+        return {
+            'status': 'error',
+            'error': 'Login failed',
+            'message': f"{login_error}; {len(to_scrape)} of {len(searches)} searches could not run",
+            'query_count': len(queries),
+            'search_count': len(searches),
+            'profile_count': len(union_profiles),
+            'profiles': union_profiles,
+            'results': results,
+            'partial': partial
+        }
+    return {
+        'status': 'success' if union_profiles else 'warning',
+        'message': (f"Ran {len(searches)} searches for {len(queries)} queries"
+                    + ('; deadline reached, some results are partial' if partial else '')),
+        'query_count': len(queries),
+        'search_count': len(searches),
+        'profile_count': len(union_profiles),
+        'profiles': union_profiles,
+        'results': results,
+        'partial': partial
+    }
+
+
+def iter_comment_events(data: dict, progress_callback=None, default_timeout=None):
+    """
+    Scrape comments for one post, yielding each comment and scroll progress as they happen.
+    A 'deadline' event follows the comments if the time budget ran out.
+    """
+    url = data.get('url')
+    cookies = data.get('cookies')
+    deadline = _deadline_for(data, default_timeout)
+
+    incremental = bool(data.get('incremental'))
+    # Incremental scrapes track seen comments in the post's own watermark instead
+    dedup_index = None
+    if not incremental:
+        dedup_index = DedupIndex(comment_key, path=os.path.join(DEDUP_STATE_DIR, 'comments.sqlite3'),
+                                 skip_known=bool(data.get('skip_known')))
+
+    logger.info(f"Starting comment scraping for URL: {url}")
+    comments = []
+    try:
+        for event in iter_comments_from_post(url, cookies, dedup_index=dedup_index, incremental=incremental,
+                                             deadline=deadline,
+                                             browser_profile=data.get('browser_profile') or COMMENTS_BROWSER_PROFILE,
+                                             fetch_backend=data.get('fetch_backend'), priority=_priority(data)):
+            if event['type'] in ('progress', 'delta') and progress_callback:
+                progress_callback(progress_fields(event))
+            elif event['type'] == 'stats' and progress_callback:
+                progress_callback({'scrape_stats': progress_fields(event)})
+            elif event['type'] == 'comment':
+                comments.append(event['data'])
+            yield event
+    finally:
+        _save_comments(url, comments)
+        if dedup_index is not None:
+            _save_dedup_state(dedup_index)
+
+
+def run_comment_scrape(data: dict, progress_callback=None, default_timeout=None) -> dict:
+    """
+    Scrape comments for one post and return the response payload.
+    """
+    url = data.get('url')
+    comments = []
+    scrape_stats = None
+    delta = {}
+    partial = False
+    for event in iter_comment_events(data, progress_callback, default_timeout):
+        if event['type'] == 'deadline':
+            partial = True
+        elif event['type'] == 'comment':
+            comments.append(event['data'])
+        elif event['type'] == 'stats':
+            scrape_stats = progress_fields(event)
+        elif event['type'] == 'delta':
+            delta = {'new_comment_count': event['new_comments'], 'total_comment_count': event['total_comments']}
+
+    if not comments:
+        return dict({
+            'status': 'warning',
+            'message': ('Deadline reached before any comments were loaded' if partial
+                        else 'No new comments since the last scrape' if delta else 'No comments found for this post'),
+            'comment_count': 0,
+            'comments': [],
+            'scrape_stats': scrape_stats,
+            'partial': partial
+        }, **delta)
+
+    return dict({
+        'status': 'success',
+        'message': ('Deadline reached; returning the comments loaded so far' if partial
+                    else 'Successfully retrieved comments'),
+        'comment_count': len(comments),
+        'comments': comments,
+        'url': url,
+        'scrape_stats': scrape_stats,
+        'partial': partial
+    }, **delta)
+
+
+def run_comment_batch(data: dict, progress_callback=None, default_timeout=None) -> dict:
+    """
+    Scrape comments for a list of posts over a few reused browser sessions
+    and return per-URL results. Sessions are capped by the driver pool size.
+    """
+    urls = data.get('urls')
+    sessions = min(int(data.get('sessions') or BATCH_SESSIONS), driver_pool.max_size)
+    deadline = _deadline_for(data, default_timeout)
+    logger.info(f"Starting comment batch of {len(urls)} URLs on {sessions} sessions")
+    results = scrape_comment_batch(
+        urls, data.get('cookies'),
+        sessions=sessions,
+        max_posts_per_session=int(data.get('max_posts_per_session') or BATCH_POSTS_PER_SESSION),
+        progress_callback=progress_callback,
+        deadline=deadline,
+        browser_profile=data.get('browser_profile') or COMMENTS_BROWSER_PROFILE,
+        priority=_priority(data)
+    )
+
+    status_counts = {}
+    for result in results:
+        status_counts[result['status']] = status_counts.get(result['status'], 0) + 1
+        _save_comments(result['url'], result['comments'])
+    return {
+        'status': 'success' if status_counts.get('success') else 'warning',
+        'message': f"Scraped {status_counts.get('success', 0)} of {len(results)} posts",
+        'post_count': len(results),
+        'duplicate_count': len(urls) - len(results),
+        'comment_count': sum(result['comment_count'] for result in results),
+        'status_counts': status_counts,
+        'sessions': sessions,
+        'results': results,
+        'partial': deadline.expired
+    }
+
+
+def stream_events(events, summary_fn):
+    """
+    Stream events as NDJSON, or as Server-Sent Events when the client accepts
+    text/event-stream. summary_fn builds the final record from the counts of
+    each event type once the events are exhausted.
+    """
+    use_sse = 'text/event-stream' in request.headers.get('Accept', '')
+
+    def encode(event):
+        if use_sse:
+            return f"event: {event['type']}\ndata: {json.dumps(event, default=json_default)}\n\n"
+        return json.dumps(event, default=json_default) + "\n"
+
+    def generate():
+        counts = {}
+        context = {}
+        try:
+            for event in events:
+                counts[event['type']] = counts.get(event['type'], 0) + 1
+                if event['type'] == 'query':
+                    context['query_params'] = event['query_params']
+                elif event['type'] == 'cache':
+                    context['cache'] = event['status']
+                elif event['type'] == 'stats':
+                    context['scrape_stats'] = progress_fields(event)
+                elif event['type'] == 'pagination':
+                    context['pagination'] = progress_fields(event)
+                elif event['type'] == 'deadline':
+                    context['partial'] = True
+                elif event['type'] == 'delta':
+                    context['delta'] = {'new_comment_count': event['new_comments'],
+                                        'total_comment_count': event['total_comments']}
+                yield encode(event)
+            yield encode(dict({'type': 'summary'}, **summary_fn(counts, context)))
+        except Exception as e:
+            logger.error(f"Error while streaming: {str(e)}")
+            yield encode({
+                'type': 'error',
+                'error': str(e),
+                'message': 'An error occurred while processing your request'
+            })
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def _search_summary(counts: dict, context: dict) -> dict:
+    profile_count = counts.get('profile', 0)
+    return {
+        'status': 'success' if profile_count else 'warning',
+        'profile_count': profile_count,
+        'pages': counts.get('progress', 0),
+        'query_params': context.get('query_params'),
+        'cache': context.get('cache'),
+        'pagination': context.get('pagination'),
+        'partial': context.get('partial', False)
+    }
+
+
+def _comment_summary(counts: dict, context: dict) -> dict:
+    comment_count = counts.get('comment', 0)
+    return dict({
+        'status': 'success' if comment_count else 'warning',
+        'comment_count': comment_count,
+        'scrape_stats': context.get('scrape_stats'),
+        'partial': context.get('partial', False)
+    }, **context.get('delta', {}))
+
+
+def submit_job(kind: str, fn, data: dict):
+    """
+    Queue a scrape on the job executor and return a 202 response with its id.
+    """
+    # Jobs draw on the rate budget behind requests a client is waiting on
+    data = dict(data, priority=data.get('priority') or 'normal')
+    params = {k: v for k, v in data.items() if k != 'cookies'}
+    job = job_manager.submit(kind, fn, data, params=params)
+    return jsonify({
+        'status': 'accepted',
+        'message': f'{kind.capitalize()} job queued',
+        'job_id': job.id,
+        'job_url': f'/jobs/{job.id}',
+        'export_url': f'/export?job_id={job.id}&format=csv'
+    }), 202
+
+
 @app.route('/search', methods=['POST'])
-@handle_timeout(300)  # 5 minutes timeout
 def search_profiles():
     """
     Endpoint to process user query and fetch relevant LinkedIn profiles.
+    Pass "async": true to queue the search as a job and poll /jobs/<id>, or
+    "stream": true to receive profiles as NDJSON/SSE while pages are scraped.
+    Results are cached per query; "refresh": true forces a new scrape and
+    "cache": false bypasses the cache entirely.
+    "timeout" (seconds, default SEARCH_TIMEOUT_SECONDS; no limit for jobs
+    unless given) bounds the whole pipeline; when it runs out the profiles
+    collected so far are returned with "partial": true.
     """
     try:
         data = request.json
         logger.info(f"Received search request with data: {data}")
 
         # Validate required fields
-        query = data.get('query')
-        filters = data.get('filters', {})
-        cookies = data.get('cookies')
-        
-        if not query:
+        if not data.get('query'):
             return jsonify({
                 'status': 'error',
                 'error': 'Missing required field',
                 'message': 'Query is required'
             }), 400
-        if not cookies:
+        if not data.get('cookies'):
             return jsonify({
                 'status': 'error',
                 'error': 'Missing required field',
                 'message': 'LinkedIn cookies are required'
             }), 400
-        
-        # AI Processing
-        logger.info(f"Processing query: {query}")
-        query_params = process_query(query)
-        logger.info(f"Processed query params: {query_params}")
-        
-        # LinkedIn Scraping with progress tracking
-        logger.info("Starting LinkedIn scraping")
-        profiles = scrape_linkedin_profiles(query_params, cookies, filters)
-        logger.info(f"Found {len(profiles)} profiles")
-        
-        if not profiles:
-            return jsonify({
-                'status': 'warning',
-                'message': 'No profiles found matching your criteria',
-                'profile_count': 0,
-                'profiles': []
-            })
-        
-        # Apply GDPR compliance
-        compliant_profiles = [ensure_gdpr_compliance(profile) for profile in profiles]
-        
-        # Save to Firebase
-        try:
-            save_to_firebase(compliant_profiles)
-            logger.info("Successfully saved profiles to Firebase")
-        except Exception as e:
-            logger.error(f"Failed to save to Firebase: {str(e)}")
-            # Continue execution even if Firebase save fails
-        
-        # Export to CSV if requested
-        if data.get('export_csv'):
-            try:
-                filename = f'linkedin_profiles_{int(time.time())}.csv'
-                export_to_csv(compliant_profiles, filename)
-                logger.info(f"Successfully exported profiles to {filename}")
-            except Exception as e:
-                logger.error(f"Failed to export CSV: {str(e)}")
-                # Continue execution even if CSV export fails
-        
-        return jsonify({
-            'status': 'success',
-            'message': 'Successfully retrieved profiles',
-            'profile_count': len(compliant_profiles),
-            'profiles': compliant_profiles,
-            'query_params': query_params  # Return processed query params for reference
-        })
+
+        invalid = (_invalid_timeout_response(data) or _invalid_browser_profile_response(data)
+                   or _invalid_fetch_backend_response(data) or _invalid_pagination_response(data)
+                   or _invalid_priority_response(data))
+        if invalid:
+            return invalid
+
+        if data.get('async'):
+            return submit_job('search', run_search, data)
+        if data.get('stream'):
+            return stream_events(iter_search_events(data, default_timeout=SEARCH_TIMEOUT_SECONDS), _search_summary)
+
+        payload = run_search(data, default_timeout=SEARCH_TIMEOUT_SECONDS)
+
+        # Offer a CSV download of these results if requested
+        if data.get('export_csv') and payload['profile_count']:
+            job = job_manager.add_completed('search', payload, params={'query': data.get('query')})
+            payload['export_url'] = f'/export?job_id={job.id}&format=csv'
+
+        return jsonify(payload)
         
     except Exception as e:
         logger.error(f"Error in search_profiles: {str(e)}")
@@ -146,11 +799,57 @@ def search_profiles():
         }), 500
 
 
+@app.route('/search/bulk', methods=['POST'])
+def bulk_search_profiles():
+    """
+    Run a list of queries in one request. Queries that process to the same
+    search run once, and every search shares one logged-in browser.
+    Pass "async": true to run the bulk search as a job.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        queries = data.get('queries')
+        if not data.get('cookies') or not isinstance(queries, list) or not queries \
+                or not all(isinstance(query, str) and query.strip() for query in queries):
+            return jsonify({
+                'status': 'error',
+                'error': 'Missing required fields',
+                'message': "'queries' (a non-empty list of strings) and cookies are required"
+            }), 400
+        if len(queries) > MAX_BULK_QUERIES:
+            return jsonify({
+                'status': 'error',
+                'error': 'Invalid request',
+                'message': f'At most {MAX_BULK_QUERIES} queries per request'
+            }), 400
+
+        invalid = (_invalid_timeout_response(data) or _invalid_browser_profile_response(data)
+                   or _invalid_pagination_response(data) or _invalid_priority_response(data))
+        if invalid:
+            return invalid
+
+        if data.get('async'):
+            return submit_job('bulk', run_bulk_search, data)
+        payload = run_bulk_search(data, default_timeout=BATCH_TIMEOUT_SECONDS)
+        return jsonify(payload), 401 if payload['status'] == 'error' else 200
+
+    except Exception as e:
+        logger.error(f"Error in bulk_search_profiles: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'error': str(e),
+            'message': 'An error occurred while processing your request'
+        }), 500
+
+
 @app.route('/comments', methods=['POST'])
-@handle_timeout(180)  # 3 minutes timeout
 def scrape_comments():
     """
     Endpoint to scrape LinkedIn comments with improved error handling.
+    Pass "async": true to queue the scrape as a job and poll /jobs/<id>, or
+    "stream": true to receive comments as NDJSON/SSE while the thread loads.
+    Pass "incremental": true to only get comments added since the last incremental scrape.
+    "timeout" works as for /search, with COMMENTS_TIMEOUT_SECONDS as the default.
     """
     try:
         data = request.json
@@ -173,25 +872,18 @@ def scrape_comments():
                 'message': 'Please provide a valid LinkedIn URL'
             }), 400
 
-        # Call the scraper function
-        logger.info(f"Starting comment scraping for URL: {url}")
-        comments = scrape_comments_from_post(url, cookies)
-        
-        if not comments:
-            return jsonify({
-                'status': 'warning',
-                'message': 'No comments found for this post',
-                'comment_count': 0,
-                'comments': []
-            })
-        
-        return jsonify({
-            'status': 'success',
-            'message': 'Successfully retrieved comments',
-            'comment_count': len(comments),
-            'comments': comments,
-            'url': url
-        })
+        invalid = (_invalid_timeout_response(data) or _invalid_browser_profile_response(data)
+                   or _invalid_fetch_backend_response(data) or _invalid_priority_response(data))
+        if invalid:
+            return invalid
+
+        if data.get('async'):
+            return submit_job('comments', run_comment_scrape, data)
+        if data.get('stream'):
+            return stream_events(iter_comment_events(data, default_timeout=COMMENTS_TIMEOUT_SECONDS),
+                                 _comment_summary)
+
+        return jsonify(run_comment_scrape(data, default_timeout=COMMENTS_TIMEOUT_SECONDS))
 
     except Exception as e:
         logger.error(f"Error in scrape_comments: {str(e)}")
@@ -202,6 +894,372 @@ def scrape_comments():
         }), 500
 
 
+@app.route('/comments/batch', methods=['POST'])
+def scrape_comment_batch_route():
+    """
+    Scrape comments for many posts in one request. Duplicate URLs are scraped
+    once, and the posts share a fixed number of logged-in browser sessions.
+    Pass "sessions" and "max_posts_per_session" to tune the scheduling and
+    "async": true to run the batch as a job.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        urls = data.get('urls')
+        if not data.get('cookies') or not isinstance(urls, list) or not urls:
+            return jsonify({
+                'status': 'error',
+                'error': 'Missing required fields',
+                'message': "'urls' (a non-empty list) and cookies are required"
+            }), 400
+
+        invalid_urls = [url for url in urls if not isinstance(url, str) or not url.startswith('https://www.linkedin.com/')]
+        if invalid_urls:
+            return jsonify({
+                'status': 'error',
+                'error': 'Invalid URL',
+                'message': f'Please provide valid LinkedIn URLs: {invalid_urls[:5]}'
+            }), 400
+        if len(dedupe_post_urls(urls)) > MAX_BATCH_POSTS:
+            return jsonify({
+                'status': 'error',
+                'error': 'Invalid request',
+                'message': f'At most {MAX_BATCH_POSTS} distinct posts per batch'
+            }), 400
+
+        for field in ('sessions', 'max_posts_per_session'):
+            value = data.get(field)
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 1):
+                return jsonify({
+                    'status': 'error',
+                    'error': 'Invalid request',
+                    'message': f"'{field}' must be a positive integer"
+                }), 400
+
+        invalid = (_invalid_timeout_response(data) or _invalid_browser_profile_response(data)
+                   or _invalid_priority_response(data))
+        if invalid:
+            return invalid
+
+        if data.get('async'):
+            return submit_job('batch', run_comment_batch, data)
+        return jsonify(run_comment_batch(data, default_timeout=BATCH_TIMEOUT_SECONDS))
+
+    except Exception as e:
+        logger.error(f"Error in scrape_comment_batch: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'error': str(e),
+            'message': 'An error occurred while scraping comments'
+        }), 500
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Report status, progress and (once finished) the result of a job.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'error': 'Not Found',
+            'message': f'No job with id {job_id}'
+        }), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def delete_job(job_id):
+    """
+    Cancel a queued or running job, or discard a finished one.
+    """
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'error': 'Not Found',
+            'message': f'No job with id {job_id}'
+        }), 404
+    return jsonify(job.to_dict(include_result=False))
+
+
+@app.route('/profiles', methods=['GET'])
+def list_profiles():
+    """
+    Page through stored profiles. Pass the returned next_cursor as ?cursor=
+    to get the following page.
+    """
+    try:
+        page_size = min(int(request.args.get('page_size', 100)), 1000)
+        if page_size < 1:
+            raise ValueError('page_size must be positive')
+    except ValueError:
+        return jsonify({
+            'status': 'error',
+            'error': 'Invalid parameter',
+            'message': 'page_size must be an integer between 1 and 1000'
+        }), 400
+
+    fields = request.args.get('fields')
+    try:
+        profiles, next_cursor = fetch_profiles_page(
+            page_size=page_size,
+            cursor=request.args.get('cursor'),
+            fields=fields.split(',') if fields else None,
+            company=request.args.get('company'),
+            location=request.args.get('location'),
+            collected_after=request.args.get('collected_after'),
+            collected_before=request.args.get('collected_before')
+        )
+    except InvalidCursor as e:
+        return jsonify({
+            'status': 'error',
+            'error': 'Invalid cursor',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error in list_profiles: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'error': str(e),
+            'message': 'An error occurred while reading profiles'
+        }), 500
+
+    return jsonify({
+        'status': 'success',
+        'profile_count': len(profiles),
+        'profiles': profiles,
+        'next_cursor': next_cursor
+    })
+
+
+@app.route('/profiles/query', methods=['GET'])
+def query_profiles():
+    """
+    Query the local record store: exact (case-insensitive) filters on company,
+    title and location, profile_url, a collection date range, sort and order,
+    and keyset pagination. Pass the returned next_cursor as ?cursor= with the
+    same sort and order to get the following page.
+    """
+    sort = request.args.get('sort', 'collection_date')
+    order = request.args.get('order', 'desc').lower()
+    try:
+        page_size = min(int(request.args.get('page_size', 100)), 1000)
+        if page_size < 1:
+            raise ValueError('page_size must be positive')
+    except ValueError:
+        return jsonify({
+            'status': 'error',
+            'error': 'Invalid parameter',
+            'message': 'page_size must be an integer between 1 and 1000'
+        }), 400
+    if sort not in SORT_COLUMNS or order not in SORT_ORDERS:
+        return jsonify({
+            'status': 'error',
+            'error': 'Invalid parameter',
+            'message': f"sort must be one of {', '.join(SORT_COLUMNS)} and order one of {', '.join(SORT_ORDERS)}"
+        }), 400
+
+    try:
+        profiles, next_cursor = record_store.query_profiles(
+            company=request.args.get('company'),
+            title=request.args.get('title'),
+            location=request.args.get('location'),
+            profile_url=request.args.get('profile_url'),
+            collected_after=request.args.get('collected_after'),
+            collected_before=request.args.get('collected_before'),
+            sort=sort,
+            order=order,
+            page_size=page_size,
+            cursor=request.args.get('cursor')
+        )
+    except InvalidQueryCursor as e:
+        return jsonify({
+            'status': 'error',
+            'error': 'Invalid cursor',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error in query_profiles: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'error': str(e),
+            'message': 'An error occurred while querying profiles'
+        }), 500
+
+    return jsonify({
+        'status': 'success',
+        'profile_count': len(profiles),
+        'profiles': profiles,
+        'next_cursor': next_cursor
+    })
+
+
+@app.route('/export', methods=['GET'])
+def export_records():
+    """
+    Download profiles as CSV, NDJSON, Parquet or Arrow, streamed in chunks.
+    Exports a finished job's records with ?job_id=, otherwise the local record
+    store (with the filters of /profiles/query), or the Firestore replica with
+    ?source=firestore (with the filters of /profiles). ?columns= picks flattened columns
+    such as profile_data.name and ?gzip=1 compresses the download.
+    """
+    fmt = request.args.get('format', 'csv').lower()
+    columns = request.args.get('columns')
+    columns = [column.strip() for column in columns.split(',') if column.strip()] if columns else None
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    job_id = request.args.get('job_id')
+    default_columns = PROFILE_COLUMNS
+
+    if job_id:
+        job = job_manager.get(job_id)
+        if job is None or job.result is None:
+            return jsonify({
+                'status': 'error',
+                'error': 'Not Found',
+                'message': f'No finished job with id {job_id}'
+            }), 404
+        if not job.result.get('profiles'):
+            default_columns = None
+        records = job.result.get('profiles') or job.result.get('comments') or [
+            # Batch jobs: every post's comments, tagged with the post they belong to
+            dict(serialize_record(comment), post_url=result['url'])
+            for result in job.result.get('results', []) for comment in result['comments']
+        ]
+        name = f'linkedin_{job.kind}_{job_id}'
+    elif request.args.get('source', 'local') == 'firestore':
+        records = (profile for _, profile in iter_profiles(
+            fields=columns,
+            company=request.args.get('company'),
+            location=request.args.get('location'),
+            collected_after=request.args.get('collected_after'),
+            collected_before=request.args.get('collected_before')
+        ))
+        name = f'linkedin_profiles_{int(time.time())}'
+    else:
+        records = record_store.iter_profiles(
+            company=request.args.get('company'),
+            title=request.args.get('title'),
+            location=request.args.get('location'),
+            collected_after=request.args.get('collected_after'),
+            collected_before=request.args.get('collected_before'),
+            sort='collection_date',
+            order='asc'
+        )
+        name = f'linkedin_profiles_{int(time.time())}'
+
+    # Read the first page now, so a store error is an error response rather than a broken download
+    records = iter(records)
+    try:
+        first = next(records, None)
+    except Exception as e:
+        logger.error(f"Error in export_records: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'error': str(e),
+            'message': 'An error occurred while reading profiles'
+        }), 500
+    if first is not None:
+        records = itertools.chain([first], records)
+
+    try:
+        chunks, mimetype, extension = export_stream(records, fmt, columns, compress, default_columns)
+    except ExportFormatUnavailable as e:
+        return jsonify({
+            'status': 'error',
+            'error': 'Unsupported format',
+            'message': str(e)
+        }), 400
+
+    return Response(
+        stream_with_context(timed_iter(chunks, 'export')),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={name}.{extension}'}
+    )
+
+
+@app.route('/emails/validate', methods=['POST'])
+def validate_emails():
+    """
+    Validate a list of email addresses in one call. Each domain's MX records
+    are looked up once and cached, so repeated domains are cheap.
+    """
+    data = request.get_json(silent=True) or {}
+    emails = data.get('emails')
+    if not isinstance(emails, list) or not all(isinstance(email, str) for email in emails):
+        return jsonify({
+            'status': 'error',
+            'error': 'Invalid request',
+            'message': "'emails' must be a list of strings"
+        }), 400
+    if len(emails) > MAX_BULK_EMAILS:
+        return jsonify({
+            'status': 'error',
+            'error': 'Invalid request',
+            'message': f'At most {MAX_BULK_EMAILS} emails per request'
+        }), 400
+    verify_dns = data.get('verify_dns', True)
+    if not isinstance(verify_dns, bool):
+        return jsonify({
+            'status': 'error',
+            'error': 'Invalid request',
+            'message': "'verify_dns' must be true or false"
+        }), 400
+
+    results = validate_emails_bulk(emails, verify_dns=verify_dns)
+    return jsonify({
+        'status': 'success',
+        'valid_count': sum(1 for result in results if result['valid']),
+        'invalid_count': sum(1 for result in results if not result['valid']),
+        'results': results
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Stage latencies, page/record counters and component stats in the
+    Prometheus text format.
+    """
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _component_metrics():
+    query_stats = get_query_stats()
+    yield ('query_processor_events_total', 'counter',
+           'Query rule-parser hits, query cache hits/misses and model calls.',
+           stats_samples({k: v for k, v in query_stats.items() if k != 'cache_size'}, 'event'))
+    yield ('search_cache_events_total', 'counter', 'Search result cache lookups by outcome and refreshes.',
+           stats_samples(search_cache.stats, 'event'))
+    yield ('mx_cache_lookups_total', 'counter', 'MX cache lookups by outcome.', stats_samples(mx_cache.stats, 'result'))
+    yield ('driver_pool_events_total', 'counter', 'WebDriver pool creations, reuses, recycles and discards.',
+           stats_samples(driver_pool.stats, 'event'))
+    yield ('jobs', 'gauge', 'Jobs held by the job manager by status.',
+           stats_samples(job_manager.stats()['jobs'], 'status'))
+    yield ('rate_limit_queue_depth', 'gauge', 'Scrapes waiting for a page-load slot, by priority.',
+           stats_samples(rate_scheduler.queue_depth(), 'priority'))
+
+
+registry.register_collector(_component_metrics)
+
+
+@app.route('/stats', methods=['GET'])
+def get_stats():
+    """
+    Cache and queue counters for monitoring.
+    """
+    return jsonify({
+        'status': 'success',
+        'query_processor': get_query_stats(),
+        'search_cache': dict(search_cache.stats, size=len(search_cache)),
+        'mx_cache': mx_cache.stats,
+        'jobs': job_manager.stats(),
+        'rate_scheduler': rate_scheduler.snapshot(),
+        'checkpoints': job_manager.store.stats() if job_manager.store else None,
+        'record_store': dict(record_store.stats(), firestore_replica=FIRESTORE_REPLICA)
+    })
+
+
 @app.errorhandler(404)
 def not_found_error(error):
     return jsonify({
@@ -218,5 +1276,25 @@ def internal_error(error):
         'message': 'An unexpected error occurred'
     }), 500
 
+def resume_jobs():
+    """
+    Queue the jobs a previous process left unfinished, continuing from their
+    last checkpoints. Called by the server entry points, never on import, and
+    only the process holding the checkpoint store's lock resumes anything.
+    """
+    if os.getenv('RESUME_JOBS', 'true').lower() not in ('1', 'true', 'yes'):
+        return []
+    return job_manager.resume({
+        'search': run_search,
+        'comments': run_comment_scrape,
+        'batch': run_comment_batch,
+        'bulk': run_bulk_search
+    })
+
+
 if __name__ == '__main__':
+    configure_logging()
+    # The reloader runs this module twice; only the child that serves requests resumes jobs
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        resume_jobs()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,45 @@
+from typing import Dict, Optional
+from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
+from scraper.extraction import EXTRACTION_SCRIPT, SELECTORS, extract_raw_records
+
+
+class FixtureDriver:
+    """
+    Stand-in for a logged-in Chrome driver that serves saved HTML. The card
+    extraction script is answered from the page's HTML, including the
+    only_new bookkeeping, so extract_records_from_driver runs unchanged.
+    """
+
+    def __init__(self, pages: Dict[str, str], default_page: Optional[str] = None):
+        self.pages = pages
+        self.default_page = default_page
+        self.current_url = None
+        self.page_source = ''
+        self.script_calls = 0
+        self._read = {}
+
+    def get(self, url: str) -> None:
+        self.current_url = url
+        self.page_source = self.pages.get(url, self.default_page) or ''
+        self._read = {}
+
+    def find_elements(self, by, value):
+        selector = f'.{value}' if by == By.CLASS_NAME else value
+        return BeautifulSoup(self.page_source, 'html.parser').select(selector)
+
+    def quit(self):
+        pass
+
+    def execute_script(self, script, *args):
+        self.script_calls += 1
+        if script != EXTRACTION_SCRIPT:
+            raise AssertionError(f"Unexpected script; FixtureDriver only runs the extraction script, got: {script[:40]}")
+        spec, only_new = args[0], args[1] if len(args) > 1 else False
+        kind = next(k for k, v in SELECTORS.items() if v['container'] == spec['container'])
+        records = extract_raw_records(self.page_source, kind, self.current_url)
+        if not only_new:
+            return records
+        start = self._read.get(kind, 0)
+        self._read[kind] = len(records)
+        return records[start:]
@@ -0,0 +1,51 @@
+"""
+Search-result and comment-thread pages of any size, built from the markup of
+the recorded pages in test_fixtures/ so benchmarks never need a live session.
+"""
+import os
+from typing import Dict
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test_fixtures')
+
+SIZES = (10, 100, 1000)
+
+PROFILE_CARD = """  <li class="reusable-search__result-container">
+    <a class="app-aware-link" href="https://www.linkedin.com/in/user-{i}?miniProfileUrn=urn%3Ali%3Afs_miniProfile%3A{i}">
+      <span class="actor-name">User {i}</span>
+    </a>
+    <div class="subline-level-1">Marketing Director at Company {company}</div>
+    <div class="subline-level-2">City {city}</div>
+  </li>
+"""
+
+COMMENT_CARD = """  <article class="comments-comment-item">
+    <span class="comments-post-meta__name-text">Commenter {i}</span>
+    <time class="comments-comment-item__timestamp">{hours}h</time>
+    <div class="comments-comment-item__main-content"><span>Comment number {i}, thanks for sharing these insights!</span></div>
+    <span class="comments-comment-social-bar__social-counts">{likes} reactions</span>
+  </article>
+"""
+
+
+def recorded_page(name: str) -> str:
+    """One of the recorded pages, e.g. 'search_results.html'."""
+    with open(os.path.join(FIXTURE_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def search_results_page(size: int) -> str:
+    cards = ''.join(PROFILE_CARD.format(i=i, company=i % 50, city=i % 20) for i in range(size))
+    return ('<!DOCTYPE html>\n<html>\n<body>\n<ul class="reusable-search__entity-result-list">\n'
+            f'{cards}</ul>\n</body>\n</html>\n')
+
+
+def comment_thread_page(size: int) -> str:
+    cards = ''.join(COMMENT_CARD.format(i=i, hours=i % 24 + 1, likes=f'{i * 7:,}') for i in range(size))
+    return ('<!DOCTYPE html>\n<html>\n<body>\n<div class="comments-comments-list">\n'
+            f'{cards}</div>\n</body>\n</html>\n')
+
+
+def pages(kind: str) -> Dict[int, str]:
+    """Pages of every benchmark size for 'profile' or 'comment'."""
+    build = search_results_page if kind == 'profile' else comment_thread_page
+    return {size: build(size) for size in SIZES}
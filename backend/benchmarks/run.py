@@ -0,0 +1,208 @@
+"""
+Offline micro-benchmarks for the scraping pipeline.
+
+    python -m benchmarks.run                      # all benchmarks, JSON on stdout
+    python -m benchmarks.run --output bench.json  # write results to a file
+    python -m benchmarks.run --compare bench.json # rerun and compare with saved results
+
+Run from the backend directory. Nothing here talks to LinkedIn or Firestore.
+"""
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from scraper.extraction import extract_records, extract_records_from_driver
+from scraper.dedup import DedupIndex, profile_key, comment_key
+from scraper.records import Profile, Comment, apply_gdpr, serialize_record
+from exports.streaming_export import export_stream
+from database.firestore_writer import BatchWriter
+from database.memory_firestore import MemoryFirestore
+from benchmarks.fixtures import SIZES, search_results_page, comment_thread_page
+from benchmarks.fake_driver import FixtureDriver
+
+BENCHMARKS: Dict[str, Callable[[int], Callable[[], None]]] = {}
+
+
+def benchmark(name: str):
+    """
+    Register a benchmark. The decorated function does the untimed setup for
+    one size and returns the callable that is timed.
+    """
+    def decorator(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return decorator
+
+
+def _raw_profiles(size: int) -> List[Dict]:
+    # One in five profiles repeats an earlier one, as consecutive search pages do
+    return [{'name': f'User {i % (size - size // 5 or 1)}', 'title': 'Marketing Director',
+             'location': f'City {i % 20}', 'email': f'user{i}@example.com',
+             'profile_url': f'https://www.linkedin.com/in/user-{i % (size - size // 5 or 1)}'}
+            for i in range(size)]
+
+
+def _raw_comments(size: int) -> List[Dict]:
+    return [{'name': f'Commenter {i}', 'comment': f'Comment number {i}', 'timestamp': f'{i % 24 + 1}h',
+             'likes': i * 7} for i in range(size)]
+
+
+@benchmark('extract_profiles_html')
+def bench_extract_profiles_html(size):
+    html = search_results_page(size)
+    return lambda: extract_records(html, 'profile')
+
+
+@benchmark('extract_comments_html')
+def bench_extract_comments_html(size):
+    html = comment_thread_page(size)
+    return lambda: extract_records(html, 'comment')
+
+
+@benchmark('extract_comments_driver')
+def bench_extract_comments_driver(size):
+    url = 'https://www.linkedin.com/posts/benchmark'
+    driver = FixtureDriver({url: comment_thread_page(size)})
+
+    def run():
+        driver.get(url)
+        extract_records_from_driver(driver, 'comment', only_new=True)
+    return run
+
+
+@benchmark('dedup_profiles')
+def bench_dedup_profiles(size):
+    raw = _raw_profiles(size)
+    return lambda: DedupIndex(profile_key).add_all(Profile.from_dict(record) for record in raw)
+
+
+@benchmark('dedup_comments')
+def bench_dedup_comments(size):
+    raw = _raw_comments(size)
+    return lambda: DedupIndex(comment_key).add_all(Comment.from_dict(record) for record in raw)
+
+
+@benchmark('gdpr_transform')
+def bench_gdpr_transform(size):
+    raw = _raw_profiles(size)
+    return lambda: [profile.serialize() for profile in apply_gdpr(Profile.from_dict(record) for record in raw)]
+
+
+@benchmark('csv_export')
+def bench_csv_export(size):
+    profiles = apply_gdpr(Profile.from_dict(record) for record in _raw_profiles(size))
+
+    def run():
+        chunks, _, _ = export_stream(profiles, 'csv')
+        for _ in chunks:
+            pass
+    return run
+
+
+@benchmark('firestore_writer')
+def bench_firestore_writer(size):
+    documents = [serialize_record(profile) for profile in apply_gdpr(Profile.from_dict(record)
+                                                                     for record in _raw_profiles(size))]
+
+    db = MemoryFirestore()
+    writer = BatchWriter(lambda: db, collection='benchmark', linger_seconds=0)
+
+    def run():
+        writer.put_many(documents)
+        writer.flush()
+    return run
+
+
+def run_benchmarks(sizes=SIZES, repeat: int = 5, only: Optional[str] = None) -> Dict:
+    """Run the registered benchmarks and return the JSON-ready report."""
+    results = []
+    for name, setup in BENCHMARKS.items():
+        if only and only not in name:
+            continue
+        for size in sizes:
+            fn = setup(size)
+            fn()  # warm up caches and lazy imports
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                fn()
+                timings.append(time.perf_counter() - started)
+            median = statistics.median(timings)
+            results.append({
+                'name': name,
+                'size': size,
+                'repeat': repeat,
+                'min_seconds': min(timings),
+                'median_seconds': median,
+                'mean_seconds': statistics.mean(timings),
+                'records_per_second': size / median if median else None
+            })
+    return {'meta': _metadata(), 'results': results}
+
+
+def _metadata() -> Dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = 1.2) -> List[Dict]:
+    """
+    Median time ratio (current / baseline) per benchmark and size; ratios above
+    threshold are flagged as regressions.
+    """
+    previous = {(r['name'], r['size']): r for r in baseline['results']}
+    rows = []
+    for result in current['results']:
+        before = previous.get((result['name'], result['size']))
+        if not before or not before['median_seconds']:
+            continue
+        ratio = result['median_seconds'] / before['median_seconds']
+        rows.append({'name': result['name'], 'size': result['size'], 'ratio': ratio,
+                     'regression': ratio > threshold})
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Offline scraper pipeline benchmarks')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in SIZES),
+                        help='comma-separated record counts per benchmark')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', help='run benchmarks whose name contains this')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--compare', help='saved JSON report to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='median slowdown ratio that counts as a regression')
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks([int(size) for size in args.sizes.split(',')], args.repeat, args.only)
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            report['comparison'] = compare(json.load(f), report, args.threshold)
+        regressions = [row for row in report['comparison'] if row['regression']]
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
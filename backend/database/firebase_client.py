@@ -1,21 +1,154 @@
+import os
+import json
+import atexit
+import base64
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
 import firebase_admin
 from firebase_admin import credentials, firestore
+from .firestore_writer import BatchWriter
 
-# Firebase initialization
-cred = credentials.Certificate("C:/Users/USER/Desktop/INTERVIEWS/LinkedIn_Scraper/backend/firebase_key.json")
-firebase_admin.initialize_app(cred)
-db = firestore.client()
+FIREBASE_CREDENTIALS = os.getenv(
+    "FIREBASE_CREDENTIALS", "C:/Users/USER/Desktop/INTERVIEWS/LinkedIn_Scraper/backend/firebase_key.json"
+)
 
-def save_to_firebase(data):
+_db = None
+_db_lock = threading.Lock()
+
+
+def get_db():
+    """
+    Firebase initialization, done on first use so importing this module
+    doesn't need credentials. Set FIRESTORE_EMULATOR_HOST to use the emulator.
+    """
+    global _db
+    with _db_lock:
+        if _db is None:
+            if not firebase_admin._apps:
+                cred = credentials.Certificate(FIREBASE_CREDENTIALS)
+                firebase_admin.initialize_app(cred)
+            _db = firestore.client()
+        return _db
+
+
+profile_writer = BatchWriter(
+    get_db,
+    collection='linkedin_profiles',
+    max_queue=int(os.getenv("FIRESTORE_WRITE_QUEUE_SIZE", "5000"))
+)
+atexit.register(profile_writer.close)
+
+
+def save_to_firebase(data, deadline=None):
     """
     Save scraped data to Firebase.
+    Profiles are queued for the background batch writer; this only blocks
+    when the write queue is full, and with a deadline no longer than its
+    remaining budget (queue.Full is raised then). Once the deadline has run
+    out there is no budget left to protect, so the profiles are queued
+    without a cap rather than dropped.
     """
-    for profile in data:
-        db.collection('linkedin_profiles').add(profile)
+    if deadline is None or deadline.expired:
+        profile_writer.put_many(data)
+        return
+    for document in data:
+        profile_writer.put(document, timeout=deadline.remaining())
 
 def fetch_data():
     """
     Fetch data from Firebase.
+    Loads the whole collection; prefer iter_profiles() for anything large.
+    """
+    docs = get_db().collection('linkedin_profiles').stream()
+    return [doc.to_dict() for doc in docs]
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor token can't be resumed from."""
+
+
+def encode_cursor(collection_date: str, doc_id: str) -> str:
+    token = json.dumps({'collection_date': collection_date, 'id': doc_id})
+    return base64.urlsafe_b64encode(token.encode()).decode()
+
+
+def decode_cursor(token: str) -> Tuple[str, str]:
+    """The (collection_date, document ID) sort key to resume after."""
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return cursor['collection_date'], cursor['id']
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {token}") from e
+
+
+def _profiles_query(db, fields: Optional[List[str]] = None, company: Optional[str] = None,
+                    location: Optional[str] = None, collected_after: Optional[str] = None,
+                    collected_before: Optional[str] = None):
+    """
+    Build the filtered, ordered query behind iter_profiles/fetch_profiles_page.
+    Results are ordered by collection_date, then document ID, so cursors are stable.
+    Equality filters combined with the date ordering need a composite index.
+    """
+    query = db.collection('linkedin_profiles')
+    if company:
+        query = query.where('profile_data.company', '==', company)
+    if location:
+        query = query.where('profile_data.location', '==', location)
+    if collected_after:
+        query = query.where('collection_date', '>=', collected_after)
+    if collected_before:
+        query = query.where('collection_date', '<', collected_before)
+    query = query.order_by('collection_date').order_by('__name__')
+    if fields:
+        # The ordering field has to be in the projection for cursors to work
+        query = query.select(sorted(set(fields) | {'collection_date'}))
+    return query
+
+
+def iter_profiles(page_size: int = 500, fields: Optional[List[str]] = None, company: Optional[str] = None,
+                  location: Optional[str] = None, collected_after: Optional[str] = None,
+                  collected_before: Optional[str] = None, start_after: Optional[Tuple[str, str]] = None,
+                  db=None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Stream (document_id, profile) pairs from the profile store one page at a
+    time, so memory stays flat regardless of collection size.
+    fields projects the returned documents (dotted paths such as 'profile_data.name'),
+    collected_after/collected_before are ISO timestamps, and start_after is the
+    (collection_date, document ID) sort key to resume after. Resuming from
+    the sort key rather than the document's current snapshot keeps the
+    position even when the document was rewritten with a new collection_date.
+    """
+    db = db or get_db()
+    query = _profiles_query(db, fields, company, location, collected_after, collected_before)
+    last_key = start_after
+
+    while True:
+        page_query = query.limit(page_size)
+        if last_key is not None:
+            page_query = page_query.start_after({'collection_date': last_key[0], '__name__': last_key[1]})
+        count = 0
+        for snapshot in page_query.stream():
+            count += 1
+            profile = snapshot.to_dict()
+            last_key = (profile.get('collection_date'), snapshot.id)
+            yield snapshot.id, profile
+        if count < page_size:
+            return
+
+
+def fetch_profiles_page(page_size: int = 100, cursor: Optional[str] = None, db=None,
+                        **filters) -> Tuple[List[Dict], Optional[str]]:
+    """
+    One page of profiles plus the cursor token for the next page (None on the last page).
+    Accepts the same filters as iter_profiles.
     """
-    docs = db.collection('linkedin_profiles').stream()
-    return [doc.to_dict() for doc in docs]
\ No newline at end of file
+    start_after = decode_cursor(cursor) if cursor else None
+    profiles = []
+    last_key = None
+    # Ask for one extra document to know whether another page exists
+    for doc_id, profile in iter_profiles(page_size=page_size + 1, start_after=start_after, db=db, **filters):
+        if len(profiles) == page_size:
+            return profiles, encode_cursor(*last_key)
+        profiles.append(profile)
+        last_key = (profile.get('collection_date'), doc_id)
+    return profiles, None
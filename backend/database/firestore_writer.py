@@ -0,0 +1,148 @@
+import json
+import time
+import queue
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, Iterable, Optional
+from scraper.dedup import normalize_profile_url
+from observability.metrics import stage_timer, FIRESTORE_BATCH_SIZE
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Firestore rejects batches with more than 500 writes
+FIRESTORE_BATCH_LIMIT = 500
+
+
+def profile_document_id(record: Dict) -> str:
+    """
+    Deterministic document ID for a (possibly GDPR-wrapped) profile, so writing
+    the same profile twice updates one document instead of adding a second.
+    """
+    profile = record.get('profile_data', record)
+    url = profile.get('profile_url')
+    if url:
+        identity = normalize_profile_url(url)
+    else:
+        identity = json.dumps(profile, sort_keys=True, default=str)
+    return hashlib.sha1(identity.encode()).hexdigest()
+
+
+class BatchWriter:
+    """
+    Writes documents to one Firestore collection from a background thread.
+    Documents are queued by put() and committed in batches of up to batch_size
+    with set(merge=True) on deterministic IDs. The queue is bounded: put()
+    blocks when it is full, which slows producers down to what Firestore takes.
+    """
+
+    def __init__(self, db_factory: Callable, collection: str = 'linkedin_profiles',
+                 batch_size: int = FIRESTORE_BATCH_LIMIT, max_queue: int = 5000,
+                 linger_seconds: float = 0.5, max_retries: int = 3,
+                 id_fn: Callable[[Dict], str] = profile_document_id):
+        self._db_factory = db_factory
+        self.collection = collection
+        self.batch_size = min(batch_size, FIRESTORE_BATCH_LIMIT)
+        self.linger_seconds = linger_seconds
+        self.max_retries = max_retries
+        self.id_fn = id_fn
+        self._queue: "queue.Queue[Dict]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.stats = {'queued': 0, 'written': 0, 'batches': 0, 'failed': 0, 'last_batch_size': 0}
+        self._stats_lock = threading.Lock()
+        self.last_error: Optional[str] = None
+
+    def put(self, document: Dict, timeout: Optional[float] = None) -> None:
+        """
+        Queue one document. Blocks while the queue is full; raises queue.Full
+        if it is still full after timeout seconds.
+        """
+        self._ensure_started()
+        self._queue.put(document, timeout=timeout)
+        with self._stats_lock:
+            self.stats['queued'] += 1
+
+    def put_many(self, documents: Iterable[Dict], timeout: Optional[float] = None) -> None:
+        for document in documents:
+            self.put(document, timeout=timeout)
+
+    def flush(self) -> None:
+        """Block until every queued document has been committed or given up on."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Flush pending documents and stop the background thread."""
+        self.flush()
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._stopping.clear()
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _ensure_started(self) -> None:
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='firestore-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            documents = [first]
+            linger_until = time.time() + self.linger_seconds
+            while len(documents) < self.batch_size:
+                remaining = linger_until - time.time()
+                try:
+                    if remaining > 0:
+                        documents.append(self._queue.get(timeout=remaining))
+                    else:
+                        documents.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._commit(documents)
+            finally:
+                for _ in documents:
+                    self._queue.task_done()
+
+    def _commit(self, documents) -> None:
+        # Later copies of the same document win, like consecutive set() calls would
+        by_id = {}
+        for document in documents:
+            by_id[self.id_fn(document)] = document
+
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                db = self._db_factory()
+                batch = db.batch()
+                collection = db.collection(self.collection)
+                for doc_id, document in by_id.items():
+                    batch.set(collection.document(doc_id), document, merge=True)
+                with stage_timer('firestore_commit'):
+                    batch.commit()
+                FIRESTORE_BATCH_SIZE.observe(len(by_id))
+                with self._stats_lock:
+                    self.stats['written'] += len(by_id)
+                    self.stats['batches'] += 1
+                    self.stats['last_batch_size'] = len(by_id)
+                return
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"Firestore batch commit failed (attempt {attempt}/{self.max_retries}): {str(e)}")
+                if attempt < self.max_retries:
+                    time.sleep(2 ** (attempt - 1))
+
+        with self._stats_lock:
+            self.stats['failed'] += len(by_id)
+        logger.error(f"Dropped {len(by_id)} documents after {self.max_retries} failed commits")
@@ -0,0 +1,262 @@
+import copy
+import operator
+import threading
+import uuid
+from typing import Dict, List
+
+_OPERATORS = {
+    '==': operator.eq,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+_MISSING = object()
+
+
+def _get_field(doc_id: str, data: Dict, path: str):
+    if path == '__name__':
+        return doc_id
+    value = data
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _project(data: Dict, paths: List[str]) -> Dict:
+    projected = {}
+    for path in paths:
+        value = _get_field(None, data, path)
+        if value is _MISSING:
+            continue
+        target = projected
+        parts = path.split('.')
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = copy.deepcopy(value)
+    return projected
+
+
+def _deep_merge(target: Dict, data: Dict) -> None:
+    """Merge nested maps the way set(..., merge=True) does."""
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _deep_merge(target[key], value)
+        else:
+            target[key] = value
+
+
+class MemoryDocumentSnapshot:
+    def __init__(self, doc_id: str, data, full_data=None):
+        self.id = doc_id
+        self._data = data
+        # Unprojected data, used to resolve cursors from projected results
+        self._full_data = full_data if full_data is not None else data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+
+class MemoryDocumentReference:
+    def __init__(self, collection: "MemoryCollection", doc_id: str):
+        self._collection = collection
+        self.id = doc_id
+
+    def set(self, data: Dict, merge: bool = False) -> None:
+        with self._collection._lock:
+            docs = self._collection._docs
+            if merge and self.id in docs:
+                _deep_merge(docs[self.id], copy.deepcopy(data))
+            else:
+                docs[self.id] = copy.deepcopy(data)
+
+    def get(self) -> MemoryDocumentSnapshot:
+        with self._collection._lock:
+            return MemoryDocumentSnapshot(self.id, self._collection._docs.get(self.id))
+
+
+class MemoryCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self._docs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def document(self, doc_id: str = None) -> MemoryDocumentReference:
+        return MemoryDocumentReference(self, doc_id or uuid.uuid4().hex)
+
+    def add(self, data: Dict):
+        ref = self.document()
+        ref.set(data)
+        return None, ref
+
+    def stream(self):
+        return MemoryQuery(self).stream()
+
+    def where(self, field_path: str, op_string: str, value) -> "MemoryQuery":
+        return MemoryQuery(self).where(field_path, op_string, value)
+
+    def order_by(self, field_path: str, direction: str = 'ASCENDING') -> "MemoryQuery":
+        return MemoryQuery(self).order_by(field_path, direction)
+
+    def select(self, field_paths) -> "MemoryQuery":
+        return MemoryQuery(self).select(field_paths)
+
+    def limit(self, count: int) -> "MemoryQuery":
+        return MemoryQuery(self).limit(count)
+
+    def start_after(self, snapshot) -> "MemoryQuery":
+        return MemoryQuery(self).start_after(snapshot)
+
+
+class MemoryQuery:
+    """Immutable query over a MemoryCollection, like firestore's Query."""
+
+    def __init__(self, collection: MemoryCollection):
+        self._collection = collection
+        self._filters = []
+        self._orders = []
+        self._fields = None
+        self._limit = None
+        self._start_after = None
+
+    def _copy(self) -> "MemoryQuery":
+        query = MemoryQuery(self._collection)
+        query._filters = list(self._filters)
+        query._orders = list(self._orders)
+        query._fields = self._fields
+        query._limit = self._limit
+        query._start_after = self._start_after
+        return query
+
+    def where(self, field_path: str, op_string: str, value) -> "MemoryQuery":
+        query = self._copy()
+        query._filters.append((field_path, _OPERATORS[op_string], value))
+        return query
+
+    def order_by(self, field_path: str, direction: str = 'ASCENDING') -> "MemoryQuery":
+        query = self._copy()
+        query._orders.append((field_path, direction == 'DESCENDING'))
+        return query
+
+    def select(self, field_paths) -> "MemoryQuery":
+        query = self._copy()
+        query._fields = list(field_paths)
+        return query
+
+    def limit(self, count: int) -> "MemoryQuery":
+        query = self._copy()
+        query._limit = count
+        return query
+
+    def start_after(self, snapshot) -> "MemoryQuery":
+        query = self._copy()
+        query._start_after = snapshot
+        return query
+
+    def _sort_key(self, doc_id: str, data: Dict):
+        key = []
+        orders = self._orders + ([] if any(f == '__name__' for f, _ in self._orders) else [('__name__', False)])
+        for field_path, descending in orders:
+            value = _get_field(doc_id, data, field_path)
+            key.append(_Descending(value) if descending else value)
+        return tuple(key)
+
+    def _cursor_key(self, cursor):
+        """Sort key of a start_after cursor: a snapshot, or a dict of values for the ordered fields."""
+        if isinstance(cursor, MemoryDocumentSnapshot):
+            return self._sort_key(cursor.id, cursor._full_data)
+        data = {}
+        for field_path, value in cursor.items():
+            if field_path == '__name__':
+                continue
+            target = data
+            parts = field_path.split('.')
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+        name = cursor['__name__']
+        return self._sort_key(getattr(name, 'id', name), data)
+
+    def stream(self):
+        with self._collection._lock:
+            items = [(doc_id, copy.deepcopy(data)) for doc_id, data in self._collection._docs.items()]
+
+        matched = []
+        for doc_id, data in items:
+            ok = True
+            for field_path, compare, value in self._filters + [(f, None, None) for f, _ in self._orders]:
+                current = _get_field(doc_id, data, field_path)
+                # Like Firestore, documents without a filtered or ordered field are left out
+                if current is _MISSING or (compare is not None and not compare(current, value)):
+                    ok = False
+                    break
+            if ok:
+                matched.append((doc_id, data))
+        matched.sort(key=lambda item: self._sort_key(*item))
+
+        if self._start_after is not None:
+            cursor = self._cursor_key(self._start_after)
+            matched = [item for item in matched if self._sort_key(*item) > cursor]
+        if self._limit is not None:
+            matched = matched[:self._limit]
+
+        for doc_id, data in matched:
+            projected = _project(data, self._fields) if self._fields is not None else data
+            yield MemoryDocumentSnapshot(doc_id, projected, full_data=data)
+
+
+class _Descending:
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return self.value > other.value
+
+    def __gt__(self, other):
+        return self.value < other.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+class MemoryWriteBatch:
+    def __init__(self, client: "MemoryFirestore"):
+        self._client = client
+        self._writes = []
+
+    def set(self, ref: MemoryDocumentReference, data: Dict, merge: bool = False) -> None:
+        self._writes.append((ref, data, merge))
+
+    def commit(self) -> None:
+        self._client.commits.append(len(self._writes))
+        for ref, data, merge in self._writes:
+            ref.set(data, merge=merge)
+        self._writes = []
+
+
+class MemoryFirestore:
+    """
+    In-memory stand-in for a firestore.Client, covering the calls this
+    backend makes. Used by tests and benchmarks.
+    """
+
+    def __init__(self):
+        self._collections: Dict[str, MemoryCollection] = {}
+        self._lock = threading.Lock()
+        self.commits = []
+
+    def collection(self, name: str) -> MemoryCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = MemoryCollection(name)
+            return self._collections[name]
+
+    def batch(self) -> MemoryWriteBatch:
+        return MemoryWriteBatch(self)
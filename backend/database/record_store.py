@@ -0,0 +1,234 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from scraper.dedup import normalize_profile_url, comment_content_key
+from scraper.records import serialize_record
+from .firestore_writer import profile_document_id
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id TEXT PRIMARY KEY,
+    profile_url TEXT NOT NULL DEFAULT '',
+    name TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    company TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    title TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    location TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    collection_date TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_profiles_profile_url ON profiles (profile_url, id);
+CREATE INDEX IF NOT EXISTS idx_profiles_name ON profiles (name, id);
+CREATE INDEX IF NOT EXISTS idx_profiles_company ON profiles (company, id);
+CREATE INDEX IF NOT EXISTS idx_profiles_title ON profiles (title, id);
+CREATE INDEX IF NOT EXISTS idx_profiles_location ON profiles (location, id);
+CREATE INDEX IF NOT EXISTS idx_profiles_collection_date ON profiles (collection_date, id);
+-- "at company X, scraped this week, newest first" without sorting in a temp table
+CREATE INDEX IF NOT EXISTS idx_profiles_company_date ON profiles (company, collection_date, id);
+CREATE INDEX IF NOT EXISTS idx_profiles_location_date ON profiles (location, collection_date, id);
+CREATE TABLE IF NOT EXISTS comments (
+    id TEXT PRIMARY KEY,
+    post_url TEXT NOT NULL,
+    name TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    collected_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_comments_post_url ON comments (post_url, id);
+CREATE INDEX IF NOT EXISTS idx_comments_collected_at ON comments (collected_at, id);
+"""
+
+# Columns /profiles/query can sort by; each has an index on (column, id) for keyset pagination
+SORT_COLUMNS = ('collection_date', 'name', 'company', 'title', 'location')
+SORT_ORDERS = ('asc', 'desc')
+
+
+class InvalidCursor(ValueError):
+    """Raised when a query cursor is malformed or was issued for a different sort."""
+
+
+def encode_cursor(sort: str, order: str, value: str, record_id: str) -> str:
+    token = json.dumps({'sort': sort, 'order': order, 'value': value, 'id': record_id})
+    return base64.urlsafe_b64encode(token.encode()).decode()
+
+
+def decode_cursor(token: str, sort: str, order: str) -> Tuple[str, str]:
+    """The (sort value, id) to continue after; the cursor must come from the same sort and order."""
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(token.encode()))
+        value, record_id = cursor['value'], cursor['id']
+        issued_for = (cursor['sort'], cursor['order'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {token}") from e
+    if issued_for != (sort, order):
+        raise InvalidCursor(f"Cursor was issued for sort={issued_for[0]}&order={issued_for[1]}")
+    return value, record_id
+
+
+class RecordStore:
+    """
+    Local SQLite copy of everything scraped: profiles in their stored (GDPR)
+    shape with their searchable fields in indexed columns, and comments per
+    post. Profiles use the same deterministic ID as their Firestore document,
+    so scraping a profile again updates its row. Reads go here instead of to
+    Firestore, which is only a replica. The file holds personal data and is
+    created readable by its owner only.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._ready = False
+
+    @contextmanager
+    def _connect(self):
+        with self._lock:
+            if not self._ready:
+                # Created on first use, so importing the module touches no files
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                if not os.path.exists(self.path):
+                    os.close(os.open(self.path, os.O_CREAT | os.O_WRONLY, 0o600))
+            conn = sqlite3.connect(self.path, timeout=30)
+            try:
+                if not self._ready:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(SCHEMA)
+                    self._ready = True
+                with conn:
+                    yield conn
+            finally:
+                conn.close()
+
+    def save_profiles(self, profiles: Iterable) -> int:
+        """Insert or update profiles (records or stored dicts) in one transaction; returns how many."""
+        rows = []
+        now = time.time()
+        for profile in profiles:
+            document = serialize_record(profile)
+            fields = document.get('profile_data', document)
+            url = fields.get('profile_url')
+            rows.append((
+                profile_document_id(document),
+                normalize_profile_url(url) if url else '',
+                fields.get('name') or '',
+                fields.get('company') or '',
+                fields.get('title') or '',
+                fields.get('location') or '',
+                document.get('collection_date') or '',
+                json.dumps(document),
+                now
+            ))
+        if not rows:
+            return 0
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO profiles (id, profile_url, name, company, title, location, collection_date, data, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+                "profile_url = excluded.profile_url, name = excluded.name, company = excluded.company, "
+                "title = excluded.title, location = excluded.location, collection_date = excluded.collection_date, "
+                "data = excluded.data, updated_at = excluded.updated_at",
+                rows
+            )
+        return len(rows)
+
+    def save_comments(self, post_url: str, comments: Iterable, collected_at: Optional[str] = None) -> int:
+        """
+        Insert or update one post's comments in one transaction; returns how many.
+        Comments are identified by post, author and text, since LinkedIn's
+        relative timestamps change between visits.
+        """
+        collected_at = collected_at or time.strftime('%Y-%m-%dT%H:%M:%S')
+        rows = []
+        for comment in comments:
+            document = serialize_record(comment)
+            record_id = hashlib.sha1(f"{post_url}|{comment_content_key(document)}".encode()).hexdigest()
+            rows.append((record_id, post_url, document.get('name') or '', collected_at, json.dumps(document)))
+        if not rows:
+            return 0
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO comments (id, post_url, name, collected_at, data) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET collected_at = excluded.collected_at, data = excluded.data",
+                rows
+            )
+        return len(rows)
+
+    def query_profiles(self, company: Optional[str] = None, title: Optional[str] = None,
+                       location: Optional[str] = None, profile_url: Optional[str] = None,
+                       collected_after: Optional[str] = None, collected_before: Optional[str] = None,
+                       sort: str = 'collection_date', order: str = 'desc', page_size: int = 100,
+                       cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One page of stored profiles plus the cursor for the next page (None on
+        the last page). company, title and location match case-insensitively;
+        collected_after/collected_before are ISO timestamps. Pages are cut by
+        keyset on (sort column, id), so every page is an index range scan no
+        matter how deep it is, and new rows don't shift the pages after them.
+        Sort columns are not immutable, though: a profile scraped again while
+        paging moves to its new collection_date (or name, title, ...) and may
+        be returned twice or not at all.
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_COLUMNS)}")
+        if order not in SORT_ORDERS:
+            raise ValueError("order must be 'asc' or 'desc'")
+
+        clauses, params = [], []
+        for column, value in (('company', company), ('title', title), ('location', location)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if profile_url:
+            clauses.append("profile_url = ?")
+            params.append(normalize_profile_url(profile_url))
+        if collected_after:
+            clauses.append("collection_date >= ?")
+            params.append(collected_after)
+        if collected_before:
+            clauses.append("collection_date < ?")
+            params.append(collected_before)
+        if cursor:
+            clauses.append(f"({sort}, id) {'<' if order == 'desc' else '>'} (?, ?)")
+            params.extend(decode_cursor(cursor, sort, order))
+
+        # One extra row tells whether another page exists
+        sql = (f"SELECT id, {sort}, data FROM profiles"
+               + (f" WHERE {' AND '.join(clauses)}" if clauses else '')
+               + f" ORDER BY {sort} {order.upper()}, id {order.upper()} LIMIT ?")
+        with self._connect() as conn:
+            rows = conn.execute(sql, params + [page_size + 1]).fetchall()
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            record_id, value, _ = rows[-1]
+            next_cursor = encode_cursor(sort, order, value, record_id)
+        return [json.loads(data) for _, _, data in rows], next_cursor
+
+    def iter_profiles(self, page_size: int = 500, **filters) -> Iterator[Dict]:
+        """Stream every stored profile matching the query_profiles filters, a page at a time."""
+        cursor = None
+        while True:
+            profiles, cursor = self.query_profiles(page_size=page_size, cursor=cursor, **filters)
+            yield from profiles
+            if cursor is None:
+                return
+
+    def stats(self) -> Dict:
+        with self._connect() as conn:
+            profiles, = conn.execute("SELECT COUNT(*) FROM profiles").fetchone()
+            comments, = conn.execute("SELECT COUNT(*) FROM comments").fetchone()
+        return {'profiles': profiles, 'comments': comments}
+
+
+record_store = RecordStore(os.getenv('RECORD_STORE_DB', os.path.join('scrape_state', 'records.sqlite3')))
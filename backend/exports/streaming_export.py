@@ -0,0 +1,242 @@
+import io
+import csv
+import json
+import zlib
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from scraper.records import serialize_record
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CSV_CHUNK_ROWS = 500
+COLUMNAR_BATCH_ROWS = 10000
+# Records read ahead to find the columns of an export that doesn't name them
+SCHEMA_SAMPLE_ROWS = 1000
+
+# Every column of a stored (GDPR-shaped) profile, so exports don't depend on
+# which fields the first profiles happen to have
+PROFILE_COLUMNS = ['data_source', 'collection_date', 'legal_basis', 'retention_period'] + [
+    f'profile_data.{field}' for field in ('name', 'title', 'location', 'company', 'profile_url', 'email_hash')
+]
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+
+class ExportFormatUnavailable(Exception):
+    """Raised when a format is unknown or its optional dependency is missing."""
+
+
+def flatten_record(record: Dict, prefix: str = '') -> Dict:
+    """
+    Flatten nested dicts into dotted column names, e.g. the output of
+    ensure_gdpr_compliance becomes 'legal_basis', 'profile_data.name', ...
+    """
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_record(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def _flat_rows(records: Iterable[Dict], columns: Optional[List[str]],
+               default_columns: Optional[List[str]] = None) -> Tuple[List[str], Iterator[Dict]]:
+    """
+    Flatten records lazily. Without explicit columns, the export has
+    default_columns plus every other column found in the first
+    SCHEMA_SAMPLE_ROWS records, in first-seen order. Columns that only appear
+    after the sample can't be added to a header already sent; they are
+    counted and logged.
+    """
+    rows = (flatten_record(record) for record in records)
+    if columns:
+        return columns, rows
+    sample = []
+    for row in rows:
+        sample.append(row)
+        if len(sample) >= SCHEMA_SAMPLE_ROWS:
+            break
+    found = dict.fromkeys(default_columns or [])
+    for row in sample:
+        found.update(dict.fromkeys(row))
+    columns = list(found)
+    if not columns:
+        return [], iter(())
+
+    def chained():
+        yield from sample
+        known = set(columns)
+        dropped = 0
+        for row in rows:
+            if not known.issuperset(row):
+                dropped += 1
+            yield row
+        if dropped:
+            logger.warning(f"{dropped} exported records had columns not in the export header")
+    return columns, chained()
+
+
+def iter_csv(records: Iterable[Dict], columns: Optional[List[str]] = None,
+             default_columns: Optional[List[str]] = None) -> Iterator[bytes]:
+    columns, rows = _flat_rows(records, columns, default_columns)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow({column: row.get(column, '') for column in columns})
+        pending += 1
+        if pending >= CSV_CHUNK_ROWS:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def iter_ndjson(records: Iterable[Dict], columns: Optional[List[str]] = None) -> Iterator[bytes]:
+    """NDJSON keeps the nested shape unless columns are selected."""
+    for record in records:
+        if columns:
+            flat = flatten_record(record)
+            record = {column: flat.get(column) for column in columns}
+        yield (json.dumps(record, default=str) + "\n").encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to the generator between batches."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_type(pa, value):
+    if isinstance(value, bool):
+        return pa.bool_()
+    if isinstance(value, int):
+        return pa.int64()
+    if isinstance(value, float):
+        return pa.float64()
+    return pa.string()
+
+
+def _coerce(pa, arrow_type, value):
+    if value is None:
+        return None
+    if arrow_type == pa.string():
+        return value if isinstance(value, str) else json.dumps(value, default=str)
+    if arrow_type == pa.bool_():
+        return value if isinstance(value, bool) else None
+    if arrow_type == pa.int64():
+        return value if isinstance(value, int) and not isinstance(value, bool) else None
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _iter_columnar(records: Iterable[Dict], columns: Optional[List[str]], fmt: str,
+                   default_columns: Optional[List[str]] = None) -> Iterator[bytes]:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportFormatUnavailable(f"The {fmt} format needs pyarrow, which is not installed")
+
+    columns, rows = _flat_rows(records, columns, default_columns)
+    sink = _ChunkSink()
+    schema = None
+    writer = None
+    batch = []
+
+    def write_batch():
+        nonlocal schema, writer
+        if schema is None:
+            # Column types come from the first batch; later values that don't fit become null
+            types = []
+            for column in columns:
+                sample = next((row.get(column) for row in batch if row.get(column) is not None), None)
+                types.append(pa.field(column, _arrow_type(pa, sample)))
+            schema = pa.schema(types)
+            if fmt == 'parquet':
+                writer = pq.ParquetWriter(sink, schema)
+            else:
+                writer = pa.ipc.new_stream(sink, schema)
+        arrays = [pa.array([_coerce(pa, field.type, row.get(field.name)) for row in batch], type=field.type)
+                  for field in schema]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= COLUMNAR_BATCH_ROWS:
+            write_batch()
+            batch = []
+            yield sink.drain()
+    if batch or writer is None:
+        write_batch()
+    writer.close()
+    yield sink.drain()
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(records: Iterable[Dict], fmt: str = 'csv', columns: Optional[List[str]] = None,
+                  compress: bool = False, default_columns: Optional[List[str]] = None
+                  ) -> Tuple[Iterator[bytes], str, str]:
+    """
+    Serialize records lazily into the given format.
+    default_columns lead the columns of a CSV or columnar export that names none.
+    Returns (byte chunks, mimetype, file extension).
+    """
+    if fmt not in FORMATS:
+        raise ExportFormatUnavailable(f"Unknown export format '{fmt}'; use one of {', '.join(FORMATS)}")
+    if fmt in ('parquet', 'arrow'):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ExportFormatUnavailable(f"The {fmt} format needs pyarrow, which is not installed")
+
+    records = (serialize_record(record) for record in records)
+    if fmt == 'csv':
+        chunks = iter_csv(records, columns, default_columns)
+    elif fmt == 'ndjson':
+        chunks = iter_ndjson(records, columns)
+    else:
+        chunks = _iter_columnar(records, columns, fmt, default_columns)
+
+    mimetype, extension = FORMATS[fmt]
+    if compress:
+        return gzip_chunks(chunks), 'application/gzip', f"{extension}.gz"
+    return chunks, mimetype, extension
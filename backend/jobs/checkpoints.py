@@ -0,0 +1,233 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+import contextvars
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS progress (
+    job_id TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    url TEXT,
+    position INTEGER NOT NULL,
+    state TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job_id, scope)
+);
+CREATE TABLE IF NOT EXISTS records (
+    job_id TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    record_key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (job_id, scope, record_key)
+);
+"""
+
+_current = contextvars.ContextVar('job_checkpoints', default=None)
+
+
+class CheckpointStore:
+    """
+    Durable job state in a local SQLite file: the request of every unfinished
+    job, and per scrape (a search or a post, the "scope") the URL and position
+    reached plus the records collected so far, keyed by their dedup identity.
+    Records are only ever inserted, so a checkpoint after each page or batch
+    of comments writes just the new ones. The file holds job payloads,
+    including their li_at cookies, and is created readable by its owner only.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._owner_lock = None
+        self._ready = False
+
+    @contextmanager
+    def _connect(self):
+        with self._lock:
+            if not self._ready:
+                # Created on first use, so importing the job manager touches no files
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                if not os.path.exists(self.path):
+                    os.close(os.open(self.path, os.O_CREAT | os.O_WRONLY, 0o600))
+            conn = sqlite3.connect(self.path, timeout=30)
+            try:
+                if not self._ready:
+                    conn.executescript(SCHEMA)
+                    self._ready = True
+                with conn:
+                    yield conn
+            finally:
+                conn.close()
+
+    def save_job(self, job_id: str, kind: str, data: Dict, status: str) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, kind, data, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(job_id) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at",
+                (job_id, kind, json.dumps(data), status, now, now)
+            )
+
+    def mark_attempt(self, job_id: str, status: str) -> int:
+        """Record that a run of the job started; returns the attempt number."""
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE job_id = ?",
+                         (status, time.time(), job_id))
+            row = conn.execute("SELECT attempts FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return row[0] if row else 0
+
+    def mark_failed(self, job_id: str) -> None:
+        """Keep a failed job's checkpoints for inspection, but never resume it."""
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = 'failed', updated_at = ? WHERE job_id = ?", (time.time(), job_id))
+
+    def unfinished_jobs(self) -> List[Tuple[str, str, Dict, int]]:
+        """(job_id, kind, data, attempts) of every job that has neither finished nor failed, oldest first."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT job_id, kind, data, attempts FROM jobs WHERE status != 'failed' "
+                                "ORDER BY created_at").fetchall()
+        return [(job_id, kind, json.loads(data), attempts) for job_id, kind, data, attempts in rows]
+
+    def delete_failed(self, older_than: float) -> int:
+        """Forget failed jobs last touched before the given time; returns how many."""
+        with self._connect() as conn:
+            job_ids = [job_id for job_id, in conn.execute(
+                "SELECT job_id FROM jobs WHERE status = 'failed' AND updated_at < ?", (older_than,))]
+        for job_id in job_ids:
+            self.delete_job(job_id)
+        return len(job_ids)
+
+    def claim(self) -> bool:
+        """
+        Take an exclusive lock on the store for the life of this process.
+        Only the process holding it may resume jobs, so server workers and
+        reloader processes sharing the file don't run the same job twice.
+        """
+        if self._owner_lock is not None:
+            return True
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        handle = open(self.path + '.lock', 'a+')
+        try:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            handle.close()
+            return False
+        self._owner_lock = handle
+        return True
+
+    def delete_job(self, job_id: str) -> None:
+        """Forget a finished job and all of its checkpoints."""
+        with self._connect() as conn:
+            for table in ('records', 'progress', 'jobs'):
+                conn.execute(f"DELETE FROM {table} WHERE job_id = ?", (job_id,))
+
+    def load(self, job_id: str, scope: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT url, position, state FROM progress WHERE job_id = ? AND scope = ?",
+                               (job_id, scope)).fetchone()
+            if row is None:
+                return None
+            records = conn.execute("SELECT record_key, data FROM records WHERE job_id = ? AND scope = ? ORDER BY seq",
+                                   (job_id, scope)).fetchall()
+        url, position, state = row
+        return {
+            'url': url,
+            'position': position,
+            'state': json.loads(state) if state else {},
+            'seen': [key for key, _ in records],
+            'records': [json.loads(data) for _, data in records]
+        }
+
+    def save(self, job_id: str, scope: str, url: str, position: int,
+             new_records: Iterable[Tuple[str, Dict]] = (), state: Optional[Dict] = None) -> None:
+        """Advance a scope's checkpoint and add the records collected since the last one, atomically."""
+        with self._connect() as conn:
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM records WHERE job_id = ? AND scope = ?",
+                               (job_id, scope)).fetchone()[0]
+            conn.executemany(
+                "INSERT OR IGNORE INTO records (job_id, scope, record_key, seq, data) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, scope, key, seq + i, json.dumps(record)) for i, (key, record) in enumerate(new_records, 1)]
+            )
+            conn.execute(
+                "INSERT INTO progress (job_id, scope, url, position, state, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(job_id, scope) DO UPDATE SET url = excluded.url, position = excluded.position, "
+                "state = excluded.state, updated_at = excluded.updated_at",
+                (job_id, scope, url, position, json.dumps(state) if state else None, time.time())
+            )
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (time.time(), job_id))
+
+    def stats(self) -> Dict:
+        with self._connect() as conn:
+            jobs, = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()
+            scopes, = conn.execute("SELECT COUNT(*) FROM progress").fetchone()
+            records, = conn.execute("SELECT COUNT(*) FROM records").fetchone()
+        return {'jobs': jobs, 'scopes': scopes, 'records': records}
+
+
+class Checkpoint:
+    """One scope's checkpoint within the running job."""
+
+    def __init__(self, store: CheckpointStore, job_id: str, scope: str, final_attempt: bool = False):
+        self.store = store
+        self.job_id = job_id
+        self.scope = scope
+        # On the job's last attempt a scrape should end with what it has rather than raise
+        self.final_attempt = final_attempt
+
+    def load(self) -> Optional[Dict]:
+        """The last saved url, position, state, seen keys and records, or None."""
+        return self.store.load(self.job_id, self.scope)
+
+    def save(self, url: str, position: int, new_records: Iterable[Tuple[str, Dict]] = (),
+             state: Optional[Dict] = None) -> None:
+        try:
+            self.store.save(self.job_id, self.scope, url, position, new_records, state)
+        except sqlite3.Error as e:
+            # Losing a checkpoint only costs work on a resume; never fail the scrape for it
+            logger.warning(f"Could not save checkpoint {self.scope} of job {self.job_id}: {str(e)}")
+
+
+@contextmanager
+def checkpoint_context(store: CheckpointStore, job_id: str, final_attempt: bool = False):
+    """Make scrapes running inside the block checkpoint into the job's state."""
+    token = _current.set((store, job_id, final_attempt))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def checkpoint_for(scope: str) -> Optional[Checkpoint]:
+    """The running job's checkpoint for a scope; None outside a checkpointed job."""
+    current = _current.get()
+    if current is None:
+        return None
+    store, job_id, final_attempt = current
+    return Checkpoint(store, job_id, scope, final_attempt)
@@ -0,0 +1,48 @@
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """Raised by Deadline.check once the budget is spent."""
+
+
+class Deadline:
+    """
+    Time budget for one request or job, handed down to every stage. Stages
+    check it between units of work (pages, scroll rounds, model calls) and cap
+    their own waits with it, so a slow stage ends the run with what has been
+    collected instead of the whole request being retried. A deadline without
+    seconds never expires.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, never negative; None when there is no limit."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def cap(self, timeout: float) -> float:
+        """timeout, shortened to the remaining budget."""
+        remaining = self.remaining()
+        return timeout if remaining is None else min(timeout, remaining)
+
+    def event(self, stage: str) -> dict:
+        """The event a scraper yields when it stops early because of this deadline."""
+        return {'type': 'deadline', 'stage': stage, 'budget_seconds': self.seconds}
+
+    def check(self, stage: str = '') -> None:
+        if self.expired:
+            raise DeadlineExceeded(f"Deadline of {self.seconds}s exceeded{' during ' + stage if stage else ''}")
+
+
+def as_deadline(deadline: Optional[Deadline]) -> Deadline:
+    """The given deadline, or one that never expires."""
+    return deadline if deadline is not None else Deadline()
@@ -0,0 +1,272 @@
+import os
+import uuid
+import time
+import threading
+import logging
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from observability.request_context import request_id_context
+from .checkpoints import CheckpointStore, checkpoint_context
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised from a progress callback when the job has been cancelled."""
+
+
+class Job:
+    """
+    A single scrape request running on the job executor.
+    """
+
+    def __init__(self, kind: str, params: Optional[Dict] = None, job_id: Optional[str] = None):
+        self.id = job_id or uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.status = QUEUED
+        self.attempts = 0
+        self.progress: Dict = {}
+        self.result = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.future = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def report_progress(self, update: Dict) -> None:
+        """
+        Progress callback handed to the scrapers. Merges the update into the job
+        progress and raises JobCancelled if the job was cancelled meanwhile.
+        """
+        with self._lock:
+            self.progress.update(update)
+        if self._cancel_event.is_set():
+            raise JobCancelled(f"Job {self.id} was cancelled")
+
+    def to_dict(self, include_result: bool = True) -> Dict:
+        with self._lock:
+            data = {
+                'job_id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'attempts': self.attempts,
+                'progress': dict(self.progress),
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+            }
+        if self.error:
+            data['error'] = self.error
+        if include_result and self.status in FINISHED_STATES and self.result is not None:
+            data['result'] = self.result
+        return data
+
+
+class JobManager:
+    """
+    Runs scrape jobs on a bounded thread pool and keeps their state in memory
+    so clients can poll for status and results.
+    With a checkpoint store, every job's arguments are persisted until it
+    finishes and the scrapes it runs checkpoint their progress into the store.
+    A failed run is retried up to max_attempts times, resuming from the last
+    checkpoint, and resume() picks up the jobs a previous process left unfinished.
+    """
+
+    def __init__(self, max_workers: int = 2, retention_seconds: int = 3600,
+                 store: Optional[CheckpointStore] = None, max_attempts: int = 1, retry_delay: float = 2.0):
+        self.max_workers = max_workers
+        self.retention_seconds = retention_seconds
+        self.store = store
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scrape-job')
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable, *args, params: Optional[Dict] = None) -> Job:
+        """
+        Queue fn(*args, progress_callback=...) as a new job and return it immediately.
+        args must be JSON-serializable for the job to be resumed after a restart.
+        """
+        self._prune()
+        job = Job(kind, params)
+        if self.store is not None:
+            try:
+                self.store.save_job(job.id, kind, list(args), QUEUED)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Job {job.id} will not survive a restart: {str(e)}")
+        return self._enqueue(job, fn, args)
+
+    def resume(self, handlers: Dict[str, Callable]) -> List[Job]:
+        """
+        Queue again every job the store holds as unfinished, under its own id,
+        with handlers mapping a job kind to its function. Their scrapes
+        continue from their last checkpoints. Only the process holding the
+        store's lock resumes anything. A job that already used up its attempts,
+        e.g. because it kept taking the process down, is marked failed instead.
+        """
+        if self.store is None:
+            return []
+        if not self.store.claim():
+            logger.info("Another process owns the checkpoint store; not resuming jobs")
+            return []
+        self.store.delete_failed(time.time() - self.retention_seconds)
+        jobs = []
+        for job_id, kind, args, attempts in self.store.unfinished_jobs():
+            fn = handlers.get(kind)
+            if fn is None:
+                logger.warning(f"Dropping unfinished job {job_id} of unknown kind {kind}")
+                self.store.delete_job(job_id)
+                continue
+            params = {k: v for k, v in args[0].items() if k != 'cookies'} if args and isinstance(args[0], dict) else {}
+            job = Job(kind, params, job_id=job_id)
+            job.attempts = attempts
+            if attempts >= self.max_attempts:
+                logger.error(f"Not resuming {kind} job {job_id}: it was started {attempts} times already")
+                job.status = FAILED
+                job.error = f'Gave up after {attempts} attempts'
+                job.finished_at = time.time()
+                self.store.mark_failed(job_id)
+                with self._lock:
+                    self._jobs[job.id] = job
+                jobs.append(job)
+                continue
+            jobs.append(self._enqueue(job, fn, tuple(args)))
+            logger.info(f"Resuming {kind} job {job_id} after {attempts} attempts")
+        return jobs
+
+    def _enqueue(self, job: Job, fn: Callable, args) -> Job:
+        with self._lock:
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job, fn, args)
+        logger.info(f"Queued {job.kind} job {job.id}")
+        return job
+
+    def add_completed(self, kind: str, result, params: Optional[Dict] = None) -> Job:
+        """
+        Register the result of work that already ran outside the executor, e.g.
+        a synchronous search, so it can be fetched or exported like a job result.
+        """
+        self._prune()
+        job = Job(kind, params)
+        job.status = SUCCEEDED
+        job.result = result
+        job.started_at = job.finished_at = time.time()
+        with self._lock:
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a queued or running job. Finished jobs are removed from the registry.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return None
+
+        if job.status in FINISHED_STATES:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            if job.status == FAILED and self.store is not None:
+                self.store.delete_job(job.id)
+            return job
+
+        job._cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            # Never started, so nothing else will update the state
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            if self.store is not None:
+                self.store.delete_job(job.id)
+        logger.info(f"Cancellation requested for job {job_id}")
+        return job
+
+    def stats(self) -> Dict:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {state: 0 for state in (QUEUED, RUNNING) + FINISHED_STATES}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {'max_workers': self.max_workers, 'jobs': counts}
+
+    def _run(self, job: Job, fn: Callable, args) -> None:
+        if job.cancel_requested:
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            if self.store is not None:
+                self.store.delete_job(job.id)
+            return
+
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            while True:
+                job.attempts = self.store.mark_attempt(job.id, RUNNING) if self.store else job.attempts + 1
+                final_attempt = job.attempts >= self.max_attempts
+                try:
+                    # Log lines of the job carry its id, like request log lines carry the request id
+                    with request_id_context(job.id), \
+                            (checkpoint_context(self.store, job.id, final_attempt) if self.store else nullcontext()):
+                        result = fn(*args, progress_callback=job.report_progress)
+                    job.result = result
+                    job.status = CANCELLED if job.cancel_requested else SUCCEEDED
+                except JobCancelled:
+                    job.status = CANCELLED
+                except Exception as e:
+                    if not final_attempt and not job.cancel_requested:
+                        logger.warning(f"Job {job.id} attempt {job.attempts} failed, retrying: {str(e)}")
+                        time.sleep(self.retry_delay * job.attempts)
+                        continue
+                    logger.error(f"Job {job.id} failed: {str(e)}")
+                    job.error = str(e)
+                    job.status = FAILED
+                break
+        finally:
+            job.finished_at = time.time()
+            if self.store is not None:
+                # A failed job's checkpoints stay until it is discarded or pruned, but it is never resumed
+                if job.status == FAILED:
+                    self.store.mark_failed(job.id)
+                else:
+                    self.store.delete_job(job.id)
+            logger.info(f"Job {job.id} finished with status {job.status}")
+
+    def _prune(self) -> None:
+        """Forget finished jobs older than the retention period."""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.status in FINISHED_STATES and (job.finished_at or 0) < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if self.store is not None:
+            self.store.delete_failed(cutoff)
+
+
+job_manager = JobManager(
+    max_workers=int(os.getenv('MAX_SCRAPE_WORKERS', '2')),
+    retention_seconds=int(os.getenv('JOB_RETENTION_SECONDS', '3600')),
+    store=CheckpointStore(os.getenv('CHECKPOINT_DB', os.path.join('scrape_state', 'checkpoints.sqlite3'))),
+    max_attempts=int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+)
@@ -0,0 +1,70 @@
+import re
+import uuid
+import logging
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+# Id of the request or job the current thread is working for, '-' outside of one
+_request_id = contextvars.ContextVar('request_id', default='-')
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+
+# Ids taken from clients end up in logs, response headers and file names
+_VALID_REQUEST_ID = re.compile(r'[A-Za-z0-9._-]{1,64}')
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def get_request_id() -> str:
+    return _request_id.get()
+
+
+def set_request_id(request_id: Optional[str]) -> contextvars.Token:
+    """Use request_id if it is a safe id (letters, digits, '.', '_', '-'; up to 64), else a new one."""
+    if not request_id or not _VALID_REQUEST_ID.fullmatch(request_id) or request_id.strip('.') == '':
+        request_id = new_request_id()
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token: contextvars.Token) -> None:
+    _request_id.reset(token)
+
+
+@contextmanager
+def request_id_context(request_id: Optional[str]):
+    """Tag log lines emitted inside the block with request_id."""
+    token = set_request_id(request_id)
+    try:
+        yield
+    finally:
+        reset_request_id(token)
+
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """
+    Log in LOG_FORMAT from every module. Called by the server entry points,
+    not on import, so importing the app leaves the host's logging alone.
+    """
+    install_log_context()
+    logging.basicConfig(level=level, format=LOG_FORMAT, force=True)
+
+
+def install_log_context() -> None:
+    """
+    Give every log record a request_id attribute so formatters can use
+    %(request_id)s, whichever module or thread emits it.
+    """
+    factory = logging.getLogRecordFactory()
+    if getattr(factory, 'adds_request_id', False):
+        return
+
+    def record_factory(*args, **kwargs):
+        record = factory(*args, **kwargs)
+        record.request_id = _request_id.get()
+        return record
+
+    record_factory.adds_request_id = True
+    logging.setLogRecordFactory(record_factory)
@@ -0,0 +1,88 @@
+import os
+import logging
+from typing import Dict, List, Optional
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# URL patterns (Network.setBlockedURLs wildcard syntax) for resources the
+# scrapers never read: images, media and fonts, plus analytics/ad hosts.
+HEAVY_RESOURCE_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.mp4', '*.webm', '*.m3u8', '*.ts', '*.mp3',
+    '*.woff', '*.woff2', '*.ttf', '*.otf',
+    # LinkedIn serves photos and video without file extensions
+    '*media.licdn.com/dms/image*', '*dms.licdn.com/playlist*',
+]
+
+THIRD_PARTY_PATTERNS = [
+    '*doubleclick.net*', '*google-analytics.com*', '*googletagmanager.com*',
+    '*googlesyndication.com*', '*px.ads.linkedin.com*', '*snap.licdn.com*',
+    '*facebook.net*', '*bat.bing.com*', '*ads-twitter.com*', '*adservice.google.com*',
+]
+
+# Browser profiles the driver pool can launch. "full" is the original
+# headed, maximized Chrome; "lean" trades fidelity for CPU, memory and bandwidth.
+BROWSER_PROFILES: Dict[str, Dict] = {
+    'full': {
+        'headless': False,
+        'window_size': None,
+        'arguments': ['--start-maximized'],
+        'blocked_urls': [],
+        'block_images': False,
+    },
+    'lean': {
+        'headless': True,
+        'window_size': (1280, 800),
+        'arguments': ['--disable-gpu', '--disable-extensions', '--mute-audio',
+                      '--disable-dev-shm-usage', '--blink-settings=imagesEnabled=false'],
+        'blocked_urls': HEAVY_RESOURCE_PATTERNS + THIRD_PARTY_PATTERNS,
+        'block_images': True,
+    },
+}
+
+DEFAULT_BROWSER_PROFILE = os.getenv('BROWSER_PROFILE', 'full')
+
+
+class UnknownBrowserProfile(ValueError):
+    """Raised for a browser profile name that is not in BROWSER_PROFILES."""
+
+
+def resolve_profile(name: Optional[str] = None) -> str:
+    """The profile name to use: name, or the configured default."""
+    name = name or DEFAULT_BROWSER_PROFILE
+    if name not in BROWSER_PROFILES:
+        raise UnknownBrowserProfile(f"Unknown browser profile '{name}'; use one of {', '.join(BROWSER_PROFILES)}")
+    return name
+
+
+def chrome_arguments(name: str) -> List[str]:
+    profile = BROWSER_PROFILES[name]
+    arguments = list(profile['arguments'])
+    if profile['headless']:
+        arguments.append('--headless=new')
+    if profile['window_size']:
+        arguments.append('--window-size={},{}'.format(*profile['window_size']))
+    return arguments
+
+
+def chrome_prefs(name: str) -> Dict:
+    if BROWSER_PROFILES[name]['block_images']:
+        return {'profile.managed_default_content_settings.images': 2}
+    return {}
+
+
+def apply_request_blocking(driver, name: str) -> None:
+    """
+    Block the profile's URL patterns through the DevTools protocol. Best
+    effort: a driver without CDP support keeps loading everything.
+    """
+    patterns = BROWSER_PROFILES[name]['blocked_urls']
+    if not patterns:
+        return
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+    except Exception as e:
+        logger.warning(f"Could not enable request blocking for browser profile '{name}': {str(e)}")
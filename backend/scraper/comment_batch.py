@@ -0,0 +1,146 @@
+import queue
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+from .driver_pool import driver_pool, DriverLoginError, DriverPoolTimeout, _is_driver_failure
+from .dedup import DedupIndex, comment_key
+from .linkedin_comment_scraper import iter_comments_with_driver
+from .rate_scheduler import rate_scheduler, Pacer
+from .utils import progress_fields
+from jobs.deadline import Deadline, as_deadline
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def canonical_post_url(url: str) -> str:
+    """A post URL without tracking parameters, fragment or trailing slash, for deduplication."""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), '', ''))
+
+
+def dedupe_post_urls(urls: List[str]) -> List[str]:
+    """Distinct post URLs in first-seen order."""
+    seen = {}
+    for url in urls:
+        seen.setdefault(canonical_post_url(url), None)
+    return list(seen)
+
+
+def scrape_comment_batch(post_urls: List[str], cookie: str,
+                         sessions: int = 2,
+                         max_posts_per_session: int = 25,
+                         progress_callback: Optional[Callable[[Dict], None]] = None,
+                         deadline: Optional[Deadline] = None,
+                         browser_profile: Optional[str] = None,
+                         priority: Optional[str] = None) -> List[Dict]:
+    """
+    Scrape the comments of many posts over a fixed number of browser sessions.
+    URLs are deduplicated, then each session checks out one logged-in browser
+    and works through the shared queue of posts on it, so a batch costs at
+    most `sessions` logins instead of one per post. After max_posts_per_session
+    posts a session hands its browser back to the pool (which applies its
+    recycling rules) and checks one out again.
+    Returns one result per distinct URL, in request order, with its status
+    ('success', 'warning', 'error' or 'skipped' once the deadline has run out),
+    comment count and comments. A post that fails doesn't stop the batch;
+    a broken browser is discarded and the session continues on a new one.
+    progress_callback runs after every post on the calling thread; an
+    exception raised by it stops the batch once the posts in flight finish.
+    Every post load draws on the session's rate budget at the given priority.
+    """
+    urls = dedupe_post_urls(post_urls)
+    deadline = as_deadline(deadline)
+    pending = queue.Queue()
+    for url in urls:
+        pending.put(url)
+    finished = queue.Queue()
+    stop = threading.Event()
+    pacer = rate_scheduler.pacer(cookie, priority)
+
+    def run_session(session: int) -> None:
+        while not stop.is_set() and not pending.empty():
+            if deadline.expired:
+                return
+            try:
+                with driver_pool.checkout(cookie, timeout=deadline.remaining(), profile=browser_profile) as driver:
+                    for _ in range(max_posts_per_session):
+                        if stop.is_set() or deadline.expired:
+                            return
+                        try:
+                            url = pending.get_nowait()
+                        except queue.Empty:
+                            return
+                        try:
+                            finished.put(_scrape_post(driver, url, deadline, session, pacer))
+                        except Exception as e:
+                            logger.error(f"Error scraping comments for {url}: {str(e)}")
+                            finished.put({'url': url, 'status': 'error', 'comment_count': 0, 'comments': [],
+                                          'session': session, 'error': str(e)})
+                            if _is_driver_failure(e):
+                                raise
+            except (DriverLoginError, DriverPoolTimeout) as e:
+                logger.error(f"Session {session} could not get a browser: {str(e)}")
+                return
+            except Exception as e:
+                # The pool has discarded the broken browser; carry on with a new one
+                logger.warning(f"Session {session} lost its browser: {str(e)}")
+
+    results = {}
+    sessions = max(1, min(sessions, len(urls) or 1))
+    with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix='comment-batch') as executor:
+        futures = [executor.submit(contextvars.copy_context().run, run_session, session)
+                   for session in range(sessions)]
+        try:
+            while len(results) < len(urls):
+                try:
+                    result = finished.get(timeout=0.1)
+                except queue.Empty:
+                    if all(future.done() for future in futures) and finished.empty():
+                        break
+                    continue
+                results[result['url']] = result
+                if progress_callback:
+                    progress_callback({
+                        'posts_done': len(results),
+                        'posts_total': len(urls),
+                        'comments_found': sum(r['comment_count'] for r in results.values())
+                    })
+        finally:
+            stop.set()
+
+    for url in urls:
+        if url not in results:
+            results[url] = {'url': url, 'status': 'skipped', 'comment_count': 0, 'comments': [],
+                            'message': 'Deadline reached before this post was scraped' if deadline.expired
+                            else 'No browser session was available for this post'}
+    return [results[url] for url in urls]
+
+
+def _scrape_post(driver, url: str, deadline: Deadline, session: int, pacer: Optional[Pacer] = None) -> Dict:
+    """
+    Scrape one post on a checked-out driver into its batch result.
+    """
+    comments = DedupIndex(comment_key)
+    scrape_stats = None
+    partial = False
+    for event in iter_comments_with_driver(driver, url, comments, deadline=deadline, pacer=pacer):
+        if event['type'] == 'deadline':
+            partial = True
+        elif event['type'] == 'stats':
+            scrape_stats = progress_fields(event)
+
+    records = comments.records()
+    return {
+        'url': url,
+        'status': 'success' if records else 'warning',
+        'comment_count': len(records),
+        'comments': records,
+        'scrape_stats': scrape_stats,
+        'partial': partial,
+        'session': session
+    }
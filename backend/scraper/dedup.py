@@ -0,0 +1,207 @@
+import os
+import re
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEDUP_STATE_DIR = os.getenv('DEDUP_STATE_DIR', 'scrape_state')
+# Identities not seen again for this long are forgotten, so the state stays bounded
+DEDUP_RETENTION_DAYS = float(os.getenv('DEDUP_RETENTION_DAYS', '365'))
+
+
+def normalize_profile_url(url: str) -> str:
+    """
+    Canonical form of a profile URL: lowercase host and path, no query string,
+    fragment or trailing slash, so tracking parameters don't create new identities.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.endswith('linkedin.com'):
+        host = 'www.linkedin.com'
+    path = re.sub(r'/+', '/', parts.path).rstrip('/').lower()
+    return f"https://{host}{path}"
+
+
+def _normalize_text(text: Optional[str]) -> str:
+    return ' '.join((text or '').split()).lower()
+
+
+def profile_key(profile: Dict) -> str:
+    """Identity of a profile: its normalized URL, or name/title/location without one."""
+    url = profile.get('profile_url')
+    if url:
+        return 'profile:' + normalize_profile_url(url)
+    fallback = '|'.join(_normalize_text(profile.get(k)) for k in ('name', 'title', 'location'))
+    return 'profile-nourl:' + fallback
+
+
+def comment_key(comment: Dict) -> str:
+    """Identity of a comment: author, a hash of its text and its timestamp."""
+    content_hash = hashlib.sha1(_normalize_text(comment.get('comment')).encode()).hexdigest()
+    return f"comment:{_normalize_text(comment.get('name'))}:{content_hash}:{_normalize_text(comment.get('timestamp'))}"
+
+
+def comment_content_key(comment: Dict) -> str:
+    """
+    Identity of a comment without its timestamp. LinkedIn shows relative times
+    ('2h', '3d') that change between visits, so this is the key to compare
+    comments across scrapes of the same post.
+    """
+    content_hash = hashlib.sha1(_normalize_text(comment.get('comment')).encode()).hexdigest()
+    return f"comment:{_normalize_text(comment.get('name'))}:{content_hash}"
+
+
+def _merge(existing: Dict, incoming: Dict) -> None:
+    """Fill fields missing from the existing record; keep the larger of two counts."""
+    for field, value in incoming.items():
+        current = existing.get(field)
+        if current in (None, ''):
+            existing[field] = value
+        elif isinstance(current, int) and isinstance(value, int) and value > current:
+            existing[field] = value
+
+
+class SeenKeyStore:
+    """
+    SQLite set of identities seen in earlier runs, with when each was last
+    seen. Lookups go by primary key, so no run reads the whole set, and saves
+    only insert the keys of one run. Identities older than
+    DEDUP_RETENTION_DAYS are pruned on save.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY, seen_at REAL NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        with self._lock:
+            conn = sqlite3.connect(self.path, timeout=30)
+            try:
+                with conn:
+                    yield conn
+            finally:
+                conn.close()
+
+    def contains(self, key: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM seen WHERE key = ?", (key,)).fetchone() is not None
+
+    def add(self, keys: Iterable[str]) -> int:
+        """Record keys as seen now and prune expired ones; returns how many keys were written."""
+        now = time.time()
+        rows = [(key, now) for key in keys]
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO seen (key, seen_at) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET seen_at = excluded.seen_at",
+                rows
+            )
+            conn.execute("DELETE FROM seen WHERE seen_at < ?", (now - DEDUP_RETENTION_DAYS * 86400,))
+        return len(rows)
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            count, = conn.execute("SELECT COUNT(*) FROM seen").fetchone()
+        return count
+
+
+_seen_stores: Dict[str, SeenKeyStore] = {}
+_seen_stores_lock = threading.Lock()
+
+
+def seen_key_store(path: str) -> SeenKeyStore:
+    """The process-wide store for a path, so concurrent requests share one lock."""
+    path = os.path.abspath(path)
+    with _seen_stores_lock:
+        if path not in _seen_stores:
+            _seen_stores[path] = SeenKeyStore(path)
+        return _seen_stores[path]
+
+
+class DedupIndex:
+    """
+    Hash index of scraped records keyed by a stable identity. Adding a record is
+    O(1); a record whose identity is already held is merged into the existing one.
+    With a path the identities seen are persisted between runs in a
+    SeenKeyStore, and with skip_known records seen in an earlier run are
+    dropped.
+    """
+
+    def __init__(self, key_fn: Callable[[Dict], str], path: Optional[str] = None, skip_known: bool = False,
+                 known: Optional[Iterable[str]] = None):
+        self.key_fn = key_fn
+        self.path = path
+        self.skip_known = skip_known
+        self._records: Dict[str, Dict] = {}
+        self._known = set(known or ())
+        # Distinct known identities dropped by skip_known in this run
+        self.skipped = 0
+        self._skipped_keys = set()
+        self._lock = threading.Lock()
+
+    def add(self, record: Dict) -> bool:
+        """Add a record. Returns True if it is new in this index."""
+        return self._add(record) is not None
+
+    def add_all(self, records: Iterable[Dict]) -> List[Dict]:
+        """
+        Add several records and return the ones that were new. The returned
+        records are the index's own copies, so later merges show up in them.
+        """
+        added = (self._add(record) for record in records)
+        return [record for record in added if record is not None]
+
+    def _add(self, record: Dict) -> Optional[Dict]:
+        key = self.key_fn(record)
+        with self._lock:
+            existing = self._records.get(key)
+            if existing is not None:
+                _merge(existing, record)
+                return None
+            if self.skip_known and (key in self._known or (self.path and seen_key_store(self.path).contains(key))):
+                if key not in self._skipped_keys:
+                    self._skipped_keys.add(key)
+                    self.skipped += 1
+                return None
+            stored = record.copy()
+            self._records[key] = stored
+            return stored
+
+    @property
+    def seen_count(self) -> int:
+        """Distinct identities met in this run, whether kept or skipped as known."""
+        return len(self._records) + self.skipped
+
+    def records(self) -> List[Dict]:
+        return list(self._records.values())
+
+    def keys(self) -> List[str]:
+        return list(self._records)
+
+    def __contains__(self, record: Dict) -> bool:
+        return self.key_fn(record) in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def save(self) -> None:
+        """Persist the identities seen in this run."""
+        if not self.path:
+            return
+        with self._lock:
+            keys = self._known | set(self._records)
+        seen_key_store(self.path).add(keys)
+        logger.info(f"Saved {len(keys)} seen identities to {self.path}")
@@ -0,0 +1,226 @@
+import os
+import time
+import atexit
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+from selenium.common.exceptions import InvalidSessionIdException, WebDriverException
+from observability.metrics import stage_timer
+from .utils import init_selenium_driver, login_with_cookie
+from .browser_profiles import resolve_profile
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class DriverLoginError(Exception):
+    """Raised when a fresh driver could not be logged in with the given cookie."""
+
+
+class DriverPoolTimeout(Exception):
+    """Raised when no driver became available within the checkout timeout."""
+
+
+class _PooledDriver:
+    def __init__(self, driver, key: str):
+        self.driver = driver
+        self.key = key
+        self.uses = 0
+        self.created_at = time.time()
+        self.last_used = self.created_at
+
+
+def session_key(cookie: str) -> str:
+    """Stable key for a li_at session that does not keep the raw cookie around."""
+    return hashlib.sha256(cookie.encode()).hexdigest()
+
+
+class DriverPool:
+    """
+    Keeps logged-in Chrome instances warm between requests, keyed by li_at
+    session and browser profile (a lean headless driver never serves a
+    request for the full profile, or the other way round).
+    Drivers are handed out through checkout() and recycled after max_uses
+    checkouts, after max_idle_seconds without use, or when they stop responding.
+    """
+
+    def __init__(self, max_size: int = 2, max_uses: int = 20, max_idle_seconds: int = 600,
+                 driver_factory: Callable = init_selenium_driver,
+                 login: Callable = login_with_cookie):
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.max_idle_seconds = max_idle_seconds
+        self._driver_factory = driver_factory
+        self._login = login
+        self._idle: Dict[str, List[_PooledDriver]] = {}
+        self._total = 0
+        self._cond = threading.Condition()
+        self.stats = {'created': 0, 'reused': 0, 'recycled': 0, 'unhealthy': 0}
+
+    @contextmanager
+    def checkout(self, cookie: str, timeout: Optional[float] = None, profile: Optional[str] = None):
+        """
+        Check out a logged-in driver for the given cookie and browser profile
+        (default BROWSER_PROFILE). The driver goes back into the pool when the
+        block exits, or is discarded if the block raised a driver error.
+        """
+        entry = self._acquire(cookie, timeout, resolve_profile(profile))
+        healthy = True
+        try:
+            yield entry.driver
+        except Exception as e:
+            healthy = not _is_driver_failure(e)
+            raise
+        finally:
+            self._release(entry, healthy)
+
+    def close_all(self) -> None:
+        """Quit every idle driver. Checked-out drivers are closed on release."""
+        with self._cond:
+            entries = [entry for entries in self._idle.values() for entry in entries]
+            self._idle = {}
+            self._total -= len(entries)
+            self._cond.notify_all()
+        for entry in entries:
+            self._quit(entry)
+
+    def _acquire(self, cookie: str, timeout: Optional[float], profile: str) -> _PooledDriver:
+        key = f"{profile}:{session_key(cookie)}"
+        deadline = time.time() + timeout if timeout is not None else None
+
+        while True:
+            evicted = []
+            entry = None
+            create = False
+            with self._cond:
+                evicted.extend(self._pop_expired())
+                if self._idle.get(key):
+                    entry = self._idle[key].pop()
+                elif self._total < self.max_size:
+                    self._total += 1
+                    create = True
+                else:
+                    other = self._pop_oldest_idle()
+                    if other is not None:
+                        # Hand the slot to this session instead of waiting
+                        evicted.append(other)
+                        create = True
+                    else:
+                        remaining = deadline - time.time() if deadline is not None else None
+                        if remaining is not None and remaining <= 0:
+                            raise DriverPoolTimeout("No WebDriver available in the pool")
+                        self._cond.wait(remaining)
+                        continue
+
+            for old in evicted:
+                self._quit(old)
+
+            if create:
+                return self._create(cookie, key, profile)
+
+            if self._is_healthy(entry.driver):
+                self.stats['reused'] += 1
+                return entry
+
+            logger.warning("Discarding unresponsive pooled WebDriver")
+            self.stats['unhealthy'] += 1
+            self._discard(entry)
+
+    def _create(self, cookie: str, key: str, profile: str) -> _PooledDriver:
+        try:
+            with stage_timer('driver_start'):
+                driver = self._driver_factory(profile)
+        except Exception:
+            self._free_slot()
+            raise
+
+        entry = _PooledDriver(driver, key)
+        with stage_timer('login'):
+            logged_in = self._login(driver, cookie)
+        if not logged_in:
+            self._discard(entry)
+            raise DriverLoginError("Login with the provided li_at cookie failed")
+        self.stats['created'] += 1
+        return entry
+
+    def _release(self, entry: _PooledDriver, healthy: bool) -> None:
+        entry.uses += 1
+        entry.last_used = time.time()
+        if not healthy:
+            self.stats['unhealthy'] += 1
+            self._discard(entry)
+        elif entry.uses >= self.max_uses:
+            self.stats['recycled'] += 1
+            self._discard(entry)
+        else:
+            with self._cond:
+                self._idle.setdefault(entry.key, []).append(entry)
+                self._cond.notify()
+
+    def _discard(self, entry: _PooledDriver) -> None:
+        self._quit(entry)
+        self._free_slot()
+
+    def _free_slot(self) -> None:
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+
+    def _pop_expired(self) -> List[_PooledDriver]:
+        """Remove idle drivers past max_idle_seconds. Caller holds the lock."""
+        cutoff = time.time() - self.max_idle_seconds
+        expired = []
+        for key in list(self._idle):
+            keep = [entry for entry in self._idle[key] if entry.last_used >= cutoff]
+            expired.extend(entry for entry in self._idle[key] if entry.last_used < cutoff)
+            if keep:
+                self._idle[key] = keep
+            else:
+                del self._idle[key]
+        self._total -= len(expired)
+        return expired
+
+    def _pop_oldest_idle(self) -> Optional[_PooledDriver]:
+        """Remove the least recently used idle driver of any session. Caller holds the lock."""
+        candidates = [entry for entries in self._idle.values() for entry in entries]
+        if not candidates:
+            return None
+        oldest = min(candidates, key=lambda entry: entry.last_used)
+        self._idle[oldest.key].remove(oldest)
+        if not self._idle[oldest.key]:
+            del self._idle[oldest.key]
+        # The caller reuses the slot for a new driver, so _total is unchanged
+        return oldest
+
+    @staticmethod
+    def _is_healthy(driver) -> bool:
+        try:
+            driver.execute_script("return document.readyState")
+            return driver.get_cookie("li_at") is not None
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(entry: _PooledDriver) -> None:
+        try:
+            entry.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error while quitting WebDriver: {str(e)}")
+
+
+def _is_driver_failure(error: Exception) -> bool:
+    """Whether an exception means the browser itself is broken."""
+    if isinstance(error, InvalidSessionIdException):
+        return True
+    return isinstance(error, WebDriverException) and 'chrome not reachable' in str(error).lower()
+
+
+driver_pool = DriverPool(
+    max_size=int(os.getenv('DRIVER_POOL_SIZE', os.getenv('MAX_SCRAPE_WORKERS', '2'))),
+    max_uses=int(os.getenv('DRIVER_MAX_USES', '20')),
+    max_idle_seconds=int(os.getenv('DRIVER_MAX_IDLE_SECONDS', '600'))
+)
+atexit.register(driver_pool.close_all)
@@ -0,0 +1,171 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+import dns.exception
+import dns.resolver
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+
+@lru_cache(maxsize=1)
+def get_resolver() -> dns.resolver.Resolver:
+    """
+    Shared resolver with short timeouts. DNS_NAMESERVERS (comma-separated
+    host or host:port) points it at specific servers, e.g. a local stub.
+    """
+    nameservers = os.getenv('DNS_NAMESERVERS')
+    resolver = dns.resolver.Resolver(configure=not nameservers)
+    if nameservers:
+        hosts = []
+        for entry in nameservers.split(','):
+            host, _, port = entry.strip().partition(':')
+            hosts.append(host)
+            if port:
+                resolver.nameserver_ports[host] = int(port)
+        resolver.nameservers = hosts
+    resolver.timeout = 2
+    resolver.lifetime = 2
+    return resolver
+
+
+class MXCache:
+    """
+    Size-bounded LRU of per-domain MX lookup results with separate TTLs for
+    domains that have MX records, domains that definitely don't, and lookups
+    that errored.
+    """
+
+    def __init__(self, positive_ttl: int = 24 * 3600, negative_ttl: int = 3600, error_ttl: int = 60,
+                 max_entries: int = 10000):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.error_ttl = error_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, domain: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(domain)
+            if entry is None or entry[1] < time.time():
+                if entry is not None:
+                    del self._entries[domain]
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(domain)
+            self.stats['hits'] += 1
+            return entry[0]
+
+    def set(self, domain: str, result: Dict) -> None:
+        if result['valid']:
+            ttl = self.positive_ttl
+        elif result['reason'] == 'dns_error':
+            ttl = self.error_ttl
+        else:
+            ttl = self.negative_ttl
+        with self._lock:
+            self._entries[domain] = (result, time.time() + ttl)
+            self._entries.move_to_end(domain)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+mx_cache = MXCache(
+    positive_ttl=int(os.getenv('MX_CACHE_TTL_SECONDS', str(24 * 3600))),
+    negative_ttl=int(os.getenv('MX_CACHE_NEGATIVE_TTL_SECONDS', '3600')),
+    max_entries=int(os.getenv('MX_CACHE_SIZE', '10000'))
+)
+
+
+def lookup_mx(domain: str, resolver=None, cache: Optional[MXCache] = mx_cache) -> Dict:
+    """
+    Check whether a domain accepts mail. Returns {'valid': bool, 'reason': str}
+    where reason is 'mx_found', 'no_mx' or 'dns_error'.
+    """
+    domain = domain.lower().rstrip('.')
+    if cache is not None:
+        cached = cache.get(domain)
+        if cached is not None:
+            return cached
+
+    resolver = resolver or get_resolver()
+    cacheable = True
+    try:
+        resolver.resolve(domain, 'MX')
+        result = {'valid': True, 'reason': 'mx_found'}
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+        result = {'valid': False, 'reason': 'no_mx'}
+    except dns.resolver.NoNameservers as e:
+        # Every nameserver failed (SERVFAIL, refused); that says nothing about the domain
+        logger.info(f"MX lookup for {domain} failed on every nameserver: {str(e)}")
+        result = {'valid': False, 'reason': 'dns_error'}
+        cacheable = False
+    except (dns.exception.DNSException, OSError) as e:
+        logger.info(f"MX lookup for {domain} failed: {str(e)}")
+        result = {'valid': False, 'reason': 'dns_error'}
+
+    if cache is not None and cacheable:
+        cache.set(domain, result)
+    return result
+
+
+def validate_email(email: str, verify_dns: bool = True) -> bool:
+    """
+    Validate email format and optionally verify domain using DNS lookup.
+    """
+    if not EMAIL_REGEX.match(email):
+        logger.info(f"Email {email} failed regex validation")
+        return False
+
+    if verify_dns:
+        result = lookup_mx(email.split('@')[1])
+        if result['valid']:
+            logger.info(f"Email {email} passed validation with DNS verification")
+        else:
+            logger.info(f"Email {email} failed DNS validation: {result['reason']}")
+        return result['valid']
+
+    logger.info(f"Email {email} passed basic validation (DNS verification skipped)")
+    return True
+
+
+def validate_emails_bulk(emails: Iterable[str], verify_dns: bool = True, resolver=None,
+                         cache: Optional[MXCache] = mx_cache, max_workers: int = 20) -> List[Dict]:
+    """
+    Validate many addresses. Each distinct domain is looked up once, cached
+    domains are not looked up at all, and the rest resolve concurrently.
+    Returns one {'email', 'valid', 'reason'} result per input address, in order.
+    """
+    emails = [email.strip() for email in emails]
+    domains = {email.split('@')[1].lower() for email in emails if EMAIL_REGEX.match(email)}
+
+    domain_results = {}
+    if verify_dns and domains:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(domains))) as executor:
+            for domain, result in zip(domains, executor.map(lambda d: lookup_mx(d, resolver, cache), domains)):
+                domain_results[domain] = result
+
+    results = []
+    for email in emails:
+        if not EMAIL_REGEX.match(email):
+            results.append({'email': email, 'valid': False, 'reason': 'invalid_format'})
+        elif not verify_dns:
+            results.append({'email': email, 'valid': True, 'reason': 'format_only'})
+        else:
+            result = domain_results[email.split('@')[1].lower()]
+            results.append({'email': email, 'valid': result['valid'], 'reason': result['reason']})
+    return results
@@ -0,0 +1,164 @@
+import logging
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from observability.metrics import stage_timer, RECORDS_PARSED, PARSE_FAILURES
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def parse_count(text: Optional[str]) -> int:
+    """Turn a counter label such as '1,204 reactions' into an int."""
+    return int(''.join(filter(str.isdigit, text or '')) or '0')
+
+
+# Selector table shared by every extraction path. Each record kind has one
+# container selector (one card per record) and a selector per field, read
+# either as visible text or as an attribute. Records missing a required
+# field are skipped; optional fields fall back to their default.
+SELECTORS = {
+    'profile': {
+        'container': '.reusable-search__result-container',
+        'fields': {
+            'name': {'selector': '.actor-name', 'attribute': 'text'},
+            'title': {'selector': '.subline-level-1', 'attribute': 'text'},
+            'location': {'selector': '.subline-level-2', 'attribute': 'text'},
+            'profile_url': {'selector': '.app-aware-link', 'attribute': 'href'},
+        },
+    },
+    'comment': {
+        'container': '.comments-comment-item',
+        'fields': {
+            'name': {'selector': '.comments-post-meta__name-text', 'attribute': 'text'},
+            'comment': {'selector': '.comments-comment-item__main-content', 'attribute': 'text'},
+            'timestamp': {'selector': '.comments-comment-item__timestamp', 'attribute': 'text'},
+            'likes': {'selector': '.comments-comment-social-bar__social-counts', 'attribute': 'text',
+                      'required': False, 'default': 0, 'parse': parse_count},
+        },
+    },
+}
+
+# Reads every card on the page in one WebDriver round trip. Receives the
+# JSON-safe part of a SELECTORS entry as arguments[0].
+EXTRACTION_SCRIPT = """
+const spec = arguments[0];
+const markSeen = arguments[1];
+let cards = Array.from(document.querySelectorAll(spec.container));
+if (markSeen) {
+    cards = cards.filter(card => !card.hasAttribute('data-scraper-seen'));
+}
+return cards.map(card => {
+    const record = {};
+    let complete = true;
+    for (const [field, conf] of Object.entries(spec.fields)) {
+        const el = card.querySelector(conf.selector);
+        if (!el) {
+            record[field] = null;
+            complete = complete && !conf.required;
+        } else if (conf.attribute === 'text') {
+            record[field] = (el.innerText || el.textContent || '').trim();
+        } else {
+            record[field] = el[conf.attribute] || el.getAttribute(conf.attribute);
+        }
+    }
+    // Incomplete cards may still be rendering, so they are read again next time
+    if (markSeen && complete) {
+        card.setAttribute('data-scraper-seen', '1');
+    }
+    return record;
+});
+"""
+
+
+def _script_spec(kind: str) -> Dict:
+    spec = SELECTORS[kind]
+    return {
+        'container': spec['container'],
+        'fields': {name: {'selector': conf['selector'], 'attribute': conf['attribute'],
+                          'required': conf.get('required', True)}
+                   for name, conf in spec['fields'].items()},
+    }
+
+
+def _finalize(raw_records: List[Dict], kind: str) -> List[Dict]:
+    """
+    Apply required/default/parse rules from the selector table to raw field values.
+    """
+    fields = SELECTORS[kind]['fields']
+    records = []
+    for raw in raw_records:
+        record = {}
+        try:
+            for name, conf in fields.items():
+                value = raw.get(name)
+                if value is None:
+                    if conf.get('required', True):
+                        raise ValueError(f"missing field '{name}'")
+                    record[name] = conf.get('default')
+                    continue
+                parse = conf.get('parse')
+                record[name] = parse(value) if parse else value
+        except Exception as e:
+            logger.warning(f"Error parsing {kind}: {e}")
+            PARSE_FAILURES.inc(kind=kind)
+            continue
+        records.append(record)
+    RECORDS_PARSED.inc(len(records), kind=kind)
+    return records
+
+
+def extract_records_from_driver(driver, kind: str, only_new: bool = False) -> List[Dict]:
+    """
+    Extract all records of the given kind from the driver's current page
+    with a single execute_script call.
+    With only_new, cards returned by an earlier only_new call are skipped, so
+    repeated extraction while a thread is expanding stays cheap.
+    """
+    with stage_timer('extraction'):
+        raw_records = driver.execute_script(EXTRACTION_SCRIPT, _script_spec(kind), only_new) or []
+        return _finalize(raw_records, kind)
+
+
+def extract_records(html: str, kind: str, base_url: Optional[str] = None) -> List[Dict]:
+    """
+    Extract all records of the given kind from a page's HTML with BeautifulSoup.
+    Relative links are resolved against base_url when it is given.
+    """
+    with stage_timer('extraction'):
+        return _finalize(extract_raw_records(html, kind, base_url), kind)
+
+
+def extract_raw_records(html: str, kind: str, base_url: Optional[str] = None) -> List[Dict]:
+    """
+    Raw field values per card, the same shape EXTRACTION_SCRIPT returns in
+    the browser, before the selector table's parse/default rules are applied.
+    """
+    spec = SELECTORS[kind]
+    soup = BeautifulSoup(html, _parser())
+    raw_records = []
+    for card in soup.select(spec['container']):
+        raw = {}
+        for name, conf in spec['fields'].items():
+            el = card.select_one(conf['selector'])
+            if el is None:
+                raw[name] = None
+            elif conf['attribute'] == 'text':
+                raw[name] = el.get_text(' ', strip=True)
+            else:
+                value = el.get(conf['attribute'])
+                if value and base_url and conf['attribute'] == 'href':
+                    value = urljoin(base_url, value)
+                raw[name] = value
+        raw_records.append(raw)
+    return raw_records
+
+
+def _parser() -> str:
+    """Prefer lxml when it is installed, it is several times faster."""
+    try:
+        import lxml  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'html.parser'
@@ -0,0 +1,201 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+from observability.metrics import stage_timer, PAGES_FETCHED
+from jobs.deadline import Deadline, as_deadline
+from .driver_pool import session_key
+from .extraction import SELECTORS, extract_records, extract_records_from_driver
+from .rate_scheduler import Pacer
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FETCH_BACKENDS = ('selenium', 'http')
+DEFAULT_FETCH_BACKEND = os.getenv('FETCH_BACKEND', 'selenium')
+
+# Page kind label used by the pages_fetched metric
+PAGE_KINDS = {'profile': 'search', 'comment': 'comments'}
+
+HTTP_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                   '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+# Final URLs and statuses meaning LinkedIn wants a real browser (login wall, bot check)
+BROWSER_ONLY_PATHS = ('/authwall', '/login', '/checkpoint', '/uas/login')
+BROWSER_ONLY_STATUSES = (401, 403, 999)
+
+
+class NeedsJavaScript(Exception):
+    """The page cannot be scraped from its server-rendered HTML; use a browser."""
+
+
+class PageTimeout(Exception):
+    """The page's records did not appear in time."""
+
+
+class UnknownFetchBackend(ValueError):
+    """Raised for a fetch backend name that is not in FETCH_BACKENDS."""
+
+
+def _wait_for_slot(pacer: Optional[Pacer], deadline: Deadline, url: str) -> None:
+    """Wait for the session's page-load budget; PageTimeout if the deadline runs out first."""
+    if pacer is None:
+        return
+    with stage_timer('rate_limit_wait'):
+        if not pacer.wait(deadline):
+            raise PageTimeout(f"Deadline reached waiting for a page-load slot for {url}")
+
+
+def resolve_fetch_backend(name: Optional[str] = None) -> str:
+    name = name or DEFAULT_FETCH_BACKEND
+    if name not in FETCH_BACKENDS:
+        raise UnknownFetchBackend(f"Unknown fetch backend '{name}'; use one of {', '.join(FETCH_BACKENDS)}")
+    return name
+
+
+class SeleniumFetcher:
+    """
+    Loads pages in a logged-in browser and extracts records with one script call.
+    """
+
+    backend = 'selenium'
+
+    def __init__(self, driver, deadline: Optional[Deadline] = None, pacer: Optional[Pacer] = None):
+        self.driver = driver
+        self.deadline = as_deadline(deadline)
+        self.pacer = pacer
+
+    def fetch_records(self, url: str, kind: str) -> List[Dict]:
+        _wait_for_slot(self.pacer, self.deadline, url)
+        with stage_timer('page_load'):
+            self.driver.get(url)
+        PAGES_FETCHED.inc(kind=PAGE_KINDS[kind], backend=self.backend)
+
+        try:
+            with stage_timer('results_wait'):
+                WebDriverWait(self.driver, self.deadline.cap(30)).until(
+                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, SELECTORS[kind]['container']))
+                )
+        except TimeoutException:
+            raise PageTimeout(f"Timeout waiting for {kind} cards on {url}")
+        return extract_records_from_driver(self.driver, kind)
+
+
+class HttpSessionPool:
+    """
+    One requests.Session per li_at session, so cookies, keep-alive connections
+    and the connection pool are reused across pages and requests. At most
+    max_sessions are kept; the least recently used is closed first.
+    """
+
+    def __init__(self, max_sessions: int = 20, pool_size: int = 10, timeout: float = 15):
+        self.max_sessions = max_sessions
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._sessions: "OrderedDict[str, requests.Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def session(self, cookie: str) -> requests.Session:
+        key = session_key(cookie)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+                return session
+            session = self._create(cookie)
+            self._sessions[key] = session
+            if len(self._sessions) > self.max_sessions:
+                _, oldest = self._sessions.popitem(last=False)
+                oldest.close()
+            return session
+
+    def _create(self, cookie: str) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                              allowed_methods=('GET',))
+        )
+        session.mount('https://', adapter)
+        session.headers.update(HTTP_HEADERS)
+        session.cookies.set('li_at', cookie, domain='.linkedin.com')
+        return session
+
+    def close_all(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+http_sessions = HttpSessionPool(
+    max_sessions=int(os.getenv('HTTP_MAX_SESSIONS', '20')),
+    pool_size=int(os.getenv('HTTP_POOL_SIZE', '10')),
+    timeout=float(os.getenv('HTTP_TIMEOUT_SECONDS', '15'))
+)
+
+
+class HttpFetcher:
+    """
+    Fetches pages with a plain HTTP client and parses them with BeautifulSoup,
+    without a browser. Raises NeedsJavaScript when the server-rendered HTML
+    doesn't hold the records (client-rendered page, login wall, bot check).
+    """
+
+    backend = 'http'
+
+    def __init__(self, cookie: str, deadline: Optional[Deadline] = None, sessions: HttpSessionPool = http_sessions,
+                 pacer: Optional[Pacer] = None):
+        self.cookie = cookie
+        self.deadline = as_deadline(deadline)
+        self.sessions = sessions
+        self.pacer = pacer
+
+    def fetch_html(self, url: str, kind: str) -> str:
+        """
+        The page's HTML. PageTimeout if the deadline has run out or the request
+        times out; NeedsJavaScript if LinkedIn wants a browser or the request
+        fails otherwise, so the caller can carry on in Selenium.
+        """
+        session = self.sessions.session(self.cookie)
+        _wait_for_slot(self.pacer, self.deadline, url)
+        if self.deadline.expired:
+            raise PageTimeout(f"Deadline reached before fetching {url}")
+        try:
+            with stage_timer('http_fetch'):
+                response = session.get(url, timeout=self.deadline.cap(self.sessions.timeout))
+        except requests.Timeout:
+            raise PageTimeout(f"Timeout fetching {url}")
+        except requests.RequestException as e:
+            raise NeedsJavaScript(f"Fetching {url} over HTTP failed: {str(e)}") from e
+        PAGES_FETCHED.inc(kind=PAGE_KINDS[kind], backend=self.backend)
+        if response.status_code in BROWSER_ONLY_STATUSES or any(
+                path in response.url for path in BROWSER_ONLY_PATHS):
+            raise NeedsJavaScript(f"{url} answered {response.status_code} at {response.url}")
+        try:
+            response.raise_for_status()
+        except requests.HTTPError as e:
+            raise NeedsJavaScript(f"{url} answered {response.status_code} over HTTP") from e
+        return response.text
+
+    def fetch_records(self, url: str, kind: str) -> List[Dict]:
+        records = extract_records(self.fetch_html(url, kind), kind, base_url=url)
+        if not records:
+            raise NeedsJavaScript(f"No {kind} cards in the server-rendered HTML of {url}")
+        return records
@@ -6,106 +6,448 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
-from .utils import init_selenium_driver
+from .utils import progress_fields
+from .driver_pool import driver_pool, DriverLoginError, DriverPoolTimeout
+from .extraction import SELECTORS, extract_records, extract_records_from_driver
+from .fetch_backends import HttpFetcher, NeedsJavaScript, PageTimeout, resolve_fetch_backend
+from .dedup import DedupIndex, comment_key, comment_content_key
+from .watermarks import watermark_store
+from .records import Comment
+from .rate_scheduler import rate_scheduler, Pacer
+from observability.metrics import stage_timer, PAGES_FETCHED
+from jobs.deadline import Deadline, as_deadline
+from jobs.checkpoints import checkpoint_for
 import logging
 import time
 import random
-from typing import Dict, List
+from typing import Callable, Dict, Iterator, List, Optional
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def login_with_cookie(driver, cookie: str) -> bool:
-    """
-    Log in to LinkedIn using cookies with improved error handling.
-    Returns True if login successful, False otherwise.
-    """
-    try:
-        driver.get("https://www.linkedin.com/")
-        driver.add_cookie({"name": "li_at", "value": cookie})
-        driver.refresh()
-        WebDriverWait(driver, 30).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "global-nav__primary-link"))
-        )
-        return True
-    except Exception as e:
-        logger.error(f"Login failed: {str(e)}")
-        return False
+INITIAL_LOAD_TIMEOUT = 10
+POLL_INTERVAL = 0.1
+# Consecutive iterations without any change before the thread counts as complete
+MAX_IDLE_ROUNDS = 2
+
+THREAD_CONTROLS = {
+    'container': SELECTORS['comment']['container'],
+    'load_more': 'button.comments-comments-list__load-more-comments-button',
+    'loading': '.comments-comments-list__loading, .comments-comments-list .artdeco-loader',
+    'sort_toggle': 'button.comments-sort-order-toggle__trigger',
+    'sort_option': '.comments-sort-order-toggle .artdeco-dropdown__item',
+}
+# Marks a thread whose server-rendered HTML holds only its first comments
+LOAD_MORE_CLASS = 'comments-comments-list__load-more-comments-button'
+
+# Everything the scroll loop waits on, read in one round trip
+THREAD_STATE_SCRIPT = """
+const controls = arguments[0];
+const button = document.querySelector(controls.load_more);
+return {
+    count: document.querySelectorAll(controls.container).length,
+    height: document.body.scrollHeight,
+    load_more: !!(button && !button.disabled),
+    loading: !!document.querySelector(controls.loading)
+};
+"""
+
+# Switching a thread to "Most recent", so new comments come first, takes three
+# steps: open the sort dropdown, click "Most recent" once the dropdown has
+# rendered it, and confirm the toggle now shows that order
+SORT_TOGGLE_SCRIPT = """
+const toggle = document.querySelector(arguments[0]);
+if (!toggle) {
+    return false;
+}
+toggle.click();
+return true;
+"""
+
+SORT_RECENT_OPTION_SCRIPT = """
+const option = Array.from(document.querySelectorAll(arguments[0]))
+    .find(el => /most recent/i.test(el.innerText || el.textContent || ''));
+if (!option) {
+    return false;
+}
+option.click();
+return true;
+"""
 
-def scrape_comments_from_post(post_url: str, cookie: str) -> List[Dict]:
+SORT_IS_RECENT_SCRIPT = """
+const toggle = document.querySelector(arguments[0]);
+return !!toggle && /most recent/i.test(toggle.innerText || toggle.textContent || '');
+"""
+# How long to wait for each step of the sort switch
+SORT_TIMEOUT = 3.0
+
+EXPAND_SCRIPT = """
+window.scrollTo(0, document.body.scrollHeight);
+const button = document.querySelector(arguments[0]);
+if (button && !button.disabled) {
+    button.click();
+    return true;
+}
+return false;
+"""
+
+def scrape_comments_from_post(post_url: str, cookie: str,
+                              progress_callback: Optional[Callable[[Dict], None]] = None,
+                              dedup_index: Optional[DedupIndex] = None,
+                              incremental: bool = False,
+                              deadline: Optional[Deadline] = None,
+                              browser_profile: Optional[str] = None,
+                              fetch_backend: Optional[str] = None,
+                              priority: Optional[str] = None) -> List[Dict]:
     """
     Scrape comments from a LinkedIn post with improved loading and pagination.
+    If progress_callback is given it is called after every scroll iteration and once
+    comments are extracted; an exception raised by it aborts the scrape.
+    Pass a persistent dedup_index to skip comments already collected in earlier runs.
+    With incremental, only comments not seen by an earlier incremental scrape of
+    this post are returned, and the thread stops expanding once it reaches them;
+    progress_callback then also receives the new and total comment counts.
+    With a deadline, the comments loaded before it ran out are returned.
+    browser_profile picks the Chrome profile ("full" or "lean") to scrape with.
+    fetch_backend picks how the post is fetched ("selenium" or "http").
+    Loading the post draws on the session's rate budget at the given priority.
     """
-    driver = init_selenium_driver()
     comments = []
+    for event in iter_comments_from_post(post_url, cookie, dedup_index, incremental=incremental, deadline=deadline,
+                                         browser_profile=browser_profile, fetch_backend=fetch_backend,
+                                         priority=priority):
+        if event['type'] == 'comment':
+            comments.append(event['data'])
+        elif event['type'] in ('progress', 'delta') and progress_callback:
+            progress_callback(progress_fields(event))
+    return comments
+
+
+def iter_comments_from_post(post_url: str, cookie: str,
+                            dedup_index: Optional[DedupIndex] = None,
+                            incremental: bool = False,
+                            deadline: Optional[Deadline] = None,
+                            browser_profile: Optional[str] = None,
+                            fetch_backend: Optional[str] = None,
+                            priority: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Scrape comments from a LinkedIn post, yielding each new comment as soon as it is loaded.
+    Yields {'type': 'comment', 'data': {...}} per comment and
+    {'type': 'progress', ...} after every scroll iteration.
+    In incremental mode the post's watermark decides which comments are new,
+    and a final {'type': 'delta', ...} event gives the new and merged total counts.
+    If the deadline runs out a {'type': 'deadline', ...} event is yielded, and
+    an incremental scrape leaves the watermark alone so the next run picks up
+    the comments this one did not reach.
+    With the "http" fetch backend a thread whose comments are all in the
+    server-rendered HTML is scraped without a browser; otherwise a
+    {'type': 'fallback', ...} event is yielded and Selenium expands the thread.
+    """
+    deadline = as_deadline(deadline)
+    if incremental:
+        watermark = watermark_store.load(post_url)
+        dedup_index = DedupIndex(comment_content_key, skip_known=True, known=watermark['seen'])
+
+    cut_short = False
+    comment_events = None
+    pacer = rate_scheduler.pacer(cookie, priority)
+    if resolve_fetch_backend(fetch_backend) == 'http':
+        try:
+            comment_events = list(iter_comments_over_http(HttpFetcher(cookie, deadline, pacer=pacer), post_url,
+                                                          dedup_index))
+        except PageTimeout as e:
+            if deadline.expired:
+                cut_short = True
+                comment_events = [deadline.event('comment_fetch')]
+            else:
+                logger.info(f"Falling back to Selenium for {post_url}: {str(e)}")
+                yield {'type': 'fallback', 'backend': 'selenium', 'reason': str(e)}
+        except NeedsJavaScript as e:
+            logger.info(f"Falling back to Selenium for {post_url}: {str(e)}")
+            yield {'type': 'fallback', 'backend': 'selenium', 'reason': str(e)}
+
+    if comment_events is not None:
+        yield from comment_events
+    else:
+        try:
+            with driver_pool.checkout(cookie, timeout=deadline.remaining(), profile=browser_profile) as driver:
+                for event in iter_comments_with_driver(driver, post_url, dedup_index, stop_at_known=incremental,
+                                                       deadline=deadline, pacer=pacer):
+                    cut_short = cut_short or event['type'] == 'deadline'
+                    yield event
+        except DriverLoginError:
+            return
+        except DriverPoolTimeout:
+            if not deadline.expired:
+                raise
+            yield deadline.event('driver_checkout')
+            return
+
+    if incremental:
+        new_comments = dedup_index.records()
+        if cut_short:
+            total = len(watermark['seen'] | set(dedup_index.keys()))
+        else:
+            total = watermark_store.update(post_url, dedup_index.keys())['total']
+        yield {
+            'type': 'delta',
+            'new_comments': len(new_comments),
+            'total_comments': total,
+            'previous_scrape_at': watermark['updated_at']
+        }
+
+
+def scrape_comments_with_driver(driver, post_url: str,
+                                progress_callback: Optional[Callable[[Dict], None]] = None,
+                                dedup_index: Optional[DedupIndex] = None) -> List[Dict]:
+    """
+    Load a post on an already logged-in driver, expand its thread and extract the comments.
+    """
+    comments = dedup_index if dedup_index is not None else DedupIndex(comment_key)
+    for event in iter_comments_with_driver(driver, post_url, comments):
+        if event['type'] == 'progress' and progress_callback:
+            progress_callback(progress_fields(event))
+    return comments.records()
+
+
+def iter_comments_over_http(fetcher: HttpFetcher, post_url: str,
+                            dedup_index: Optional[DedupIndex] = None) -> Iterator[Dict]:
+    """
+    Read a post's comments from its server-rendered HTML, yielding comment and
+    progress events. Raises NeedsJavaScript if the HTML has no comments or the
+    thread has more behind a "Load more" button, which only a browser can click.
+    """
+    comments = dedup_index if dedup_index is not None else DedupIndex(comment_key)
+    html = fetcher.fetch_html(post_url, 'comment')
+    if LOAD_MORE_CLASS in html:
+        raise NeedsJavaScript(f"The comment thread of {post_url} has more comments to load")
+    records = extract_records(html, 'comment', base_url=post_url)
+    if not records:
+        raise NeedsJavaScript(f"No comments in the server-rendered HTML of {post_url}")
+
+    for comment_data in comments.add_all(Comment.from_dict(record) for record in records):
+        yield {'type': 'comment', 'data': comment_data}
+    yield {'type': 'progress', 'scroll_iterations': 0, 'comments_found': len(comments)}
 
-    try:
-        if not login_with_cookie(driver, cookie):
-            return comments
 
+def iter_comments_with_driver(driver, post_url: str,
+                              dedup_index: Optional[DedupIndex] = None,
+                              stop_at_known: bool = False,
+                              deadline: Optional[Deadline] = None,
+                              pacer: Optional[Pacer] = None) -> Iterator[Dict]:
+    """
+    Scroll loop on an already logged-in driver, yielding comment and progress events.
+    Instead of fixed sleeps, each iteration waits until the thread actually changes
+    (more comments, the load more button appearing or going away, a new page
+    height) and no loader is showing. The loop ends after an iteration in which
+    nothing changed. A final {'type': 'stats', ...} event reports iterations
+    and time spent waiting versus working.
+    With stop_at_known the thread is switched to newest-first order and, if
+    the switch is confirmed, stops expanding as soon as a batch holds only
+    comments the dedup index already knows; otherwise the whole thread is expanded.
+    Waits are capped by the deadline; once it has run out the thread stops
+    expanding, what has loaded is extracted and a {'type': 'deadline', ...} event follows.
+    With a pacer, loading the post waits for the session's page-load budget.
+    Inside a checkpointed job the comments found are checkpointed after every
+    scroll iteration that found new ones. A rerun yields them after a
+    {'type': 'resume', ...} event, then reloads the thread and only emits
+    comments it had not reached; a thread that was read to the end is not reloaded.
+    """
+    comments = dedup_index if dedup_index is not None else DedupIndex(comment_key)
+    deadline = as_deadline(deadline)
+    cut_short = False
+    stats = {'iterations': 0, 'wait_seconds': 0.0, 'work_seconds': 0.0}
+    timeout = AdaptiveTimeout()
+    started = time.time()
+
+    checkpoint = checkpoint_for(f"comments:{post_url}")
+    saved = checkpoint.load() if checkpoint else None
+    if saved:
+        restored = comments.add_all(Comment.from_dict(record) for record in saved['records'])
+        logger.info(f"Resuming {post_url} with {len(restored)} checkpointed comments")
+        yield {'type': 'resume', 'url': post_url, 'position': saved['position'], 'restored': len(restored)}
+        for comment_data in restored:
+            yield {'type': 'comment', 'data': comment_data}
+        if saved['state'].get('complete'):
+            yield {'type': 'progress', 'scroll_iterations': saved['position'], 'comments_found': len(comments)}
+            yield dict({'type': 'stats'}, **saved['state']['stats'])
+            return
+
+    if pacer is not None:
+        with stage_timer('rate_limit_wait'):
+            granted = pacer.wait(deadline)
+        stats['wait_seconds'] += time.time() - started
+        if not granted:
+            logger.info(f"Deadline reached waiting to load {post_url}")
+            yield deadline.event('comment_thread')
+            yield dict({'type': 'stats'}, **stats, total_seconds=round(time.time() - started, 3))
+            return
+
+    work_started = time.time()
+    with stage_timer('page_load'):
         driver.get(post_url)
-        time.sleep(3)  # Initial wait for content to load
-
-        # Scroll and load more comments
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        while True:
-            # Scroll down
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-
-            # Click "Load more" button if present
-            try:
-                load_more = driver.find_elements(By.CSS_SELECTOR, "button.comments-comments-list__load-more-comments-button")
-                if load_more:
-                    driver.execute_script("arguments[0].click();", load_more[0])
-                    time.sleep(2)
-            except Exception:
-                pass
-
-            # Check if we've reached the bottom
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                break
-            last_height = new_height
+    PAGES_FETCHED.inc(kind='comments', backend='selenium')
+    stats['work_seconds'] += time.time() - work_started
 
-        # Extract comments
+    # Wait for the first comments or the load more button instead of a fixed sleep
+    wait_started = time.time()
+    try:
+        WebDriverWait(driver, deadline.cap(INITIAL_LOAD_TIMEOUT), poll_frequency=POLL_INTERVAL).until(
+            lambda d: _has_thread_content(_thread_state(d))
+        )
+    except TimeoutException:
+        logger.info(f"No comments appeared on {post_url}")
+    stats['wait_seconds'] += time.time() - wait_started
+
+    state = _thread_state(driver)
+    # Stopping at known comments is only safe when the newest come first
+    newest_first = stop_at_known and _sort_newest_first(driver, deadline)
+    if newest_first:
+        # The toggle already shows the new order; wait for the re-sorted thread to finish loading
         try:
-            WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "comments-comment-item"))
+            WebDriverWait(driver, deadline.cap(timeout.current), poll_frequency=POLL_INTERVAL).until(
+                lambda d: not _thread_state(d)['loading']
             )
+        except TimeoutException:
+            pass
+        state = _thread_state(driver)
+    elif stop_at_known:
+        logger.info(f"Could not sort {post_url} newest first; expanding the whole thread")
+    idle_rounds = 0
+    while True:
+        # Scroll down and click "Load more" if present, in one round trip
+        work_started = time.time()
+        driver.execute_script(EXPAND_SCRIPT, THREAD_CONTROLS['load_more'])
 
-            results = driver.find_elements(By.CLASS_NAME, "comments-comment-item")
-            for comment in results:
-                try:
-                    comment_data = {
-                        "name": comment.find_element(By.CLASS_NAME, "comments-post-meta__name-text").text,
-                        "comment": comment.find_element(By.CLASS_NAME, "comments-comment-item__main-content").text,
-                        "timestamp": comment.find_element(By.CLASS_NAME, "comments-comment-item__timestamp").text,
-                        "likes": _get_comment_likes(comment)
-                    }
-                    if comment_data not in comments:  # Avoid duplicates
-                        comments.append(comment_data)
-                except StaleElementReferenceException:
-                    continue
-                except Exception as e:
-                    logger.warning(f"Error parsing comment: {e}")
-                    continue
+        # Emit what has loaded so far; cards already read are skipped in the browser
+        batch = [Comment.from_dict(record) for record in extract_records_from_driver(driver, 'comment', only_new=True)]
+        new_comments = comments.add_all(batch)
+        stats['work_seconds'] += time.time() - work_started
+        for comment_data in new_comments:
+            yield {'type': 'comment', 'data': comment_data}
+        if checkpoint is not None and new_comments:
+            checkpoint.save(post_url, stats['iterations'],
+                            [(comments.key_fn(c), c.to_dict()) for c in new_comments])
 
-        except TimeoutException:
-            logger.warning("Timeout waiting for comments to load")
+        if newest_first and batch and not new_comments:
+            logger.info(f"Reached already scraped comments on {post_url}")
+            break
+        if deadline.expired:
+            cut_short = True
+            break
+
+        # Wait for the thread to react
+        wait_started = time.time()
+        new_state = _wait_for_change(driver, state, deadline.cap(timeout.current))
+        waited = time.time() - wait_started
+        stats['wait_seconds'] += waited
+        stats['iterations'] += 1
+
+        if new_state is None:
+            if deadline.expired:
+                cut_short = True
+                break
+            idle_rounds += 1
+            # A click or scroll that produced nothing yet may just be slow: the adaptive
+            # timeout can have shrunk to its floor, so give it one more, longer try
+            if idle_rounds >= MAX_IDLE_ROUNDS:
+                break
+            timeout.expand()
+        else:
+            idle_rounds = 0
+            timeout.observe(waited)
+            state = new_state
+
+        yield {'type': 'progress', 'scroll_iterations': stats['iterations'], 'comments_found': len(comments)}
+
+    # Extract comments
+    work_started = time.time()
+    new_comments = comments.add_all(Comment.from_dict(record)
+                                    for record in extract_records_from_driver(driver, 'comment', only_new=True))  # Avoid duplicates
+    stats['work_seconds'] += time.time() - work_started
+    if not len(comments):
+        logger.warning("No comments loaded for this post")
+
+    for comment_data in new_comments:
+        yield {'type': 'comment', 'data': comment_data}
+    yield {'type': 'progress', 'scroll_iterations': stats['iterations'], 'comments_found': len(comments)}
+    if cut_short:
+        logger.info(f"Deadline reached while expanding {post_url}")
+        yield deadline.event('comment_thread')
+
+    stats['total_seconds'] = time.time() - started
+    stats = {k: round(v, 3) if isinstance(v, float) else v for k, v in stats.items()}
+    logger.info(f"Comment scrape stats for {post_url}: {stats}")
+    if checkpoint is not None:
+        checkpoint.save(post_url, stats['iterations'], [(comments.key_fn(c), c.to_dict()) for c in new_comments],
+                        {'complete': not cut_short, 'stats': stats})
+    yield dict({'type': 'stats'}, **stats)
+
+
+class AdaptiveTimeout:
+    """
+    How long to wait for the thread to change. Follows how quickly the page
+    has been responding, within [minimum, maximum].
+    """
+
+    def __init__(self, initial: float = 3.0, minimum: float = 0.5, maximum: float = 10.0, factor: float = 3.0):
+        self.current = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
 
-        return comments
-    finally:
-        driver.quit()
+    def observe(self, elapsed: float) -> None:
+        self.current = min(self.maximum, max(self.minimum, elapsed * self.factor))
+
+    def expand(self) -> None:
+        self.current = min(self.maximum, self.current * 2)
+
+
+def _sort_newest_first(driver, deadline: Deadline) -> bool:
+    """Switch the thread to "Most recent" order. True only once the toggle shows the new order."""
+    if not driver.execute_script(SORT_TOGGLE_SCRIPT, THREAD_CONTROLS['sort_toggle']):
+        return False
+    try:
+        WebDriverWait(driver, deadline.cap(SORT_TIMEOUT), poll_frequency=POLL_INTERVAL).until(
+            lambda d: d.execute_script(SORT_RECENT_OPTION_SCRIPT, THREAD_CONTROLS['sort_option'])
+        )
+        WebDriverWait(driver, deadline.cap(SORT_TIMEOUT), poll_frequency=POLL_INTERVAL).until(
+            lambda d: d.execute_script(SORT_IS_RECENT_SCRIPT, THREAD_CONTROLS['sort_toggle'])
+        )
+    except TimeoutException:
+        return False
+    return True
+
+
+def _thread_state(driver) -> Dict:
+    return driver.execute_script(THREAD_STATE_SCRIPT, THREAD_CONTROLS)
+
+
+def _has_thread_content(state: Dict) -> bool:
+    return state['count'] > 0 or state['load_more']
+
+
+def _wait_for_change(driver, previous: Dict, timeout: float) -> Optional[Dict]:
+    """
+    Wait until the thread state differs from previous and nothing is loading.
+    Returns the new state, or None if nothing changed within timeout.
+    """
+    observed = {}
+
+    def changed(d):
+        state = _thread_state(d)
+        if state['loading']:
+            return False
+        if any(state[key] != previous[key] for key in ('count', 'height', 'load_more')):
+            observed['state'] = state
+            return True
+        return False
 
-def _get_comment_likes(comment_element) -> int:
-    """Helper function to extract comment likes count"""
     try:
-        likes_element = comment_element.find_element(By.CSS_SELECTOR, ".comments-comment-social-bar__social-counts")
-        likes_text = likes_element.text
-        return int(''.join(filter(str.isdigit, likes_text)) or '0')
-    except:
-        return 0
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(changed)
+    except TimeoutException:
+        return None
+    return observed['state']
@@ -8,32 +8,31 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
-from .utils import init_selenium_driver
+from .utils import progress_fields
+from .driver_pool import driver_pool, DriverLoginError, DriverPoolTimeout
+from .fetch_backends import (SeleniumFetcher, HttpFetcher, NeedsJavaScript, PageTimeout,
+                             resolve_fetch_backend)
+from .rate_scheduler import rate_scheduler, Pacer
+from .dedup import DedupIndex, profile_key
+from .records import Profile
+from jobs.deadline import Deadline, as_deadline
+from jobs.checkpoints import checkpoint_for
 import logging
 import time
 import random
-from typing import Dict, List
+from typing import Callable, Dict, Iterator, List, Optional
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def login_with_cookie(driver, cookie: str) -> bool:
-    """
-    Log in to LinkedIn using cookies with improved error handling.
-    Returns True if login successful, False otherwise.
-    """
-    try:
-        driver.get("https://www.linkedin.com/")
-        driver.add_cookie({"name": "li_at", "value": cookie})
-        driver.refresh()
-        WebDriverWait(driver, 30).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "global-nav__primary-link"))
-        )
-        return True
-    except Exception as e:
-        logger.error(f"Login failed: {str(e)}")
-        return False
+# Pages per search unless the request sets max_pages; LinkedIn serves at most MAX_PAGES_LIMIT
+DEFAULT_MAX_PAGES = int(os.getenv('SEARCH_MAX_PAGES', '3'))
+MAX_PAGES_LIMIT = 100
+# Results on a full search page; a shorter page is the last one
+RESULTS_PER_PAGE = 10
+# Stop reasons after which a search has nothing left to load
+FINAL_STOP_REASONS = ('target_reached', 'no_new_profiles', 'exhausted', 'max_pages')
 
 def build_linkedin_url(query_params: Dict, filters: Dict = None) -> str:
     """
@@ -46,67 +45,280 @@ def build_linkedin_url(query_params: Dict, filters: Dict = None) -> str:
     return base_url + "&".join(params)
 
 
-def scrape_linkedin_profiles(query_params: Dict, cookie: str, filters: Dict = None) -> List[Dict]:
+def scrape_linkedin_profiles(query_params: Dict, cookie: str, filters: Dict = None,
+                             progress_callback: Optional[Callable[[Dict], None]] = None,
+                             dedup_index: Optional[DedupIndex] = None,
+                             deadline: Optional[Deadline] = None,
+                             browser_profile: Optional[str] = None,
+                             fetch_backend: Optional[str] = None,
+                             max_pages: Optional[int] = None,
+                             target_count: Optional[int] = None,
+                             priority: Optional[str] = None) -> List[Dict]:
     """
     Scrape LinkedIn profiles using Selenium with improved error handling and rate limiting.
     Now supports an optional 'filers' argument.
+    If progress_callback is given it is called after every page with the pages done
+    and profiles found so far; an exception raised by it aborts the scrape.
+    Pass a persistent dedup_index to skip profiles already collected in earlier runs.
+    With a deadline, the profiles collected before it ran out are returned.
+    browser_profile picks the Chrome profile ("full" or "lean") to scrape with.
+    fetch_backend picks how pages are fetched ("selenium" or "http").
+    max_pages and target_count bound the page loop (see iter_profiles_with_fetcher).
+    Page loads draw on the session's rate budget at the given priority ("high", "normal" or "low").
     """
-    # Incorporate 'filters' into the scraping logic if needed
-    driver = init_selenium_driver()
-    profiles = []
-    page = 1
-    max_pages = 3  # Adjust based on your needs
+    profiles = dedup_index if dedup_index is not None else DedupIndex(profile_key)
+    for event in iter_linkedin_profiles(query_params, cookie, filters, profiles, deadline, browser_profile,
+                                        fetch_backend, max_pages, target_count, priority):
+        if event['type'] == 'progress' and progress_callback:
+            progress_callback(progress_fields(event))
+    return profiles.records()
+
+
+def iter_linkedin_profiles(query_params: Dict, cookie: str, filters: Dict = None,
+                           dedup_index: Optional[DedupIndex] = None,
+                           deadline: Optional[Deadline] = None,
+                           browser_profile: Optional[str] = None,
+                           fetch_backend: Optional[str] = None,
+                           max_pages: Optional[int] = None,
+                           target_count: Optional[int] = None,
+                           priority: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Scrape LinkedIn profiles, yielding each new profile as soon as its page is parsed.
+    Yields {'type': 'profile', 'data': {...}} per profile and
+    {'type': 'progress', ...} after every page. If the deadline runs out the
+    scrape stops with a final {'type': 'deadline', ...} event.
+    With the "http" fetch backend pages are fetched without a browser; if a
+    page needs JavaScript or times out a {'type': 'fallback', ...} event is
+    yielded and the scrape continues from that page in Selenium.
+    """
+    profiles = dedup_index if dedup_index is not None else DedupIndex(profile_key)
+    deadline = as_deadline(deadline)
+    pacer = rate_scheduler.pacer(cookie, priority)
+    start_page = 1
+    if resolve_fetch_backend(fetch_backend) == 'http':
+        fetcher = HttpFetcher(cookie, deadline, pacer=pacer)
+        try:
+            for event in iter_profiles_with_fetcher(fetcher, query_params, filters, profiles, deadline,
+                                                    max_pages=max_pages, target_count=target_count):
+                if event['type'] == 'progress':
+                    start_page = event['pages_done'] + 1
+                yield event
+            return
+        except (NeedsJavaScript, PageTimeout) as e:
+            logger.info(f"Falling back to Selenium at page {start_page}: {str(e)}")
+            yield {'type': 'fallback', 'backend': 'selenium', 'page': start_page, 'reason': str(e)}
+
     try:
-        if not login_with_cookie(driver, cookie):
-            return profiles
-
-        while page <= max_pages:
-            try:
-                # Add page parameter to URL and apply filters if provided
-                current_url = build_linkedin_url(query_params)
-                if filters:
-                    filter_params = "&".join(f"{key}={value}" for key, value in filters.items())
-                    current_url += f"&{filter_params}"
-                if page > 1:
-                    current_url += f"&page={page}"
-                
-                driver.get(current_url)
-                time.sleep(random.uniform(2, 4))  # Random delay to avoid detection
-                
-                # Wait for results with timeout handling
-                try:
-                    WebDriverWait(driver, 30).until(
-                        EC.presence_of_all_elements_located((By.CLASS_NAME, "reusable-search__result-container"))
-                    )
-                except TimeoutException:
-                    logger.warning(f"Timeout waiting for results on page {page}")
-                    break
-
-                results = driver.find_elements(By.CLASS_NAME, "reusable-search__result-container")
-                if not results:
-                    break
-
-                for result in results:
-                    try:
-                        profile = {
-                            "name": result.find_element(By.CSS_SELECTOR, ".actor-name").text,
-                            "title": result.find_element(By.CSS_SELECTOR, ".subline-level-1").text,
-                            "location": result.find_element(By.CSS_SELECTOR, ".subline-level-2").text,
-                            "profile_url": result.find_element(By.CSS_SELECTOR, ".app-aware-link").get_attribute("href")
-                        }
-                        if profile not in profiles:  # Avoid duplicates
-                            profiles.append(profile)
-                    except Exception as e:
-                        logger.warning(f"Error parsing profile: {e}")
-                        continue
-
-                page += 1
-                time.sleep(random.uniform(1, 2))  # Random delay between pages
-                
-            except Exception as e:
-                logger.error(f"Error on page {page}: {str(e)}")
+        with driver_pool.checkout(cookie, timeout=deadline.remaining(), profile=browser_profile) as driver:
+            yield from iter_profiles_with_fetcher(SeleniumFetcher(driver, deadline, pacer), query_params, filters,
+                                                  profiles, deadline, start_page, max_pages, target_count)
+    except DriverLoginError:
+        return
+    except DriverPoolTimeout:
+        if not deadline.expired:
+            raise
+        yield deadline.event('driver_checkout')
+
+
+def iter_profiles_for_queries(queries: List[Dict], cookie: str, filters: Dict = None,
+                              deadline: Optional[Deadline] = None,
+                              browser_profile: Optional[str] = None,
+                              max_pages: Optional[int] = None,
+                              target_count: Optional[int] = None,
+                              priority: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Run several searches one after another on one checked-out driver, so the
+    browser launch and login are paid once for all of them. Every event of
+    iter_profiles_with_driver is yielded with a 'search' field holding the
+    index of its query params, and each search dedups its own profiles.
+    Searches not started before the deadline ran out are skipped after
+    a single {'type': 'deadline', ...} event. If the cookie can't log in, a
+    single {'type': 'login_failed', ...} event is yielded and nothing runs.
+    """
+    deadline = as_deadline(deadline)
+    pacer = rate_scheduler.pacer(cookie, priority)
+    try:
+        with driver_pool.checkout(cookie, timeout=deadline.remaining(), profile=browser_profile) as driver:
+            for index, query_params in enumerate(queries):
+                if deadline.expired:
+                    yield dict(deadline.event('search_queries'), search=index)
+                    return
+                for event in iter_profiles_with_driver(driver, query_params, filters, DedupIndex(profile_key),
+                                                       deadline, max_pages, target_count, pacer):
+                    yield dict(event, search=index)
+                    if event['type'] == 'deadline':
+                        return
+    except DriverLoginError as e:
+        logger.error(f"Bulk search could not log in: {str(e)}")
+        yield {'type': 'login_failed', 'search': 0, 'message': str(e)}
+    except DriverPoolTimeout:
+        if not deadline.expired:
+            raise
+        yield dict(deadline.event('driver_checkout'), search=0)
+
+
+def scrape_profiles_with_driver(driver, query_params: Dict, filters: Dict = None,
+                                progress_callback: Optional[Callable[[Dict], None]] = None,
+                                dedup_index: Optional[DedupIndex] = None,
+                                deadline: Optional[Deadline] = None,
+                                max_pages: Optional[int] = None,
+                                target_count: Optional[int] = None,
+                                pacer: Optional[Pacer] = None) -> List[Dict]:
+    """
+    Run the search page loop on an already logged-in driver.
+    """
+    profiles = dedup_index if dedup_index is not None else DedupIndex(profile_key)
+    for event in iter_profiles_with_driver(driver, query_params, filters, profiles, deadline, max_pages,
+                                           target_count, pacer):
+        if event['type'] == 'progress' and progress_callback:
+            progress_callback(progress_fields(event))
+    return profiles.records()
+
+
+def iter_profiles_with_driver(driver, query_params: Dict, filters: Dict = None,
+                              dedup_index: Optional[DedupIndex] = None,
+                              deadline: Optional[Deadline] = None,
+                              max_pages: Optional[int] = None,
+                              target_count: Optional[int] = None,
+                              pacer: Optional[Pacer] = None) -> Iterator[Dict]:
+    """
+    Page loop on an already logged-in driver, yielding profile and progress events.
+    Page loads wait for the pacer's session budget; without one they are not paced.
+    """
+    yield from iter_profiles_with_fetcher(SeleniumFetcher(driver, deadline, pacer), query_params, filters,
+                                          dedup_index, deadline, max_pages=max_pages, target_count=target_count)
+
+
+def iter_profiles_with_fetcher(fetcher, query_params: Dict, filters: Dict = None,
+                               dedup_index: Optional[DedupIndex] = None,
+                               deadline: Optional[Deadline] = None,
+                               start_page: int = 1,
+                               max_pages: Optional[int] = None,
+                               target_count: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Page loop over a fetch backend, yielding profile and progress events.
+    Pages are loaded until one of these holds, in this order of precedence:
+    target_count unique profiles have been found ("target_reached"), a page
+    held no profile not already met in this scrape ("no_new_profiles"; with
+    skip_known, profiles known from earlier runs count as met for the first
+    time here), the results ran out with
+    an empty or short page ("exhausted"), or max_pages pages were loaded
+    (default DEFAULT_MAX_PAGES, "max_pages"). A final {'type': 'pagination', ...}
+    event gives the stop reason and per-page results and yield for tuning.
+    Waits are capped by the deadline, and no new page is started once it has run out.
+    NeedsJavaScript from the fetcher, and an HTTP page timeout before the
+    deadline, are raised to the caller, which can carry on from the same page
+    with a browser.
+    Inside a checkpointed job the page reached and the profiles found are
+    checkpointed after every page. A rerun yields the checkpointed profiles
+    after a {'type': 'resume', ...} event and continues with the next page,
+    and a page error is raised so the job is retried instead of ending early.
+    On the job's last attempt the search ends with the profiles it has instead.
+    """
+    # Incorporate 'filters' into the scraping logic if needed
+    profiles = dedup_index if dedup_index is not None else DedupIndex(profile_key)
+    deadline = as_deadline(deadline)
+    max_pages = min(max_pages or DEFAULT_MAX_PAGES, MAX_PAGES_LIMIT)
+    search_url = build_linkedin_url(query_params)
+    if filters:
+        search_url += "&" + "&".join(f"{key}={value}" for key, value in filters.items())
+    page = start_page
+    page_stats = []
+    stop_reason = 'max_pages'
+
+    checkpoint = checkpoint_for(f"search:{search_url}")
+    saved = checkpoint.load() if checkpoint else None
+    if saved:
+        restored = profiles.add_all(Profile.from_dict(record) for record in saved['records'])
+        page_stats = saved['state'].get('pages', [])
+        page = max(page, saved['position'] + 1)
+        if restored:
+            logger.info(f"Resuming search after page {saved['position']} with {len(restored)} profiles")
+            yield {'type': 'resume', 'url': saved['url'], 'position': saved['position'], 'restored': len(restored)}
+        for profile in restored:
+            yield {'type': 'profile', 'data': profile}
+        if saved['state'].get('stop_reason'):
+            stop_reason = saved['state']['stop_reason']
+            page = max_pages + 1
+
+    while page <= max_pages:
+        if deadline.expired:
+            logger.info(f"Deadline reached before page {page}")
+            stop_reason = 'deadline'
+            yield deadline.event('search_pages')
+            break
+        try:
+            # Add page parameter to URL and apply filters if provided
+            current_url = search_url
+            if page > 1:
+                current_url += f"&page={page}"
+
+            results = fetcher.fetch_records(current_url, 'profile')
+            if not results:
+                stop_reason = 'exhausted'
                 break
 
-        return profiles
-    finally:
-        driver.quit()
\ No newline at end of file
+            seen_before = profiles.seen_count
+            new_profiles = profiles.add_all(Profile.from_dict(result) for result in results)  # Avoid duplicates
+            # Profiles skipped as known from earlier runs still show the results are moving on
+            page_unique = profiles.seen_count - seen_before
+        except NeedsJavaScript:
+            raise
+        except PageTimeout:
+            if deadline.expired:
+                stop_reason = 'deadline'
+                yield deadline.event('search_pages')
+                break
+            if getattr(fetcher, 'backend', None) == 'http':
+                raise
+            logger.warning(f"Timeout waiting for results on page {page}")
+            stop_reason = 'timeout'
+            break
+        except Exception as e:
+            logger.error(f"Error on page {page}: {str(e)}")
+            if checkpoint is not None and not checkpoint.final_attempt:
+                raise
+            stop_reason = 'error'
+            break
+
+        page_yield = round(len(new_profiles) / len(results), 3)
+        page_stats.append({'page': page, 'results': len(results), 'new_profiles': len(new_profiles),
+                           'yield': page_yield})
+        for profile in new_profiles:
+            yield {'type': 'profile', 'data': profile}
+        yield {
+            'type': 'progress',
+            'pages_done': page,
+            'new_profiles': len(new_profiles),
+            'profiles_found': len(profiles),
+            'page_results': len(results),
+            'page_yield': page_yield
+        }
+        if checkpoint is not None:
+            checkpoint.save(current_url, page, [(profiles.key_fn(p), p.to_dict()) for p in new_profiles],
+                            {'pages': page_stats})
+
+        if target_count and len(profiles) >= target_count:
+            stop_reason = 'target_reached'
+            break
+        if not page_unique:
+            stop_reason = 'no_new_profiles'
+            break
+        if len(results) < RESULTS_PER_PAGE:
+            stop_reason = 'exhausted'
+            break
+        page += 1
+
+    if checkpoint is not None and stop_reason in FINAL_STOP_REASONS:
+        # The search is complete; a rerun only replays it
+        checkpoint.save(search_url, page, state={'pages': page_stats, 'stop_reason': stop_reason})
+    logger.info(f"Search stopped after {len(page_stats)} pages: {stop_reason}")
+    yield {
+        'type': 'pagination',
+        'stop_reason': stop_reason,
+        'pages_loaded': len(page_stats),
+        'profiles_found': len(profiles),
+        'target_count': target_count,
+        'max_pages': max_pages,
+        'pages': page_stats
+    }
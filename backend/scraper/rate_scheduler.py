@@ -0,0 +1,158 @@
+import os
+import time
+import heapq
+import logging
+import itertools
+import threading
+from typing import Dict, List, Optional
+from observability.metrics import RATE_LIMIT_WAIT_SECONDS
+from jobs.deadline import Deadline, as_deadline
+from .driver_pool import session_key
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Lower rank is served first; interactive requests default to high, jobs to normal
+PRIORITIES = {'high': 0, 'normal': 1, 'low': 2}
+DEFAULT_PRIORITY = 'normal'
+
+
+class RateLimitTimeout(Exception):
+    """No page-load slot was granted before the timeout."""
+
+
+class _SessionBudget:
+    """Token bucket and waiting queue of one li_at session."""
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+        self.waiters: List[list] = []
+
+    def refill(self, now: float, rate: float, burst: int) -> None:
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+
+class RateScheduler:
+    """
+    Central page-load budget per LinkedIn session. Each session has a token
+    bucket refilled at pages_per_minute, holding at most burst tokens, and
+    every page load takes one token. Scrapes sharing a session queue for
+    tokens by priority, first come first served within a priority, so
+    concurrent jobs together load pages as fast as the budget allows and
+    never faster. Replaces the random sleeps each scrape used to do on its own.
+    """
+
+    def __init__(self, pages_per_minute: float = 12, burst: int = 2):
+        self.rate = pages_per_minute / 60
+        self.burst = burst
+        self._sessions: Dict[str, _SessionBudget] = {}
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self.stats = {'granted': 0, 'timeouts': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0}
+
+    def acquire(self, cookie: str, priority: Optional[str] = None, timeout: Optional[float] = None) -> float:
+        """
+        Wait for a page-load slot for the cookie's session and return the
+        seconds waited. Raises RateLimitTimeout if none is granted within timeout.
+        """
+        rank = PRIORITIES[priority or DEFAULT_PRIORITY]
+        started = time.monotonic()
+        end = started + timeout if timeout is not None else None
+        key = session_key(cookie)
+        entry = [rank, next(self._sequence)]
+
+        with self._cond:
+            self._prune(started)
+            budget = self._sessions.get(key)
+            if budget is None:
+                budget = self._sessions[key] = _SessionBudget(self.burst, started)
+            heapq.heappush(budget.waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    budget.refill(now, self.rate, self.burst)
+                    first = budget.waiters[0] is entry
+                    if first and budget.tokens >= 1:
+                        heapq.heappop(budget.waiters)
+                        budget.tokens -= 1
+                        self._cond.notify_all()
+                        break
+                    # The head of the queue knows when the next token is due; the others wait for it to be served
+                    wait = (1 - budget.tokens) / self.rate if first else None
+                    if end is not None:
+                        if now >= end:
+                            raise RateLimitTimeout(f"No page-load slot within {timeout:.1f}s")
+                        wait = min(wait, end - now) if wait is not None else end - now
+                    self._cond.wait(wait)
+            except BaseException:
+                if entry in budget.waiters:
+                    budget.waiters.remove(entry)
+                    heapq.heapify(budget.waiters)
+                    self._cond.notify_all()
+                self.stats['timeouts'] += 1
+                raise
+
+            waited = time.monotonic() - started
+            self.stats['granted'] += 1
+            self.stats['wait_seconds'] += waited
+            self.stats['max_wait_seconds'] = max(self.stats['max_wait_seconds'], waited)
+        RATE_LIMIT_WAIT_SECONDS.observe(waited, priority=priority or DEFAULT_PRIORITY)
+        return waited
+
+    def pacer(self, cookie: str, priority: Optional[str] = None) -> 'Pacer':
+        return Pacer(self, cookie, priority)
+
+    def queue_depth(self) -> Dict[str, int]:
+        """Scrapes waiting for a page-load slot, by priority."""
+        depth = {name: 0 for name in PRIORITIES}
+        names = {rank: name for name, rank in PRIORITIES.items()}
+        with self._cond:
+            for budget in self._sessions.values():
+                for rank, _ in budget.waiters:
+                    depth[names[rank]] += 1
+        return depth
+
+    def snapshot(self) -> Dict:
+        with self._cond:
+            sessions = len(self._sessions)
+            stats = dict(self.stats)
+        granted = stats['granted']
+        return dict(stats, pages_per_minute=self.rate * 60, burst=self.burst, sessions=sessions,
+                    queue_depth=self.queue_depth(),
+                    mean_wait_seconds=round(stats['wait_seconds'] / granted, 3) if granted else 0.0)
+
+    def _prune(self, now: float) -> None:
+        """Forget sessions nobody waits on whose bucket has refilled."""
+        idle = [key for key, budget in self._sessions.items()
+                if not budget.waiters and budget.tokens + (now - budget.updated) * self.rate >= self.burst]
+        for key in idle:
+            del self._sessions[key]
+
+
+class Pacer:
+    """
+    A scrape's handle on the scheduler: its session and priority. Call wait()
+    before every page load.
+    """
+
+    def __init__(self, scheduler: RateScheduler, cookie: str, priority: Optional[str] = None):
+        self.scheduler = scheduler
+        self.cookie = cookie
+        self.priority = priority
+
+    def wait(self, deadline: Optional[Deadline] = None) -> bool:
+        """Wait for a page-load slot. Returns False if the deadline ran out first."""
+        try:
+            self.scheduler.acquire(self.cookie, self.priority, timeout=as_deadline(deadline).remaining())
+        except RateLimitTimeout:
+            return False
+        return True
+
+
+rate_scheduler = RateScheduler(
+    pages_per_minute=float(os.getenv('RATE_LIMIT_PAGES_PER_MINUTE', '12')),
+    burst=int(os.getenv('RATE_LIMIT_BURST', '2'))
+)
@@ -0,0 +1,170 @@
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_SOURCE = 'LinkedIn Public Profile'
+LEGAL_BASIS = 'Legitimate Interest'
+RETENTION_PERIOD = '30 days'
+
+
+class Record:
+    """
+    Compact scraped record. Known fields live in __slots__ instead of a
+    per-record dict; anything else lands in `extra`, which stays None for
+    records that only carry the known fields. Records also support the dict
+    operations the pipeline uses (get, [], in, items, copy) so dedup keys and
+    merges work on them unchanged. As in a dict, a field set to None is
+    present: known fields explicitly set to None are listed in `nulls`, which
+    stays None for records without any.
+    """
+
+    __slots__ = ('extra', 'nulls')
+    FIELDS = ()
+
+    def __init__(self, **fields):
+        self.nulls = None
+        for name in self.FIELDS:
+            if name in fields and fields[name] is None:
+                self.nulls = (self.nulls or frozenset()) | {name}
+            setattr(self, name, fields.pop(name, None))
+        self.extra = fields or None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Record':
+        """Build a record from a dict; a record of this type is returned as is."""
+        return data if isinstance(data, cls) else cls(**data)
+
+    def _has_field(self, name: str) -> bool:
+        return getattr(self, name) is not None or (self.nulls is not None and name in self.nulls)
+
+    def get(self, key: str, default=None):
+        if key in self.FIELDS:
+            return getattr(self, key) if self._has_field(key) else default
+        return self.extra.get(key, default) if self.extra else default
+
+    def __getitem__(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+        return self.get(key)
+
+    def __setitem__(self, key: str, value) -> None:
+        if key in self.FIELDS:
+            setattr(self, key, value)
+            if value is None:
+                self.nulls = (self.nulls or frozenset()) | {key}
+            elif self.nulls is not None and key in self.nulls:
+                self.nulls = self.nulls - {key} or None
+        elif self.extra is None:
+            self.extra = {key: value}
+        else:
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        if key in self.FIELDS:
+            return self._has_field(key)
+        return bool(self.extra) and key in self.extra
+
+    def items(self):
+        for name in self.FIELDS:
+            if self._has_field(name):
+                yield name, getattr(self, name)
+        if self.extra:
+            yield from self.extra.items()
+
+    def keys(self) -> List[str]:
+        return [name for name, _ in self.items()]
+
+    def copy(self) -> 'Record':
+        return type(self)(**self.to_dict())
+
+    def to_dict(self) -> Dict:
+        """The record as a flat dict of the fields that are set."""
+        return dict(self.items())
+
+    def serialize(self) -> Dict:
+        """The shape sent to clients, storage and exports."""
+        return self.to_dict()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Profile(Record):
+    """A search result. Once apply_gdpr has stamped it, it serializes in the compliant shape."""
+
+    FIELDS = ('name', 'title', 'location', 'company', 'profile_url', 'email', 'email_hash',
+              'data_source', 'collection_date')
+    __slots__ = FIELDS
+
+    def serialize(self) -> Dict:
+        if self.collection_date is None:
+            return self.to_dict()
+        return self.to_gdpr_dict()
+
+    def to_gdpr_dict(self) -> Dict:
+        """
+        Build the GDPR-compliant shape: provenance and retention at the top,
+        the profile fields nested (including those set to None), and the
+        email only as its hash.
+        """
+        profile_data = {name: value for name, value in self.items()
+                        if name not in ('collection_date', 'data_source', 'email')}
+        if self.email is not None and self.email_hash is None:
+            profile_data['email_hash'] = hash_email(self.email)
+        return {
+            'data_source': self.get('data_source', DEFAULT_DATA_SOURCE),
+            'collection_date': self.collection_date,
+            'legal_basis': LEGAL_BASIS,
+            'retention_period': RETENTION_PERIOD,
+            'profile_data': profile_data
+        }
+
+
+class Comment(Record):
+    FIELDS = ('name', 'comment', 'timestamp', 'likes')
+    __slots__ = FIELDS
+
+
+def hash_email(email: str) -> str:
+    return hashlib.sha256(email.encode()).hexdigest()
+
+
+def apply_gdpr(profiles: Iterable[Profile], collection_date: Optional[str] = None) -> List[Profile]:
+    """
+    GDPR transform for a batch of profiles, in place. Every profile without a
+    collection date gets the same batch timestamp, and emails are replaced by
+    their hash here, once, so serializing a profile again costs no hashing.
+    Profiles that were already stamped keep their original date.
+    """
+    collection_date = collection_date or datetime.now().isoformat()
+    profiles = list(profiles)
+    for profile in profiles:
+        if profile.collection_date is None:
+            profile.collection_date = collection_date
+        if profile.email is not None:
+            profile.email_hash = hash_email(profile.email)
+            profile.email = None
+    logger.debug(f"Applied GDPR compliance to {len(profiles)} profiles")
+    return profiles
+
+
+def serialize_record(record):
+    """Plain-dict form of a record; dicts pass through unchanged."""
+    return record.serialize() if isinstance(record, Record) else record
+
+
+def json_default(value):
+    """`default` hook for json.dumps so records serialize in their client shape."""
+    if isinstance(value, Record):
+        return value.serialize()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,127 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from .linkedin_profile_scraper import build_linkedin_url
+from .driver_pool import session_key
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FRESH = 'hit'
+STALE = 'stale'
+MISS = 'miss'
+
+
+def canonical_search_key(query_params: Dict, filters: Dict = None, pagination: Dict = None,
+                         cookie: Optional[str] = None) -> str:
+    """
+    Cache key for a search: the URL from build_linkedin_url with parameters
+    sorted, values case- and whitespace-folded and empty values dropped.
+    Pagination options that are set (max_pages, target_count) are part of
+    the key, since they change how many profiles a search returns. So is the
+    li_at session (hashed), since LinkedIn shows each account different
+    results and one account's results must not be served to another.
+    """
+    parts = urlsplit(build_linkedin_url(query_params, filters))
+    params = sorted(
+        (key, ' '.join(value.split()).lower())
+        for key, value in parse_qsl(parts.query, keep_blank_values=False)
+        if value.strip()
+    )
+    params += sorted((f"_{key}", str(value)) for key, value in (pagination or {}).items() if value)
+    if cookie:
+        params.append(('_session', session_key(cookie)))
+    return f"{parts.scheme}://{parts.netloc}{parts.path}?{urlencode(params)}"
+
+
+class SearchResultCache:
+    """
+    Size-bounded LRU of scraped search results. Entries are fresh for
+    ttl_seconds, then served stale for up to stale_seconds more while a
+    background refresh replaces them.
+    """
+
+    def __init__(self, max_entries: int = 200, ttl_seconds: int = 900, stale_seconds: int = 3600,
+                 refresh_workers: int = 1):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._entries: "OrderedDict[str, Tuple[List[Dict], float]]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='search-refresh')
+        self.stats = {FRESH: 0, STALE: 0, MISS: 0, 'refreshes': 0, 'refresh_failures': 0}
+
+    def lookup(self, key: str) -> Tuple[Optional[List[Dict]], str]:
+        """Return (profiles, state) where state is 'hit', 'stale' or 'miss'."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats[MISS] += 1
+                return None, MISS
+            profiles, stored_at = entry
+            age = now - stored_at
+            if age >= self.ttl_seconds + self.stale_seconds:
+                del self._entries[key]
+                self.stats[MISS] += 1
+                return None, MISS
+            self._entries.move_to_end(key)
+            state = FRESH if age < self.ttl_seconds else STALE
+            self.stats[state] += 1
+            return [dict(profile) for profile in profiles], state
+
+    def set(self, key: str, profiles: List[Dict]) -> None:
+        with self._lock:
+            self._entries[key] = ([dict(profile) for profile in profiles], time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def refresh_async(self, key: str, scrape_fn: Callable[[], Optional[List[Dict]]]) -> bool:
+        """
+        Re-run scrape_fn in the background and store its result; a scrape_fn
+        returning None leaves the entry as it is. Returns False if a refresh
+        for this key is already running.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+        self._executor.submit(self._refresh, key, scrape_fn)
+        return True
+
+    def _refresh(self, key: str, scrape_fn: Callable[[], Optional[List[Dict]]]) -> None:
+        try:
+            profiles = scrape_fn()
+            if profiles:
+                self.set(key, profiles)
+            with self._lock:
+                self.stats['refreshes'] += 1
+        except Exception as e:
+            logger.error(f"Background refresh of cached search failed: {str(e)}")
+            with self._lock:
+                self.stats['refresh_failures'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+search_cache = SearchResultCache(
+    max_entries=int(os.getenv('SEARCH_CACHE_SIZE', '200')),
+    ttl_seconds=int(os.getenv('SEARCH_CACHE_TTL_SECONDS', '900')),
+    stale_seconds=int(os.getenv('SEARCH_CACHE_STALE_SECONDS', '3600'))
+)
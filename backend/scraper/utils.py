@@ -1,26 +1,44 @@
-import re
-import dns.resolver
 import logging
 import csv
-from datetime import datetime
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Optional
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
+from .email_validator import validate_email  # noqa: F401  (kept importable from utils)
+from .records import Profile, apply_gdpr
+from .browser_profiles import resolve_profile, chrome_arguments, chrome_prefs, apply_request_blocking
 
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def init_selenium_driver() -> webdriver.Chrome:
+@lru_cache(maxsize=1)
+def get_chromedriver_path() -> str:
+    """
+    Resolve the chromedriver binary once per process instead of on every launch.
+    """
+    return ChromeDriverManager().install()
+
+def init_selenium_driver(profile: Optional[str] = None) -> webdriver.Chrome:
     """
     Initialize Selenium WebDriver with options and WebDriver Manager.
+    profile picks an entry of browser_profiles.BROWSER_PROFILES ("full" or
+    "lean"), defaulting to BROWSER_PROFILE.
     """
+    profile = resolve_profile(profile)
     chrome_options = Options()
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    chrome_options.add_argument("--start-maximized")
+    for argument in chrome_arguments(profile):
+        chrome_options.add_argument(argument)
+    prefs = chrome_prefs(profile)
+    if prefs:
+        chrome_options.add_experimental_option("prefs", prefs)
     chrome_options.add_argument("--disable-webrtc")  # Disable WebRTC
     chrome_options.add_argument("--disable-ipv6")    # Disable IPv6
     chrome_options.add_argument("--log-level=3")
@@ -28,17 +46,33 @@ def init_selenium_driver() -> webdriver.Chrome:
     chrome_options.add_argument("--silent-debugger-extension-api")
     chrome_options.add_argument("--disable-media-stream")
 
+    driver = webdriver.Chrome(service=Service(get_chromedriver_path()), options=chrome_options)
+    apply_request_blocking(driver, profile)
+    return driver
 
-    return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-
-def login_with_cookie(driver, cookie: str):
+def login_with_cookie(driver, cookie: str) -> bool:
     """
     Log in to LinkedIn using cookies.
+    Returns True if login successful, False otherwise.
+    """
+    try:
+        driver.get("https://www.linkedin.com/")
+        driver.add_cookie({"name": "li_at", "value": cookie})
+        driver.refresh()
+        WebDriverWait(driver, 30).until(
+            EC.presence_of_element_located((By.CLASS_NAME, "global-nav__primary-link"))
+        )
+        logger.info("Logged in to LinkedIn using cookies")
+        return True
+    except Exception as e:
+        logger.error(f"Login failed: {str(e)}")
+        return False
+
+def progress_fields(event: Dict) -> Dict:
+    """
+    The payload of a scraper progress event, without its type tag.
     """
-    driver.get("https://www.linkedin.com/")
-    driver.add_cookie({"name": "li_at", "value": cookie})
-    driver.refresh()
-    logger.info("Logged in to LinkedIn using cookies")
+    return {k: v for k, v in event.items() if k != 'type'}
 
 def build_linkedin_url(query_params: Dict) -> str:
     """
@@ -48,31 +82,6 @@ def build_linkedin_url(query_params: Dict) -> str:
     params = [f"{key}={value}" for key, value in query_params.items() if value]
     return base_url + "&".join(params)
 
-def validate_email(email: str, verify_dns: bool = True) -> bool:
-    """
-    Validate email format and optionally verify domain using DNS lookup.
-    """
-    regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'  # Removed extra backslash
-    if not re.match(regex, email):
-        logger.info(f"Email {email} failed regex validation")
-        return False
-
-    if verify_dns:
-        try:
-            domain = email.split('@')[1]
-            resolver = dns.resolver.Resolver()
-            resolver.timeout = 2
-            resolver.lifetime = 2
-            resolver.resolve(domain, 'MX')
-            logger.info(f"Email {email} passed validation with DNS verification")
-            return True
-        except Exception as e:
-            logger.info(f"Email {email} failed DNS validation: {str(e)}")
-            return False
-
-    logger.info(f"Email {email} passed basic validation (DNS verification skipped)")
-    return True
-
 def export_to_csv(profiles: List[Dict], filename: str) -> None:
     """
     Export profiles to CSV format with error handling.
@@ -92,24 +101,12 @@ def export_to_csv(profiles: List[Dict], filename: str) -> None:
 def ensure_gdpr_compliance(profile_data: Dict) -> Dict:
     """
     Ensure GDPR compliance for scraped data.
+    Single-record form of records.apply_gdpr, returning the compliant dict.
     """
     try:
-        gdpr_compliant_data = {
-            'data_source': profile_data.get('data_source', 'LinkedIn Public Profile'),
-            'collection_date': profile_data.get('collection_date', datetime.now().isoformat()),
-            'legal_basis': 'Legitimate Interest',
-            'retention_period': '30 days',
-            'profile_data': {k: v for k, v in profile_data.items() if k not in ['collection_date', 'data_source']}
-        }
-
-        if 'email' in profile_data:
-            import hashlib
-            email_hash = hashlib.sha256(profile_data['email'].encode()).hexdigest()
-            gdpr_compliant_data['profile_data']['email_hash'] = email_hash
-            del gdpr_compliant_data['profile_data']['email']
-
-        logger.info("Successfully applied GDPR compliance transformations")
-        return gdpr_compliant_data
+        profile = Profile.from_dict(profile_data)
+        apply_gdpr([profile])
+        return profile.to_gdpr_dict()
     except Exception as e:
         logger.error(f"Failed to ensure GDPR compliance: {str(e)}")
-        raise
\ No newline at end of file
+        raise
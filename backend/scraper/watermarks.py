@@ -0,0 +1,62 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterable
+from .dedup import DEDUP_STATE_DIR
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class WatermarkStore:
+    """
+    Per-post record of which comments have been scraped, used by incremental
+    comment scrapes. One JSON file per post URL.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self, post_url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(post_url.encode()).hexdigest() + '.json')
+
+    def load(self, post_url: str) -> Dict:
+        """
+        The watermark for a post: seen comment identities, the total comment
+        count and when it was last updated (epoch seconds). LinkedIn only shows
+        relative comment times ('2h'), so no comment time is kept.
+        """
+        try:
+            with open(self._path(post_url), encoding='utf-8') as f:
+                data = json.load(f)
+            data['seen'] = set(data.get('seen', []))
+            return data
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read watermark for {post_url}: {str(e)}")
+        return {'post_url': post_url, 'seen': set(), 'total': 0, 'updated_at': None}
+
+    def update(self, post_url: str, new_keys: Iterable[str]) -> Dict:
+        """Merge newly seen comment identities into the post's watermark and persist it."""
+        with self._lock:
+            watermark = self.load(post_url)
+            watermark['seen'].update(new_keys)
+            watermark['total'] = len(watermark['seen'])
+            watermark['updated_at'] = time.time()
+
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(post_url)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(dict(watermark, seen=sorted(watermark['seen'])), f)
+            os.replace(tmp_path, path)
+        return watermark
+
+
+watermark_store = WatermarkStore(os.path.join(DEDUP_STATE_DIR, 'watermarks'))
@@ -0,0 +1,341 @@
+import io
+import os
+import csv
+import json
+import tempfile
+import unittest
+from unittest import mock
+import app as app_module
+from scraper.dedup import DedupIndex, profile_key
+from scraper.result_cache import SearchResultCache, canonical_search_key
+from database.record_store import RecordStore
+from database import firebase_client
+from database.memory_firestore import MemoryFirestore
+
+
+def temp_record_store(test):
+    tmp = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp.cleanup)
+    return RecordStore(os.path.join(tmp.name, 'records.sqlite3'))
+
+
+def fake_profile_events(query_params, cookie, filters=None, dedup_index=None, deadline=None, browser_profile=None,
+                        fetch_backend=None, max_pages=None, target_count=None, priority=None):
+    dedup_index = dedup_index or DedupIndex(profile_key)
+    for page in (1, 2):
+        new_profiles = dedup_index.add_all([
+            {'name': f'User {page}', 'title': 'Engineer', 'location': 'Berlin',
+             'profile_url': f'https://www.linkedin.com/in/user-{page}'}
+        ])
+        for profile in new_profiles:
+            yield {'type': 'profile', 'data': profile}
+        yield {'type': 'progress', 'pages_done': page, 'new_profiles': len(new_profiles),
+               'profiles_found': len(dedup_index)}
+    yield {'type': 'pagination', 'stop_reason': 'exhausted', 'pages_loaded': 2, 'profiles_found': len(dedup_index)}
+
+
+class TestSearchRoutes(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        patches = [
+            mock.patch.object(app_module, 'process_query', return_value={'title': 'Engineer'}),
+            mock.patch.object(app_module, 'iter_linkedin_profiles', side_effect=fake_profile_events),
+            mock.patch.object(app_module, 'save_to_firebase'),
+            mock.patch.object(app_module.DedupIndex, 'save'),
+            mock.patch.object(app_module, 'search_cache', SearchResultCache()),
+            mock.patch.object(app_module, 'record_store', temp_record_store(self)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_search_requires_query(self):
+        response = self.client.post('/search', json={'cookies': 'c'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_sync_search(self):
+        response = self.client.post('/search', json={'query': 'engineers', 'cookies': 'c'})
+        body = response.get_json()
+        self.assertEqual(body['profile_count'], 2)
+        self.assertEqual(body['profiles'][0]['profile_data']['name'], 'User 1')
+        self.assertEqual(body['cache'], 'miss')
+
+    def test_repeated_search_is_served_from_cache(self):
+        payload = {'query': 'engineers', 'cookies': 'c'}
+        self.client.post('/search', json=payload)
+        body = self.client.post('/search', json=payload).get_json()
+        self.assertEqual(body['cache'], 'hit')
+        self.assertEqual(body['profile_count'], 2)
+        self.assertEqual(app_module.iter_linkedin_profiles.call_count, 1)
+
+        body = self.client.post('/search', json=dict(payload, refresh=True)).get_json()
+        self.assertEqual(body['cache'], 'refresh')
+        self.assertEqual(app_module.iter_linkedin_profiles.call_count, 2)
+
+    def test_gdpr_is_applied_per_page(self):
+        def one_page(query_params, cookie, filters=None, dedup_index=None, **kwargs):
+            for i in range(3):
+                yield {'type': 'profile', 'data': {'name': f'User {i}', 'profile_url': f'https://www.linkedin.com/in/u{i}'}}
+            yield {'type': 'progress', 'pages_done': 1, 'new_profiles': 3, 'profiles_found': 3}
+            yield {'type': 'pagination', 'stop_reason': 'exhausted', 'pages_loaded': 1, 'profiles_found': 3}
+
+        with mock.patch.object(app_module, 'iter_linkedin_profiles', side_effect=one_page), \
+                mock.patch.object(app_module, 'apply_gdpr', wraps=app_module.apply_gdpr) as gdpr:
+            body = self.client.post('/search', json={'query': 'engineers', 'cookies': 'c'}).get_json()
+        self.assertEqual(body['profile_count'], 3)
+        self.assertEqual([len(call[0][0]) for call in gdpr.call_args_list if call[0][0]], [3])
+
+    def test_cache_is_per_session(self):
+        self.client.post('/search', json={'query': 'engineers', 'cookies': 'c'})
+        body = self.client.post('/search', json={'query': 'engineers', 'cookies': 'other'}).get_json()
+        self.assertEqual(body['cache'], 'miss')
+
+    def test_search_ended_by_page_error_is_not_cached(self):
+        def page_error(*args, **kwargs):
+            events = list(fake_profile_events(*args, **kwargs))[:-1]
+            return events + [{'type': 'pagination', 'stop_reason': 'error', 'pages_loaded': 2}]
+
+        payload = {'query': 'engineers', 'cookies': 'c'}
+        with mock.patch.object(app_module, 'iter_linkedin_profiles', side_effect=page_error):
+            self.assertEqual(self.client.post('/search', json=payload).get_json()['profile_count'], 2)
+        self.assertEqual(self.client.post('/search', json=payload).get_json()['cache'], 'miss')
+
+    def test_stale_refresh_is_stored(self):
+        app_module.search_cache.ttl_seconds = 0
+        payload = {'query': 'engineers', 'cookies': 'c'}
+        self.client.post('/search', json=payload)
+        app_module.record_store.save_profiles = mock.Mock(wraps=app_module.record_store.save_profiles)
+        self.assertEqual(self.client.post('/search', json=payload).get_json()['cache'], 'stale')
+        app_module.search_cache._executor.shutdown(wait=True)
+        self.assertEqual(app_module.iter_linkedin_profiles.call_count, 2)
+        app_module.record_store.save_profiles.assert_called_once()
+        self.assertEqual(len(app_module.record_store.save_profiles.call_args[0][0]), 2)
+
+    def test_deadline_returns_partial_results_uncached(self):
+        def cut_short(query_params, cookie, filters=None, dedup_index=None, deadline=None, browser_profile=None,
+                      fetch_backend=None, max_pages=None, target_count=None, priority=None):
+            events = list(fake_profile_events(query_params, cookie))[:2]
+            return events + [deadline.event('search_pages')]
+
+        payload = {'query': 'engineers', 'cookies': 'c', 'timeout': 5}
+        with mock.patch.object(app_module, 'iter_linkedin_profiles', side_effect=cut_short):
+            body = self.client.post('/search', json=payload).get_json()
+        self.assertTrue(body['partial'])
+        self.assertEqual(body['profile_count'], 1)
+        self.assertEqual(self.client.post('/search', json=payload).get_json()['cache'], 'miss')
+
+        response = self.client.post('/search', json=dict(payload, timeout='soon'))
+        self.assertEqual(response.status_code, 400)
+
+    def test_pagination_options(self):
+        payload = {'query': 'engineers', 'cookies': 'c'}
+        self.client.post('/search', json=payload)
+        body = self.client.post('/search', json=dict(payload, target_count=200, max_pages=20)).get_json()
+        # A bigger target is a different search, not a cache hit of the default one
+        self.assertEqual(body['cache'], 'miss')
+        self.assertEqual(app_module.iter_linkedin_profiles.call_args[1]['target_count'], 200)
+        self.assertEqual(self.client.post('/search', json=dict(payload, max_pages=0)).status_code, 400)
+
+    def test_export_csv_link(self):
+        body = self.client.post('/search', json={'query': 'engineers', 'cookies': 'c', 'export_csv': True}).get_json()
+        response = self.client.get(body['export_url'] + '&columns=profile_data.name,legal_basis')
+        self.assertEqual(response.mimetype, 'text/csv')
+        self.assertEqual(response.get_data(as_text=True).splitlines(),
+                         ['profile_data.name,legal_basis', 'User 1,Legitimate Interest', 'User 2,Legitimate Interest'])
+
+    def test_ndjson_stream(self):
+        response = self.client.post('/search', json={'query': 'engineers', 'cookies': 'c', 'stream': True})
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([e['type'] for e in events],
+                         ['query', 'cache', 'profile', 'progress', 'profile', 'progress', 'pagination', 'summary'])
+        self.assertEqual(events[-1]['profile_count'], 2)
+
+    def test_sse_stream(self):
+        response = self.client.post('/search', json={'query': 'engineers', 'cookies': 'c', 'stream': True},
+                                    headers={'Accept': 'text/event-stream'})
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        body = response.get_data(as_text=True)
+        self.assertIn('event: profile\ndata: ', body)
+        self.assertTrue(body.rstrip().split('\n\n')[-1].startswith('event: summary'))
+
+
+def fake_bulk_events(queries, cookie, filters=None, deadline=None, browser_profile=None, max_pages=None,
+                     target_count=None, priority=None):
+    # Search i finds users i and i + 1, so neighbouring searches overlap by one profile
+    for index in range(len(queries)):
+        for user in (index, index + 1):
+            yield {'type': 'profile', 'search': index,
+                   'data': {'name': f'User {user}', 'profile_url': f'https://www.linkedin.com/in/user-{user}'}}
+        yield {'type': 'progress', 'search': index, 'pages_done': 1, 'new_profiles': 2, 'profiles_found': 2}
+        yield {'type': 'pagination', 'search': index, 'stop_reason': 'exhausted', 'pages_loaded': 1,
+               'profiles_found': 2}
+
+
+class TestBulkSearch(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        titles = {'engineers': 'Engineer', 'software engineers': 'Engineer', 'designers': 'Designer'}
+        patches = [
+            mock.patch.object(app_module, 'process_query', side_effect=lambda q, deadline=None: {'title': titles[q]}),
+            mock.patch.object(app_module, 'iter_profiles_for_queries', side_effect=fake_bulk_events),
+            mock.patch.object(app_module, 'save_to_firebase'),
+            mock.patch.object(app_module.DedupIndex, 'save'),
+            mock.patch.object(app_module, 'search_cache', SearchResultCache()),
+            mock.patch.object(app_module, 'record_store', temp_record_store(self)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_collapses_queries_and_returns_union(self):
+        payload = {'queries': ['engineers', 'software engineers', 'designers'], 'cookies': 'c'}
+        body = self.client.post('/search/bulk', json=payload).get_json()
+        self.assertEqual((body['query_count'], body['search_count'], body['profile_count']), (3, 2, 3))
+        self.assertEqual([r['profile_count'] for r in body['results']], [2, 2, 2])
+        self.assertEqual(body['results'][0]['profiles'], body['results'][1]['profiles'])
+        # Both searches ran on one browser session
+        scraped_queries = app_module.iter_profiles_for_queries.call_args[0][0]
+        self.assertEqual(scraped_queries, [{'title': 'Engineer'}, {'title': 'Designer'}])
+
+        body = self.client.post('/search/bulk', json=payload).get_json()
+        self.assertEqual([r['cache'] for r in body['results']], ['hit', 'hit', 'hit'])
+        self.assertEqual(app_module.iter_profiles_for_queries.call_count, 1)
+
+    def test_failed_login_is_an_error(self):
+        def login_failed(queries, cookie, filters=None, **kwargs):
+            yield {'type': 'login_failed', 'search': 0, 'message': 'Login with the provided li_at cookie failed'}
+
+        payload = {'queries': ['engineers', 'designers'], 'cookies': 'expired'}
+        with mock.patch.object(app_module, 'iter_profiles_for_queries', side_effect=login_failed):
+            response = self.client.post('/search/bulk', json=payload)
+        self.assertEqual(response.status_code, 401)
+        body = response.get_json()
+        self.assertEqual((body['status'], body['error'], body['partial']), ('error', 'Login failed', False))
+        self.assertEqual([r['error'] for r in body['results']], ['login_failed', 'login_failed'])
+        self.assertEqual(len(app_module.search_cache), 0)
+
+    def test_requires_queries(self):
+        self.assertEqual(self.client.post('/search/bulk', json={'cookies': 'c', 'queries': []}).status_code, 400)
+        self.assertEqual(self.client.post('/search/bulk', json={'cookies': 'c', 'queries': ['ok', 3]}).status_code,
+                         400)
+
+
+class TestProfileQuery(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        self.store = temp_record_store(self)
+        patches = [
+            mock.patch.object(app_module, 'process_query', return_value={'title': 'Engineer'}),
+            mock.patch.object(app_module, 'iter_linkedin_profiles', side_effect=fake_profile_events),
+            mock.patch.object(app_module, 'save_to_firebase'),
+            mock.patch.object(app_module.DedupIndex, 'save'),
+            mock.patch.object(app_module, 'search_cache', SearchResultCache()),
+            mock.patch.object(app_module, 'record_store', self.store),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_scraped_profiles_are_queryable(self):
+        self.client.post('/search', json={'query': 'engineers', 'cookies': 'c'})
+        body = self.client.get('/profiles/query?title=engineer&location=BERLIN&sort=name&order=asc').get_json()
+        self.assertEqual([p['profile_data']['name'] for p in body['profiles']], ['User 1', 'User 2'])
+        self.assertEqual(body['profiles'][0]['legal_basis'], 'Legitimate Interest')
+        self.assertIsNone(body['next_cursor'])
+
+        body = self.client.get('/profiles/query?profile_url=https://linkedin.com/in/USER-2/').get_json()
+        self.assertEqual(body['profile_count'], 1)
+
+    def test_replica_can_be_turned_off(self):
+        with mock.patch.object(app_module, 'FIRESTORE_REPLICA', False):
+            self.client.post('/search', json={'query': 'engineers', 'cookies': 'c'})
+        app_module.save_to_firebase.assert_not_called()
+        self.assertEqual(self.store.stats()['profiles'], 2)
+        response = self.client.get('/export?format=csv&columns=profile_data.name')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual((lines[0], sorted(lines[1:])), ('profile_data.name', ['User 1', 'User 2']))
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/profiles/query?sort=email').status_code, 400)
+        self.assertEqual(self.client.get('/profiles/query?order=sideways').status_code, 400)
+        self.assertEqual(self.client.get('/profiles/query?page_size=0').status_code, 400)
+        self.assertEqual(self.client.get('/profiles/query?cursor=nope').status_code, 400)
+
+
+class TestStoreExport(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        self.db = MemoryFirestore()
+        collection = self.db.collection('linkedin_profiles')
+        for i in range(3):
+            profile_data = {'name': f'User {i}', 'profile_url': f'https://www.linkedin.com/in/user-{i}'}
+            if i == 2:
+                profile_data['company'] = 'Acme'
+            collection.document(f'doc-{i}').set({'collection_date': f'2026-10-0{i + 1}T00:00:00',
+                                                'legal_basis': 'Legitimate Interest', 'profile_data': profile_data})
+        patch = mock.patch.object(app_module, 'iter_profiles',
+                                  lambda **filters: firebase_client.iter_profiles(db=self.db, **filters))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_firestore_export(self):
+        response = self.client.get('/export?source=firestore&format=csv')
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual([row['profile_data.name'] for row in rows], ['User 0', 'User 1', 'User 2'])
+        # A field missing from the first profile is still exported
+        self.assertEqual(rows[2]['profile_data.company'], 'Acme')
+
+    def test_store_error_is_reported_before_the_download_starts(self):
+        def broken(**filters):
+            raise RuntimeError('The query requires an index')
+            yield
+
+        with mock.patch.object(app_module, 'iter_profiles', broken):
+            response = self.client.get('/export?source=firestore&format=csv')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.get_json()['error'], 'The query requires an index')
+
+
+class TestEmailValidation(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+
+    def test_verify_dns_must_be_a_boolean(self):
+        response = self.client.post('/emails/validate', json={'emails': ['a@example.com'], 'verify_dns': 'no'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('verify_dns', response.get_json()['message'])
+
+    def test_verify_dns_is_passed_on(self):
+        with mock.patch.object(app_module, 'validate_emails_bulk', return_value=[]) as validate:
+            response = self.client.post('/emails/validate', json={'emails': ['a@example.com'], 'verify_dns': False})
+        self.assertEqual(response.status_code, 200)
+        validate.assert_called_once_with(['a@example.com'], verify_dns=False)
+
+
+class TestSearchResultCache(unittest.TestCase):
+    def test_canonical_key_ignores_order_case_and_blanks(self):
+        self.assertEqual(
+            canonical_search_key({'title': 'Engineer', 'location': ' Berlin ', 'company': ''}),
+            canonical_search_key({'location': 'berlin', 'title': 'ENGINEER'})
+        )
+
+    def test_stale_entry_is_served_and_refreshed(self):
+        cache = SearchResultCache(ttl_seconds=0, stale_seconds=60)
+        cache.set('k', [{'name': 'old'}])
+        profiles, state = cache.lookup('k')
+        self.assertEqual((profiles, state), ([{'name': 'old'}], 'stale'))
+        cache.refresh_async('k', lambda: [{'name': 'new'}])
+        cache._executor.shutdown(wait=True)
+        self.assertEqual(cache.lookup('k')[0], [{'name': 'new'}])
+
+    def test_size_bound(self):
+        cache = SearchResultCache(max_entries=1)
+        cache.set('a', [{}])
+        cache.set('b', [{}])
+        self.assertEqual(cache.lookup('a'), (None, 'miss'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
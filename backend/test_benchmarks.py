@@ -0,0 +1,28 @@
+import json
+import unittest
+from benchmarks.fake_driver import FixtureDriver
+from benchmarks.fixtures import comment_thread_page
+from benchmarks.run import BENCHMARKS, run_benchmarks, compare
+from scraper.extraction import extract_records_from_driver
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_fixture_driver_serves_only_new_cards(self):
+        driver = FixtureDriver({}, default_page=comment_thread_page(5))
+        driver.get('https://www.linkedin.com/posts/x')
+        self.assertEqual(len(extract_records_from_driver(driver, 'comment', only_new=True)), 5)
+        self.assertEqual(extract_records_from_driver(driver, 'comment', only_new=True), [])
+
+    def test_report_is_json_and_covers_every_benchmark(self):
+        report = json.loads(json.dumps(run_benchmarks(sizes=[5], repeat=1)))
+        self.assertEqual({r['name'] for r in report['results']}, set(BENCHMARKS))
+        self.assertIn('commit', report['meta'])
+
+    def test_compare_flags_slowdowns(self):
+        baseline = {'results': [{'name': 'csv_export', 'size': 10, 'median_seconds': 1.0}]}
+        current = {'results': [{'name': 'csv_export', 'size': 10, 'median_seconds': 1.5}]}
+        self.assertTrue(compare(baseline, current)[0]['regression'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import time
+import tempfile
+import unittest
+from jobs.checkpoints import CheckpointStore, checkpoint_context
+from jobs.job_manager import JobManager, SUCCEEDED, FAILED
+from scraper import linkedin_profile_scraper as profile_scraper
+
+
+class FlakyFetcher:
+    """Ten new profiles per page; raises on the pages listed in fail_on, once each."""
+
+    def __init__(self, fail_on=(), always_fail_on=()):
+        self.fail_on = set(fail_on)
+        self.always_fail_on = set(always_fail_on)
+        self.fetched = []
+
+    def fetch_records(self, url, kind):
+        page = int(url.split('&page=')[1]) if '&page=' in url else 1
+        if page in self.fail_on or page in self.always_fail_on:
+            self.fail_on.discard(page)
+            raise RuntimeError('chrome not reachable')
+        self.fetched.append(page)
+        return [{'name': f'User {i}', 'profile_url': f'https://www.linkedin.com/in/user-{i}'}
+                for i in range((page - 1) * 10, page * 10)]
+
+
+def search(fetcher, progress_callback=None):
+    events = list(profile_scraper.iter_profiles_with_fetcher(fetcher, {'title': 'Engineer'}, max_pages=4))
+    return {'profiles': [e['data'].to_dict() for e in events if e['type'] == 'profile'],
+            'resumed': [e for e in events if e['type'] == 'resume']}
+
+
+def wait_for(job, timeout=5):
+    deadline = time.time() + timeout
+    while job.status not in (SUCCEEDED, FAILED) and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+class TestCheckpoints(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = CheckpointStore(os.path.join(tmp.name, 'checkpoints.sqlite3'))
+
+    def test_store_is_created_on_first_use(self):
+        self.assertFalse(os.path.exists(self.store.path))
+        self.assertEqual(self.store.stats(), {'jobs': 0, 'scopes': 0, 'records': 0})
+        self.assertEqual(os.stat(self.store.path).st_mode & 0o777, 0o600)
+
+    def test_records_are_appended_per_checkpoint(self):
+        self.store.save('job', 'scope', 'https://x/1', 1, [('a', {'name': 'A'}), ('b', {'name': 'B'})])
+        self.store.save('job', 'scope', 'https://x/2', 2, [('b', {'name': 'B'}), ('c', {'name': 'C'})], {'k': 1})
+        saved = self.store.load('job', 'scope')
+        self.assertEqual((saved['url'], saved['position'], saved['state']), ('https://x/2', 2, {'k': 1}))
+        self.assertEqual(saved['seen'], ['a', 'b', 'c'])
+        self.assertIsNone(self.store.load('job', 'other'))
+        self.store.delete_job('job')
+        self.assertIsNone(self.store.load('job', 'scope'))
+
+    def test_search_resumes_after_last_checkpointed_page(self):
+        fetcher = FlakyFetcher(fail_on={3})
+        with checkpoint_context(self.store, 'job'):
+            with self.assertRaises(RuntimeError):
+                search(fetcher)
+            result = search(fetcher)
+        # Pages 1 and 2 came from the checkpoint, not the site
+        self.assertEqual(fetcher.fetched, [1, 2, 3, 4])
+        self.assertEqual(result['resumed'][0]['restored'], 20)
+        self.assertEqual(len(result['profiles']), 40)
+
+    def test_failed_job_is_retried_from_checkpoint(self):
+        manager = JobManager(max_workers=1, store=self.store, max_attempts=2, retry_delay=0)
+        fetcher = FlakyFetcher(fail_on={2})
+        job = wait_for(manager.submit('search', lambda data, progress_callback=None: search(fetcher), {'q': 1}))
+        self.assertEqual(job.status, SUCCEEDED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(len(job.result['profiles']), 40)
+        self.assertEqual(fetcher.fetched, [1, 2, 3, 4])
+        self.assertEqual(self.store.stats(), {'jobs': 0, 'scopes': 0, 'records': 0})
+
+    def test_last_attempt_returns_checkpointed_profiles(self):
+        manager = JobManager(max_workers=1, store=self.store, max_attempts=2, retry_delay=0)
+        fetcher = FlakyFetcher(always_fail_on={3})
+        job = wait_for(manager.submit('search', lambda data, progress_callback=None: search(fetcher), {'q': 1}))
+        self.assertEqual((job.status, job.attempts), (SUCCEEDED, 2))
+        self.assertEqual(len(job.result['profiles']), 20)
+        self.assertEqual(fetcher.fetched, [1, 2])
+
+    def test_failed_job_keeps_checkpoint_but_is_not_resumed(self):
+        def work(data, progress_callback=None):
+            with self.assertRaises(RuntimeError):
+                search(FlakyFetcher(always_fail_on={2}))
+            raise RuntimeError('login failed')
+
+        manager = JobManager(max_workers=1, store=self.store, max_attempts=2, retry_delay=0)
+        job = wait_for(manager.submit('search', work, {'q': 1}))
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(self.store.stats()['records'], 10)
+        self.assertEqual(self.store.unfinished_jobs(), [])
+        manager.cancel(job.id)
+        self.assertEqual(self.store.stats(), {'jobs': 0, 'scopes': 0, 'records': 0})
+
+    def test_job_out_of_attempts_is_not_resumed(self):
+        self.store.save_job('crashy', 'search', [{'query': 'engineers'}], 'queued')
+        for _ in range(3):
+            self.store.mark_attempt('crashy', 'running')
+        calls = []
+        manager = JobManager(max_workers=1, store=self.store, max_attempts=3)
+        job, = manager.resume({'search': lambda data, progress_callback=None: calls.append(data)})
+        self.assertEqual((job.status, job.attempts, calls), (FAILED, 3, []))
+        self.assertEqual(manager.get('crashy'), job)
+        self.assertEqual(self.store.unfinished_jobs(), [])
+
+    def test_only_one_process_resumes(self):
+        self.store.save_job('left-over', 'search', [{'query': 'engineers'}], 'queued')
+        other = CheckpointStore(self.store.path)
+        self.assertTrue(self.store.claim())
+        self.assertFalse(other.claim())
+        self.assertEqual(JobManager(store=other).resume({'search': lambda data, progress_callback=None: None}), [])
+
+    def test_unfinished_jobs_resume_after_restart(self):
+        self.store.save_job('left-over', 'search', [{'query': 'engineers', 'cookies': 'secret'}], 'running')
+        calls = []
+        manager = JobManager(max_workers=1, store=self.store)
+        jobs = manager.resume({'search': lambda data, progress_callback=None: calls.append(data) or {'ok': True}})
+        job = wait_for(jobs[0])
+        self.assertEqual((job.id, job.status), ('left-over', SUCCEEDED))
+        self.assertEqual(job.params, {'query': 'engineers'})
+        self.assertEqual(calls[0]['cookies'], 'secret')
+        self.assertEqual(self.store.unfinished_jobs(), [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import threading
+import unittest
+from contextlib import contextmanager
+from unittest import mock
+from selenium.common.exceptions import InvalidSessionIdException
+import app as app_module
+from scraper import comment_batch
+from scraper.records import Comment
+from database.record_store import RecordStore
+
+
+class FakePool:
+    """Counts checkouts; drivers are plain ids. A driver failure retires the driver."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.discarded = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def checkout(self, cookie, timeout=None, profile=None):
+        with self.lock:
+            self.checkouts += 1
+            driver = self.checkouts
+        try:
+            yield driver
+        except InvalidSessionIdException:
+            self.discarded.append(driver)
+            raise
+
+
+def fake_comments(driver, url, dedup_index=None, stop_at_known=False, deadline=None, pacer=None):
+    if url.endswith('broken'):
+        raise ValueError('page layout changed')
+    if url.endswith('crash'):
+        raise InvalidSessionIdException('invalid session id')
+    new = dedup_index.add_all([Comment(name=f'{url} {i}', comment='hi', timestamp='1h', likes=0) for i in range(3)])
+    for comment in new:
+        yield {'type': 'comment', 'data': comment}
+    yield {'type': 'stats', 'iterations': 1, 'wait_seconds': 0.0, 'work_seconds': 0.0, 'total_seconds': 0.0}
+
+
+class TestCommentBatch(unittest.TestCase):
+    def setUp(self):
+        self.pool = FakePool()
+        patches = [
+            mock.patch.object(comment_batch, 'driver_pool', self.pool),
+            mock.patch.object(comment_batch, 'iter_comments_with_driver', fake_comments),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_dedupes_urls_and_reuses_sessions(self):
+        urls = [f'https://www.linkedin.com/posts/p{i}' for i in range(10)]
+        urls += ['https://www.linkedin.com/posts/p0/?utm_source=share', 'https://www.linkedin.com/posts/p1#comments']
+        progress = []
+        results = comment_batch.scrape_comment_batch(urls, 'c', sessions=2, max_posts_per_session=5,
+                                                     progress_callback=progress.append)
+        self.assertEqual([r['url'] for r in results], urls[:10])
+        self.assertTrue(all(r['status'] == 'success' and r['comment_count'] == 3 for r in results))
+        self.assertLessEqual(self.pool.checkouts, 4)
+        self.assertEqual(progress[-1], {'posts_done': 10, 'posts_total': 10, 'comments_found': 30})
+
+    def test_failures_are_isolated_per_post(self):
+        urls = ['https://www.linkedin.com/posts/broken', 'https://www.linkedin.com/posts/crash',
+                'https://www.linkedin.com/posts/ok']
+        results = {r['url']: r for r in comment_batch.scrape_comment_batch(urls, 'c', sessions=1)}
+        self.assertEqual(results[urls[0]]['status'], 'error')
+        self.assertEqual(results[urls[1]]['status'], 'error')
+        self.assertEqual(results[urls[2]]['status'], 'success')
+        # Only the browser that crashed was thrown away
+        self.assertEqual(len(self.pool.discarded), 1)
+        self.assertEqual(self.pool.checkouts, 2)
+
+    def test_batch_route_validates_and_reports(self):
+        client = app_module.app.test_client()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        store = RecordStore(os.path.join(tmp.name, 'records.sqlite3'))
+        patch = mock.patch.object(app_module, 'record_store', store)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.assertEqual(client.post('/comments/batch', json={'cookies': 'c', 'urls': []}).status_code, 400)
+        self.assertEqual(client.post('/comments/batch', json={'cookies': 'c', 'urls': ['https://example.com/x']})
+                         .status_code, 400)
+        body = client.post('/comments/batch', json={
+            'cookies': 'c', 'urls': ['https://www.linkedin.com/posts/a', 'https://www.linkedin.com/posts/a/']
+        }).get_json()
+        self.assertEqual((body['post_count'], body['duplicate_count'], body['comment_count']), (1, 1, 3))
+        self.assertEqual(body['status_counts'], {'success': 1})
+        self.assertEqual(store.stats()['comments'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,186 @@
+import time
+import tempfile
+import unittest
+from contextlib import contextmanager
+from unittest import mock
+from scraper import linkedin_comment_scraper as comment_scraper
+from scraper.extraction import EXTRACTION_SCRIPT
+from scraper.watermarks import WatermarkStore
+from scraper.rate_scheduler import RateScheduler
+from jobs.deadline import Deadline
+
+
+class FakeThreadDriver:
+    """Simulates a comment thread that loads batch_size more comments per click after load_delay seconds."""
+
+    def __init__(self, total, batch_size=10, load_delay=0.05, newest_first_offset=0, sortable=True):
+        # Comment i is the i-th newest; newest_first_offset shifts ids to simulate newer comments
+        self.offset = newest_first_offset
+        # The sort dropdown renders its options a moment after the toggle is clicked
+        self.sortable = sortable
+        self.dropdown_at = None
+        self.sorted = False
+        self.total = total
+        self.batch_size = batch_size
+        self.load_delay = load_delay
+        self.loaded = 0
+        self.read = 0
+        self.pending_until = None
+
+    def get(self, url):
+        self.loaded = min(self.batch_size, self.total)
+
+    def _settle(self):
+        if self.pending_until and time.time() >= self.pending_until:
+            self.loaded = min(self.loaded + self.batch_size, self.total)
+            self.pending_until = None
+
+    def execute_script(self, script, *args):
+        self._settle()
+        if script == comment_scraper.THREAD_STATE_SCRIPT:
+            return {'count': self.loaded, 'height': 100 * self.loaded,
+                    'load_more': self.loaded < self.total, 'loading': self.pending_until is not None}
+        if script == comment_scraper.EXPAND_SCRIPT:
+            if self.loaded < self.total and self.pending_until is None:
+                self.pending_until = time.time() + self.load_delay
+                return True
+            return False
+        if script == EXTRACTION_SCRIPT:
+            records = [{'name': f'User {i - self.offset}', 'comment': f'Comment {i - self.offset}',
+                        'timestamp': '1h', 'likes': str(i)}
+                       for i in range(self.read, self.loaded)]
+            self.read = self.loaded
+            return records
+        if script == comment_scraper.SORT_TOGGLE_SCRIPT:
+            self.dropdown_at = time.time() + 0.05 if self.sortable else None
+            return self.sortable
+        if script == comment_scraper.SORT_RECENT_OPTION_SCRIPT:
+            if self.dropdown_at is None or time.time() < self.dropdown_at:
+                return False
+            # Re-sorting reloads the thread from its first batch
+            self.sorted = True
+            self.loaded = self.read = 0
+            self.pending_until = time.time() + self.load_delay
+            return True
+        if script == comment_scraper.SORT_IS_RECENT_SCRIPT:
+            return self.sorted
+        raise AssertionError(f"Unexpected script: {script[:40]}")
+
+
+class InfiniteScrollDriver(FakeThreadDriver):
+    """A thread without a "Load more" button: scrolling loads the next batch, and slow_batch loads slowly."""
+
+    def __init__(self, total, slow_batch, slow_delay, **kwargs):
+        super().__init__(total, **kwargs)
+        self.slow_batch = slow_batch
+        self.slow_delay = slow_delay
+
+    def execute_script(self, script, *args):
+        if script == comment_scraper.EXPAND_SCRIPT:
+            self._settle()
+            if self.loaded < self.total and self.pending_until is None:
+                slow = self.loaded // self.batch_size == self.slow_batch
+                self.pending_until = time.time() + (self.slow_delay if slow else self.load_delay)
+            return False
+        state = super().execute_script(script, *args)
+        if script == comment_scraper.THREAD_STATE_SCRIPT:
+            state['load_more'] = False
+        return state
+
+
+class TestCommentScrollLoop(unittest.TestCase):
+    def setUp(self):
+        # Page loads are paced per session; these tests load posts faster than the default budget
+        patch = mock.patch.object(comment_scraper, 'rate_scheduler', RateScheduler(60000, 100))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_collects_whole_thread_without_fixed_sleeps(self):
+        driver = FakeThreadDriver(total=45)
+        started = time.time()
+        events = list(comment_scraper.iter_comments_with_driver(driver, 'https://www.linkedin.com/posts/x'))
+        elapsed = time.time() - started
+
+        comments = [e['data'] for e in events if e['type'] == 'comment']
+        self.assertEqual(len(comments), 45)
+        self.assertEqual(comments[3]['likes'], 3)
+
+        stats = events[-1]
+        self.assertEqual(stats['type'], 'stats')
+        self.assertGreaterEqual(stats['iterations'], 5)
+        self.assertAlmostEqual(stats['wait_seconds'] + stats['work_seconds'], stats['total_seconds'], delta=0.1)
+        # The last idle wait is bounded by the adaptive timeout, not the old 2-4s sleeps per iteration
+        self.assertLess(elapsed, 3)
+
+    def test_incremental_scrape_stops_at_seen_comments(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = WatermarkStore(tmp)
+            drivers = [FakeThreadDriver(total=200), FakeThreadDriver(total=205, newest_first_offset=5)]
+            repeat_driver = drivers[1]
+
+            @contextmanager
+            def checkout(cookie, timeout=None, profile=None):
+                yield drivers.pop(0)
+
+            with mock.patch.object(comment_scraper, 'watermark_store', store), \
+                    mock.patch.object(comment_scraper.driver_pool, 'checkout', checkout):
+                url = 'https://www.linkedin.com/posts/x'
+                first = comment_scraper.scrape_comments_from_post(url, 'c', incremental=True)
+                progress = []
+                second = comment_scraper.scrape_comments_from_post(url, 'c', progress.append, incremental=True)
+
+        self.assertEqual(len(first), 200)
+        self.assertEqual([c['name'] for c in second], [f'User {i}' for i in range(-5, 0)])
+        self.assertEqual(progress[-1]['total_comments'], 205)
+        self.assertEqual(progress[-1]['new_comments'], 5)
+        # The thread stopped expanding after the first batch of already-seen comments
+        self.assertTrue(repeat_driver.sorted)
+        self.assertLessEqual(repeat_driver.loaded, 20)
+
+    def test_incremental_scrape_expands_everything_when_sort_fails(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = WatermarkStore(tmp)
+            store.update('https://www.linkedin.com/posts/x',
+                         [comment_scraper.comment_content_key({'name': f'User {i}', 'comment': f'Comment {i}'})
+                          for i in range(30)])
+            driver = FakeThreadDriver(total=60, sortable=False)
+
+            @contextmanager
+            def checkout(cookie, timeout=None, profile=None):
+                yield driver
+
+            with mock.patch.object(comment_scraper, 'watermark_store', store), \
+                    mock.patch.object(comment_scraper.driver_pool, 'checkout', checkout):
+                comments = comment_scraper.scrape_comments_from_post('https://www.linkedin.com/posts/x', 'c',
+                                                                     incremental=True)
+
+        # In relevance order seen comments come first, so stopping at them would miss the rest
+        self.assertEqual(driver.loaded, 60)
+        self.assertEqual(len(comments), 30)
+
+    def test_slow_scroll_load_after_quick_rounds_is_waited_for(self):
+        # Quick batches shrink the adaptive timeout to its floor before the slow one
+        driver = InfiniteScrollDriver(total=40, slow_batch=3, slow_delay=0.8, load_delay=0.02)
+        events = list(comment_scraper.iter_comments_with_driver(driver, 'https://www.linkedin.com/posts/x'))
+        self.assertEqual(len([e for e in events if e['type'] == 'comment']), 40)
+
+    def test_adaptive_timeout_bounds(self):
+        timeout = comment_scraper.AdaptiveTimeout(initial=3, minimum=0.5, maximum=10)
+        timeout.observe(0.01)
+        self.assertEqual(timeout.current, 0.5)
+        timeout.observe(20)
+        self.assertEqual(timeout.current, 10)
+
+    def test_deadline_stops_expansion_with_partial_results(self):
+        driver = FakeThreadDriver(total=1000, load_delay=0.05)
+        started = time.time()
+        events = list(comment_scraper.iter_comments_with_driver(driver, 'https://www.linkedin.com/posts/x',
+                                                                deadline=Deadline(0.3)))
+        comments = [e for e in events if e['type'] == 'comment']
+        self.assertLess(time.time() - started, 1)
+        self.assertTrue(0 < len(comments) < 1000)
+        self.assertEqual([e['type'] for e in events[-2:]], ['deadline', 'stats'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import threading
+import unittest
+from scraper.dedup import DedupIndex, profile_key, comment_key, normalize_profile_url
+
+
+class TestDedupIndex(unittest.TestCase):
+    def test_normalize_profile_url(self):
+        self.assertEqual(
+            normalize_profile_url('https://WWW.LinkedIn.com/in/Jane-Doe/?miniProfileUrn=abc#top'),
+            'https://www.linkedin.com/in/jane-doe'
+        )
+
+    def test_merges_partial_profile_duplicates(self):
+        index = DedupIndex(profile_key)
+        self.assertTrue(index.add({'name': 'Jane', 'title': '', 'profile_url': 'https://www.linkedin.com/in/jane?x=1'}))
+        self.assertFalse(index.add({'name': 'Jane', 'title': 'CMO', 'profile_url': 'https://linkedin.com/in/jane/'}))
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.records()[0]['title'], 'CMO')
+
+    def test_comment_identity_ignores_whitespace_and_keeps_max_likes(self):
+        index = DedupIndex(comment_key)
+        index.add({'name': 'Bob', 'comment': 'Totally  agree.', 'timestamp': '3h', 'likes': 1})
+        index.add({'name': 'Bob', 'comment': 'Totally agree.', 'timestamp': '3h', 'likes': 4})
+        index.add({'name': 'Bob', 'comment': 'Totally agree.', 'timestamp': '5h', 'likes': 0})
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.records()[0]['likes'], 4)
+
+    def test_persisted_identities_are_skipped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'profiles.sqlite3')
+            first = DedupIndex(profile_key, path=path)
+            first.add({'name': 'Jane', 'profile_url': 'https://www.linkedin.com/in/jane'})
+            first.save()
+
+            second = DedupIndex(profile_key, path=path, skip_known=True)
+            second.add_all([
+                {'name': 'Jane', 'profile_url': 'https://www.linkedin.com/in/jane/'},
+                {'name': 'John', 'profile_url': 'https://www.linkedin.com/in/john'},
+            ])
+            self.assertEqual([p['name'] for p in second.records()], ['John'])
+            self.assertEqual(second.skipped, 1)
+
+    def test_concurrent_saves_keep_every_identity(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'profiles.sqlite3')
+            indexes = []
+            for i in range(8):
+                index = DedupIndex(profile_key, path=path)
+                index.add({'name': f'User {i}', 'profile_url': f'https://www.linkedin.com/in/user-{i}'})
+                indexes.append(index)
+            threads = [threading.Thread(target=index.save) for index in indexes]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            later = DedupIndex(profile_key, path=path, skip_known=True)
+            later.add_all({'profile_url': f'https://www.linkedin.com/in/user-{i}'} for i in range(8))
+            self.assertEqual(len(later), 0)
+            self.assertEqual(later.skipped, 8)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
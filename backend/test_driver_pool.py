@@ -0,0 +1,116 @@
+import unittest
+from scraper.driver_pool import DriverPool, DriverLoginError
+from scraper.browser_profiles import apply_request_blocking, chrome_arguments, resolve_profile, UnknownBrowserProfile
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+        self.alive = True
+
+    def execute_script(self, script, *args):
+        if not self.alive:
+            raise RuntimeError("chrome not reachable")
+        return "complete"
+
+    def get_cookie(self, name):
+        return {'name': name, 'value': 'cookie'}
+
+    def quit(self):
+        self.quit_called = True
+
+
+class TestDriverPool(unittest.TestCase):
+    def setUp(self):
+        self.created = []
+        self.logins = []
+
+        def factory(profile=None):
+            driver = FakeDriver()
+            driver.profile = profile
+            self.created.append(driver)
+            return driver
+
+        def login(driver, cookie):
+            self.logins.append(cookie)
+            return cookie != 'bad'
+
+        self.pool = DriverPool(max_size=2, max_uses=3, driver_factory=factory, login=login)
+
+    def test_reuses_driver_for_same_session(self):
+        with self.pool.checkout('a') as first:
+            pass
+        with self.pool.checkout('a') as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(self.logins, ['a'])
+
+    def test_profiles_get_separate_drivers(self):
+        with self.pool.checkout('a', profile='lean') as lean:
+            pass
+        with self.pool.checkout('a', profile='full') as full:
+            pass
+        self.assertIsNot(lean, full)
+        self.assertEqual([d.profile for d in self.created], ['lean', 'full'])
+        with self.pool.checkout('a', profile='lean') as again:
+            pass
+        self.assertIs(again, lean)
+
+    def test_recycles_after_max_uses(self):
+        for _ in range(3):
+            with self.pool.checkout('a') as driver:
+                pass
+        self.assertTrue(driver.quit_called)
+        with self.pool.checkout('a') as fresh:
+            pass
+        self.assertIsNot(driver, fresh)
+
+    def test_replaces_crashed_driver(self):
+        with self.pool.checkout('a') as driver:
+            driver.alive = False
+        with self.pool.checkout('a') as replacement:
+            pass
+        self.assertIsNot(driver, replacement)
+        self.assertTrue(driver.quit_called)
+
+    def test_evicts_idle_driver_of_other_session_when_full(self):
+        with self.pool.checkout('a'):
+            pass
+        with self.pool.checkout('b'):
+            pass
+        with self.pool.checkout('c'):
+            pass
+        self.assertEqual(len(self.created), 3)
+        self.assertEqual(sum(not d.quit_called for d in self.created), 2)
+
+    def test_failed_login_raises_and_frees_slot(self):
+        with self.assertRaises(DriverLoginError):
+            with self.pool.checkout('bad'):
+                pass
+        self.assertEqual(self.pool._total, 0)
+
+
+class TestBrowserProfiles(unittest.TestCase):
+    def test_lean_profile_is_headless_and_blocks_heavy_requests(self):
+        self.assertIn('--headless=new', chrome_arguments('lean'))
+        self.assertNotIn('--headless=new', chrome_arguments('full'))
+
+        commands = []
+
+        class CdpDriver:
+            def execute_cdp_cmd(self, command, params):
+                commands.append((command, params))
+
+        apply_request_blocking(CdpDriver(), 'lean')
+        apply_request_blocking(CdpDriver(), 'full')
+        self.assertEqual([command for command, _ in commands], ['Network.enable', 'Network.setBlockedURLs'])
+        self.assertIn('*.woff2', commands[1][1]['urls'])
+
+    def test_unknown_profile(self):
+        with self.assertRaises(UnknownBrowserProfile):
+            resolve_profile('turbo')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,92 @@
+import threading
+import unittest
+from unittest import mock
+import dns.resolver
+from scraper.email_validator import MXCache, get_resolver, lookup_mx, validate_emails_bulk
+
+
+class StubResolver:
+    """Answers MX queries from a fixed table and counts lookups per domain."""
+
+    def __init__(self, domains_with_mx, failing=(), servfail=()):
+        self.domains_with_mx = set(domains_with_mx)
+        self.failing = set(failing)
+        self.servfail = set(servfail)
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, domain, rdtype):
+        with self._lock:
+            self.calls[domain] = self.calls.get(domain, 0) + 1
+        if domain in self.failing:
+            raise dns.resolver.LifetimeTimeout()
+        if domain in self.servfail:
+            raise dns.resolver.NoNameservers()
+        if domain not in self.domains_with_mx:
+            raise dns.resolver.NXDOMAIN()
+        return ['mx.' + domain]
+
+
+class TestBulkEmailValidation(unittest.TestCase):
+    def test_each_domain_is_resolved_once(self):
+        resolver = StubResolver({'example.com'})
+        emails = [f'user{i}@example.com' for i in range(50)] + ['a@nowhere.test', 'b@nowhere.test']
+        results = validate_emails_bulk(emails, resolver=resolver, cache=MXCache())
+
+        self.assertEqual(resolver.calls, {'example.com': 1, 'nowhere.test': 1})
+        self.assertEqual([r['email'] for r in results], emails)
+        self.assertTrue(all(r['valid'] for r in results[:50]))
+        self.assertEqual(results[-1], {'email': 'b@nowhere.test', 'valid': False, 'reason': 'no_mx'})
+
+    def test_cache_covers_positive_and_negative_results(self):
+        resolver = StubResolver({'example.com'})
+        cache = MXCache()
+        validate_emails_bulk(['a@example.com', 'a@nowhere.test'], resolver=resolver, cache=cache)
+        validate_emails_bulk(['b@example.com', 'b@nowhere.test'], resolver=resolver, cache=cache)
+        self.assertEqual(resolver.calls, {'example.com': 1, 'nowhere.test': 1})
+        self.assertEqual(cache.stats['hits'], 2)
+
+    def test_errors_expire_before_negative_results(self):
+        resolver = StubResolver(set(), failing={'flaky.test'})
+        cache = MXCache(error_ttl=-1)
+        self.assertEqual(lookup_mx('flaky.test', resolver, cache)['reason'], 'dns_error')
+        lookup_mx('flaky.test', resolver, cache)
+        self.assertEqual(resolver.calls['flaky.test'], 2)
+
+    def test_failing_nameservers_are_not_cached(self):
+        resolver = StubResolver(set(), servfail={'broken.test'})
+        cache = MXCache()
+        self.assertEqual(lookup_mx('broken.test', resolver, cache)['reason'], 'dns_error')
+        lookup_mx('broken.test', resolver, cache)
+        self.assertEqual(resolver.calls['broken.test'], 2)
+        self.assertEqual(len(cache), 0)
+
+    def test_cache_is_size_bounded(self):
+        resolver = StubResolver({'a.test', 'b.test', 'c.test'})
+        cache = MXCache(max_entries=2)
+        for domain in ('a.test', 'b.test', 'a.test', 'c.test'):
+            lookup_mx(domain, resolver, cache)
+        self.assertEqual(len(cache), 2)
+        # b.test was the least recently used, so it was evicted and a.test kept
+        lookup_mx('a.test', resolver, cache)
+        lookup_mx('b.test', resolver, cache)
+        self.assertEqual(resolver.calls, {'a.test': 1, 'b.test': 2, 'c.test': 1})
+
+    def test_nameservers_keep_their_own_ports(self):
+        get_resolver.cache_clear()
+        self.addCleanup(get_resolver.cache_clear)
+        with mock.patch.dict('os.environ', {'DNS_NAMESERVERS': '127.0.0.1:5353, 10.0.0.2:5300,10.0.0.3'}):
+            resolver = get_resolver()
+        self.assertEqual(resolver.nameservers, ['127.0.0.1', '10.0.0.2', '10.0.0.3'])
+        self.assertEqual(resolver.nameserver_ports, {'127.0.0.1': 5353, '10.0.0.2': 5300})
+        self.assertEqual(resolver.port, 53)
+
+    def test_format_failures_skip_dns(self):
+        resolver = StubResolver(set())
+        results = validate_emails_bulk(['not-an-email'], resolver=resolver, cache=MXCache())
+        self.assertEqual(results[0]['reason'], 'invalid_format')
+        self.assertEqual(resolver.calls, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import csv
+import io
+import gzip
+import json
+import unittest
+from exports.streaming_export import export_stream, flatten_record, ExportFormatUnavailable
+from scraper.utils import ensure_gdpr_compliance
+
+
+def profiles(n):
+    for i in range(n):
+        yield ensure_gdpr_compliance({
+            'name': f'User {i}',
+            'title': 'Engineer',
+            'location': 'Berlin',
+            'profile_url': f'https://www.linkedin.com/in/user-{i}',
+            'email': f'user{i}@example.com'
+        })
+
+
+class TestStreamingExport(unittest.TestCase):
+    def test_flatten_keeps_nested_profile_data(self):
+        flat = flatten_record({'legal_basis': 'x', 'profile_data': {'name': 'Jane'}})
+        self.assertEqual(flat, {'legal_basis': 'x', 'profile_data.name': 'Jane'})
+
+    def test_csv_is_chunked_and_keeps_all_fields(self):
+        chunks, mimetype, extension = export_stream(profiles(1200), 'csv')
+        chunks = list(chunks)
+        self.assertGreater(len(chunks), 1)
+        rows = list(csv.DictReader(io.StringIO(b''.join(chunks).decode())))
+        self.assertEqual(len(rows), 1200)
+        self.assertEqual(rows[0]['profile_data.name'], 'User 0')
+        self.assertIn('profile_data.email_hash', rows[0])
+        self.assertEqual((mimetype, extension), ('text/csv', 'csv'))
+
+    def test_ndjson_with_columns_and_gzip(self):
+        chunks, mimetype, extension = export_stream(profiles(3), 'ndjson',
+                                                    columns=['profile_data.name', 'legal_basis'], compress=True)
+        lines = gzip.decompress(b''.join(chunks)).decode().splitlines()
+        self.assertEqual(json.loads(lines[2]), {'profile_data.name': 'User 2', 'legal_basis': 'Legitimate Interest'})
+        self.assertEqual(extension, 'ndjson.gz')
+
+    def test_parquet(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest('pyarrow is not installed')
+        chunks, _, _ = export_stream(profiles(25), 'parquet', columns=['profile_data.name', 'profile_data.title'])
+        table = pq.read_table(io.BytesIO(b''.join(chunks)))
+        self.assertEqual(table.num_rows, 25)
+        self.assertEqual(table.column('profile_data.name')[24].as_py(), 'User 24')
+
+    def test_default_columns_cover_fields_missing_from_the_first_record(self):
+        records = [{'profile_data': {'name': 'A'}}, {'profile_data': {'name': 'B', 'company': 'Acme'}}]
+        chunks, _, _ = export_stream(records, 'csv', default_columns=['legal_basis'])
+        lines = b''.join(chunks).decode().splitlines()
+        self.assertEqual(lines, ['legal_basis,profile_data.name,profile_data.company', ',A,', ',B,Acme'])
+
+    def test_unknown_format(self):
+        with self.assertRaises(ExportFormatUnavailable):
+            export_stream([], 'xlsx')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
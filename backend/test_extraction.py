@@ -0,0 +1,43 @@
+import os
+import unittest
+from scraper.extraction import extract_records, parse_count
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'test_fixtures')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+class TestExtraction(unittest.TestCase):
+    def test_search_results(self):
+        profiles = extract_records(load_fixture('search_results.html'), 'profile',
+                                   base_url='https://www.linkedin.com/search/results/people/')
+        # The card without a profile link is skipped
+        self.assertEqual(len(profiles), 2)
+        self.assertEqual(profiles[0], {
+            'name': 'Jane Doe',
+            'title': 'Marketing Director at Acme',
+            'location': 'San Francisco Bay Area',
+            'profile_url': 'https://www.linkedin.com/in/jane-doe?miniProfileUrn=urn'
+        })
+        self.assertEqual(profiles[1]['location'], 'New York, NY')
+        self.assertEqual(profiles[1]['profile_url'], 'https://www.linkedin.com/in/john-smith/')
+
+    def test_comment_thread(self):
+        comments = extract_records(load_fixture('comment_thread.html'), 'comment')
+        self.assertEqual(len(comments), 2)
+        self.assertEqual(comments[0]['comment'], 'Great insights, thanks for sharing!')
+        self.assertEqual(comments[0]['likes'], 1204)
+        # Missing likes counter falls back to the default
+        self.assertEqual(comments[1]['likes'], 0)
+
+    def test_parse_count(self):
+        self.assertEqual(parse_count('12 likes'), 12)
+        self.assertEqual(parse_count(''), 0)
+        self.assertEqual(parse_count(None), 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
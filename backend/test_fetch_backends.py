@@ -0,0 +1,253 @@
+import unittest
+import requests
+from contextlib import contextmanager
+from unittest import mock
+from benchmarks.fake_driver import FixtureDriver
+from benchmarks.fixtures import search_results_page, comment_thread_page
+from scraper import linkedin_profile_scraper as profile_scraper
+from scraper import linkedin_comment_scraper as comment_scraper
+from scraper.rate_scheduler import RateScheduler
+from scraper.dedup import DedupIndex, profile_key
+from scraper.fetch_backends import HttpFetcher, HttpSessionPool, NeedsJavaScript, resolve_fetch_backend
+from jobs.deadline import Deadline
+
+
+class FakeResponse:
+    def __init__(self, url, text, status_code=200):
+        self.url = url
+        self.text = text
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    """Serves pages by URL; a page mapped to None redirects to the login wall."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def get(self, url, timeout=None):
+        self.requested.append(url)
+        text = self.pages.get(url, '')
+        if isinstance(text, Exception):
+            raise text
+        if text is None:
+            return FakeResponse('https://www.linkedin.com/authwall?trk=x', '')
+        return FakeResponse(url, text)
+
+
+class FakeSessionPool(HttpSessionPool):
+    def __init__(self, session):
+        super().__init__()
+        self.fake = session
+
+    def session(self, cookie):
+        return self.fake
+
+
+def search_url(page):
+    url = profile_scraper.build_linkedin_url({'title': 'Engineer'})
+    return url if page == 1 else f"{url}&page={page}"
+
+
+class TestHttpFetchBackend(unittest.TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch('time.sleep'),
+            # Page loads are not paced in these tests
+            mock.patch.object(profile_scraper, 'rate_scheduler', RateScheduler(pages_per_minute=60000, burst=100)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_resolve_rejects_unknown_backend(self):
+        self.assertEqual(resolve_fetch_backend('http'), 'http')
+        with self.assertRaises(ValueError):
+            resolve_fetch_backend('curl')
+
+    def test_sessions_are_reused_per_cookie(self):
+        pool = HttpSessionPool(max_sessions=1)
+        first = pool.session('a')
+        self.assertIs(pool.session('a'), first)
+        self.assertEqual(first.cookies.get('li_at'), 'a')
+        pool.session('b')
+        self.assertIsNot(pool.session('a'), first)
+
+    def test_search_pages_over_http(self):
+        session = FakeSession({search_url(page): search_results_page(10) for page in (1, 2, 3)})
+        with mock.patch.object(profile_scraper, 'HttpFetcher',
+                               lambda cookie, deadline, pacer=None: HttpFetcher(cookie, deadline, FakeSessionPool(session))), \
+                mock.patch.object(profile_scraper.driver_pool, 'checkout') as checkout:
+            events = list(profile_scraper.iter_linkedin_profiles({'title': 'Engineer'}, 'c', fetch_backend='http'))
+        self.assertFalse(checkout.called)
+        # Page 2 repeats page 1, so the search stops there instead of loading page 3
+        self.assertEqual(len(session.requested), 2)
+        self.assertEqual(len([e for e in events if e['type'] == 'profile']), 10)
+        self.assertEqual(events[-1]['stop_reason'], 'no_new_profiles')
+
+    def test_falls_back_to_selenium_from_the_failing_page(self):
+        session = FakeSession({search_url(1): search_results_page(10), search_url(2): None})
+        driver = FixtureDriver({}, default_page=search_results_page(100))
+
+        @contextmanager
+        def checkout(cookie, timeout=None, profile=None):
+            yield driver
+
+        with mock.patch.object(profile_scraper, 'HttpFetcher',
+                               lambda cookie, deadline, pacer=None: HttpFetcher(cookie, deadline, FakeSessionPool(session))), \
+                mock.patch.object(profile_scraper.driver_pool, 'checkout', checkout):
+            events = list(profile_scraper.iter_linkedin_profiles({'title': 'Engineer'}, 'c', fetch_backend='http'))
+
+        fallback = next(e for e in events if e['type'] == 'fallback')
+        self.assertEqual((fallback['backend'], fallback['page']), ('selenium', 2))
+        self.assertEqual(driver.current_url, search_url(3))
+        self.assertEqual([e['pages_done'] for e in events if e['type'] == 'progress'], [1, 2, 3])
+        self.assertEqual(len([e for e in events if e['type'] == 'profile']), 100)
+
+    def test_http_timeout_falls_back_to_selenium_from_that_page(self):
+        session = FakeSession({search_url(1): search_results_page(10), search_url(2): requests.Timeout('read timeout')})
+        driver = FixtureDriver({}, default_page=search_results_page(100))
+
+        @contextmanager
+        def checkout(cookie, timeout=None, profile=None):
+            yield driver
+
+        with mock.patch.object(profile_scraper, 'HttpFetcher',
+                               lambda cookie, deadline, pacer=None: HttpFetcher(cookie, deadline, FakeSessionPool(session))), \
+                mock.patch.object(profile_scraper.driver_pool, 'checkout', checkout):
+            events = list(profile_scraper.iter_linkedin_profiles({'title': 'Engineer'}, 'c', fetch_backend='http'))
+
+        fallback = next(e for e in events if e['type'] == 'fallback')
+        self.assertEqual((fallback['backend'], fallback['page']), ('selenium', 2))
+        self.assertIn('Timeout fetching', fallback['reason'])
+        self.assertEqual([e['pages_done'] for e in events if e['type'] == 'progress'], [1, 2, 3])
+        self.assertNotEqual(events[-1]['stop_reason'], 'timeout')
+
+    def test_expired_deadline_stops_http_search_with_deadline_event(self):
+        session = FakeSession({search_url(1): search_results_page(10)})
+        with mock.patch.object(profile_scraper, 'HttpFetcher',
+                               lambda cookie, deadline, pacer=None: HttpFetcher(cookie, deadline, FakeSessionPool(session))):
+            events = list(profile_scraper.iter_linkedin_profiles({'title': 'Engineer'}, 'c', fetch_backend='http',
+                                                                 deadline=Deadline(0)))
+        self.assertEqual(session.requested, [])
+        self.assertEqual([e['type'] for e in events], ['deadline', 'pagination'])
+        self.assertEqual(events[-1]['stop_reason'], 'deadline')
+
+    def test_comment_request_error_falls_back_to_selenium(self):
+        url = 'https://www.linkedin.com/posts/x'
+        session = FakeSession({url: requests.ConnectionError('connection reset')})
+        fetcher = HttpFetcher('c', sessions=FakeSessionPool(session))
+        driver = mock.sentinel.driver
+
+        @contextmanager
+        def checkout(cookie, timeout=None, profile=None):
+            yield driver
+
+        def expand(driver, post_url, dedup_index, stop_at_known=False, deadline=None, pacer=None):
+            yield {'type': 'comment', 'data': {'name': 'Jane', 'comment': 'Hi'}}
+
+        with mock.patch.object(comment_scraper, 'HttpFetcher', lambda cookie, deadline, pacer=None: fetcher), \
+                mock.patch.object(comment_scraper.driver_pool, 'checkout', checkout), \
+                mock.patch.object(comment_scraper, 'iter_comments_with_driver', expand):
+            events = list(comment_scraper.iter_comments_from_post(url, 'c', fetch_backend='http'))
+        self.assertEqual([e['type'] for e in events], ['fallback', 'comment'])
+        self.assertIn('connection reset', events[0]['reason'])
+
+    def test_queries_share_one_driver(self):
+        driver = FixtureDriver({}, default_page=search_results_page(10))
+        checkouts = []
+
+        @contextmanager
+        def checkout(cookie, timeout=None, profile=None):
+            checkouts.append(cookie)
+            yield driver
+
+        with mock.patch.object(profile_scraper.driver_pool, 'checkout', checkout):
+            events = list(profile_scraper.iter_profiles_for_queries([{'title': 'A'}, {'title': 'B'}], 'c'))
+        self.assertEqual(len(checkouts), 1)
+        profiles = [e for e in events if e['type'] == 'profile']
+        self.assertEqual([len([e for e in profiles if e['search'] == i]) for i in (0, 1)], [10, 10])
+
+    def test_comment_thread_needs_browser_when_it_has_more_to_load(self):
+        url = 'https://www.linkedin.com/posts/x'
+        complete = FakeSession({url: comment_thread_page(10)})
+        fetcher = HttpFetcher('c', sessions=FakeSessionPool(complete))
+        events = list(comment_scraper.iter_comments_over_http(fetcher, url))
+        self.assertEqual(len([e for e in events if e['type'] == 'comment']), 10)
+
+        truncated = FakeSession({url: comment_thread_page(10).replace(
+            '</body>', f'<button class="{comment_scraper.LOAD_MORE_CLASS}">Load more</button></body>')})
+        fetcher = HttpFetcher('c', sessions=FakeSessionPool(truncated))
+        with self.assertRaises(NeedsJavaScript):
+            list(comment_scraper.iter_comments_over_http(fetcher, url))
+
+
+class PagedFetcher:
+    """Serves pages of profiles by page number, recording which were fetched."""
+
+    def __init__(self, page_sizes, overlap=0):
+        self.page_sizes = page_sizes
+        self.overlap = overlap
+        self.fetched = []
+
+    def fetch_records(self, url, kind):
+        page = int(url.split('&page=')[1]) if '&page=' in url else 1
+        self.fetched.append(page)
+        size = self.page_sizes[page - 1] if page <= len(self.page_sizes) else 0
+        first = (page - 1) * (10 - self.overlap)
+        return [{'name': f'User {i}', 'profile_url': f'https://www.linkedin.com/in/user-{i}'}
+                for i in range(first, first + size)]
+
+
+class TestAdaptivePagination(unittest.TestCase):
+    def setUp(self):
+        patch = mock.patch('time.sleep')
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def run_pages(self, fetcher, **options):
+        return list(profile_scraper.iter_profiles_with_fetcher(fetcher, {'title': 'Engineer'}, **options))
+
+    def test_stops_at_target(self):
+        fetcher = PagedFetcher([10] * 50)
+        events = self.run_pages(fetcher, max_pages=50, target_count=25)
+        self.assertEqual(fetcher.fetched, [1, 2, 3])
+        self.assertEqual((events[-1]['stop_reason'], events[-1]['profiles_found']), ('target_reached', 30))
+
+    def test_stops_when_results_run_out(self):
+        fetcher = PagedFetcher([10, 10, 4])
+        events = self.run_pages(fetcher, max_pages=20)
+        self.assertEqual(fetcher.fetched, [1, 2, 3])
+        self.assertEqual(events[-1]['stop_reason'], 'exhausted')
+        self.assertEqual([p['results'] for p in events[-1]['pages']], [10, 10, 4])
+
+    def test_known_profiles_do_not_end_the_search(self):
+        # Page 1 was scraped in an earlier run; skip_known drops it but the search goes on
+        known = [profile_key({'profile_url': f'https://www.linkedin.com/in/user-{i}'}) for i in range(10)]
+        dedup_index = DedupIndex(profile_key, skip_known=True, known=known)
+        fetcher = PagedFetcher([10, 10, 10, 10])
+        events = self.run_pages(fetcher, max_pages=2, dedup_index=dedup_index)
+        self.assertEqual(fetcher.fetched, [1, 2])
+        self.assertEqual(len([e for e in events if e['type'] == 'profile']), 10)
+        self.assertEqual(events[-1]['stop_reason'], 'max_pages')
+
+        # A page repeating profiles already met in this scrape still ends it
+        fetcher = PagedFetcher([10, 10, 10], overlap=10)
+        events = self.run_pages(fetcher, max_pages=3, dedup_index=DedupIndex(profile_key, skip_known=True,
+                                                                               known=known))
+        self.assertEqual(fetcher.fetched, [1, 2])
+        self.assertEqual(events[-1]['stop_reason'], 'no_new_profiles')
+
+    def test_reports_per_page_yield(self):
+        fetcher = PagedFetcher([10] * 5, overlap=5)
+        events = self.run_pages(fetcher, max_pages=2)
+        self.assertEqual([p['yield'] for p in events[-1]['pages']], [1.0, 0.5])
+        self.assertEqual(events[-1]['stop_reason'], 'max_pages')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
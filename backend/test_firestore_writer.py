@@ -0,0 +1,50 @@
+import unittest
+from database.firestore_writer import BatchWriter, profile_document_id
+from database.memory_firestore import MemoryFirestore
+
+
+def profile(slug, **fields):
+    return {'profile_data': dict({'name': slug, 'profile_url': f'https://www.linkedin.com/in/{slug}'}, **fields)}
+
+
+class TestBatchWriter(unittest.TestCase):
+    def setUp(self):
+        self.db = MemoryFirestore()
+        self.writer = BatchWriter(lambda: self.db, batch_size=50, linger_seconds=0.05)
+
+    def tearDown(self):
+        self.writer.close()
+
+    def test_writes_in_batches(self):
+        self.writer.put_many(profile(f'user-{i}') for i in range(120))
+        self.writer.flush()
+        docs = list(self.db.collection('linkedin_profiles').stream())
+        self.assertEqual(len(docs), 120)
+        self.assertTrue(all(size <= 50 for size in self.db.commits))
+        self.assertLess(len(self.db.commits), 120)
+
+    def test_rewrites_are_idempotent(self):
+        self.writer.put(profile('jane', title=''))
+        self.writer.flush()
+        self.writer.put({'profile_data': {'profile_url': 'https://linkedin.com/in/Jane/?trk=x', 'title': 'CMO'}})
+        self.writer.flush()
+        docs = [doc.to_dict() for doc in self.db.collection('linkedin_profiles').stream()]
+        self.assertEqual(len(docs), 1)
+        self.assertEqual(docs[0]['profile_data']['title'], 'CMO')
+        self.assertEqual(docs[0]['profile_data']['name'], 'jane')
+
+    def test_document_id_is_stable(self):
+        self.assertEqual(profile_document_id(profile('jane')),
+                         profile_document_id({'profile_url': 'https://www.linkedin.com/in/jane/'}))
+
+    def test_failed_commits_are_counted(self):
+        writer = BatchWriter(lambda: (_ for _ in ()).throw(RuntimeError("unavailable")),
+                             linger_seconds=0, max_retries=1)
+        writer.put(profile('jane'))
+        writer.close()
+        self.assertEqual(writer.stats['failed'], 1)
+        self.assertIn('unavailable', writer.last_error)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
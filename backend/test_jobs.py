@@ -0,0 +1,60 @@
+import unittest
+import threading
+import time
+from jobs.job_manager import JobManager, SUCCEEDED, FAILED, CANCELLED
+
+
+def wait_for(job, timeout=5):
+    deadline = time.time() + timeout
+    while job.status not in (SUCCEEDED, FAILED, CANCELLED) and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+class TestJobManager(unittest.TestCase):
+    def setUp(self):
+        self.manager = JobManager(max_workers=1)
+
+    def test_job_reports_progress_and_result(self):
+        def work(data, progress_callback=None):
+            progress_callback({'pages_done': 1, 'profiles_found': 10})
+            return {'profile_count': data['n']}
+
+        job = wait_for(self.manager.submit('search', work, {'n': 10}))
+        self.assertEqual(job.status, SUCCEEDED)
+        self.assertEqual(job.to_dict()['progress']['profiles_found'], 10)
+        self.assertEqual(job.to_dict()['result'], {'profile_count': 10})
+
+    def test_failed_job_keeps_error(self):
+        def work(data, progress_callback=None):
+            raise RuntimeError("chrome crashed")
+
+        job = wait_for(self.manager.submit('search', work, {}))
+        self.assertEqual(job.status, FAILED)
+        self.assertIn('chrome crashed', job.to_dict()['error'])
+
+    def test_cancel_running_and_queued_jobs(self):
+        started = threading.Event()
+
+        def work(data, progress_callback=None):
+            started.set()
+            while True:
+                progress_callback({'scroll_iterations': 1})
+                time.sleep(0.01)
+
+        running = self.manager.submit('comments', work, {})
+        queued = self.manager.submit('comments', work, {})
+        started.wait(2)
+
+        self.manager.cancel(queued.id)
+        self.assertEqual(queued.status, CANCELLED)
+        self.manager.cancel(running.id)
+        self.assertEqual(wait_for(running).status, CANCELLED)
+
+    def test_unknown_job(self):
+        self.assertIsNone(self.manager.get('missing'))
+        self.assertIsNone(self.manager.cancel('missing'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
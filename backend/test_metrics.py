@@ -0,0 +1,83 @@
+import logging
+import unittest
+from unittest import mock
+import app as app_module
+from observability.metrics import MetricsRegistry, timed_iter, STAGE_SECONDS
+from observability.request_context import request_id_context, install_log_context
+from scraper.extraction import extract_records
+from scraper.result_cache import SearchResultCache
+from test_app import fake_profile_events, temp_record_store
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_prometheus_text_format(self):
+        registry = MetricsRegistry()
+        counter = registry.counter('pages_total', 'Pages.', ('kind',))
+        histogram = registry.histogram('stage_seconds', 'Stages.', ('stage',), buckets=(0.1, 1))
+        counter.inc(kind='search')
+        counter.inc(2, kind='search')
+        histogram.observe(0.5, stage='login')
+        histogram.observe(3, stage='login')
+        text = registry.render()
+
+        self.assertIn('# TYPE linkedin_scraper_pages_total counter', text)
+        self.assertIn('linkedin_scraper_pages_total{kind="search"} 3', text)
+        self.assertIn('linkedin_scraper_stage_seconds_bucket{stage="login",le="0.1"} 0', text)
+        self.assertIn('linkedin_scraper_stage_seconds_bucket{stage="login",le="1"} 1', text)
+        self.assertIn('linkedin_scraper_stage_seconds_bucket{stage="login",le="+Inf"} 2', text)
+        self.assertIn('linkedin_scraper_stage_seconds_sum{stage="login"} 3.5', text)
+
+    def test_timed_iter_observes_once(self):
+        before = STAGE_SECONDS.count(stage='test_iter')
+        self.assertEqual(list(timed_iter(iter([1, 2, 3]), 'test_iter')), [1, 2, 3])
+        self.assertEqual(STAGE_SECONDS.count(stage='test_iter'), before + 1)
+
+    def test_log_records_carry_request_id(self):
+        install_log_context()
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logger = logging.getLogger('test_metrics')
+        logger.addHandler(handler)
+        try:
+            with request_id_context('job-123'):
+                logger.warning('inside')
+            logger.warning('outside')
+        finally:
+            logger.removeHandler(handler)
+        self.assertEqual([r.request_id for r in records], ['job-123', '-'])
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        patches = [
+            mock.patch.object(app_module, 'process_query', return_value={'title': 'Engineer'}),
+            mock.patch.object(app_module, 'iter_linkedin_profiles', side_effect=fake_profile_events),
+            mock.patch.object(app_module, 'save_to_firebase'),
+            mock.patch.object(app_module.DedupIndex, 'save'),
+            mock.patch.object(app_module, 'search_cache', SearchResultCache()),
+            mock.patch.object(app_module, 'record_store', temp_record_store(self)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_metrics_cover_stages_and_requests(self):
+        extract_records('<div class="comments-comment-item"></div>', 'comment')
+        response = self.client.post('/search', json={'query': 'engineers', 'cookies': 'x'},
+                                    headers={'X-Request-ID': 'abc123'})
+        self.assertEqual(response.headers['X-Request-ID'], 'abc123')
+        for unsafe in ('../../x', 'a' * 65, 'id with spaces', '..'):
+            response = self.client.get('/', headers={'X-Request-ID': unsafe})
+            self.assertRegex(response.headers['X-Request-ID'], r'^[0-9a-f]{16}$')
+
+        text = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('linkedin_scraper_stage_seconds_count{stage="process_query"}', text)
+        self.assertIn('linkedin_scraper_parse_failures_total{kind="comment"}', text)
+        self.assertIn('linkedin_scraper_http_request_seconds_count{method="POST",endpoint="/search",status="200"}', text)
+        self.assertIn('linkedin_scraper_search_cache_events_total{event="miss"} 1', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
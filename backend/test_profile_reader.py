@@ -0,0 +1,84 @@
+import unittest
+from unittest import mock
+from database import firebase_client
+from database.firebase_client import iter_profiles, fetch_profiles_page, InvalidCursor, encode_cursor
+from jobs.deadline import Deadline
+from database.memory_firestore import MemoryFirestore
+
+
+class TestProfileReader(unittest.TestCase):
+    def setUp(self):
+        self.db = MemoryFirestore()
+        collection = self.db.collection('linkedin_profiles')
+        for i in range(25):
+            collection.document(f'doc-{i:02d}').set({
+                'collection_date': f'2026-10-{1 + i % 10:02d}T00:00:00',
+                'profile_data': {
+                    'name': f'User {i}',
+                    'location': 'Berlin' if i % 2 else 'Paris',
+                    'profile_url': f'https://www.linkedin.com/in/user-{i}'
+                }
+            })
+
+    def test_streams_every_profile_across_pages(self):
+        results = list(iter_profiles(page_size=4, db=self.db))
+        self.assertEqual(len(results), 25)
+        self.assertEqual(len({doc_id for doc_id, _ in results}), 25)
+        dates = [profile['collection_date'] for _, profile in results]
+        self.assertEqual(dates, sorted(dates))
+
+    def test_filters_and_projection(self):
+        results = [profile for _, profile in iter_profiles(
+            page_size=3, db=self.db, location='Berlin', fields=['profile_data.name'],
+            collected_after='2026-10-05', collected_before='2026-10-08')]
+        self.assertTrue(results)
+        for profile in results:
+            self.assertEqual(set(profile['profile_data']), {'name'})
+            self.assertTrue('2026-10-05' <= profile['collection_date'] < '2026-10-08')
+
+    def test_cursor_pagination_resumes(self):
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = fetch_profiles_page(page_size=10, cursor=cursor, db=self.db)
+            seen.extend(p['profile_data']['name'] for p in page)
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            fetch_profiles_page(cursor='not-a-cursor', db=self.db)
+
+    def test_cursor_survives_rewritten_documents(self):
+        page, cursor = fetch_profiles_page(page_size=10, db=self.db)
+        seen = [p['profile_data']['name'] for p in page]
+        # Scraping the last profile of the page again moves it to the end of the ordering
+        last_id = next(doc_id for doc_id, profile in iter_profiles(db=self.db)
+                       if profile['profile_data']['name'] == seen[-1])
+        self.db.collection('linkedin_profiles').document(last_id).set(
+            {'collection_date': '2026-10-31T00:00:00'}, merge=True)
+
+        while cursor is not None:
+            page, cursor = fetch_profiles_page(page_size=10, cursor=cursor, db=self.db)
+            seen.extend(p['profile_data']['name'] for p in page)
+        # Nothing is skipped; the rewritten profile shows up again at its new position
+        self.assertEqual(len(set(seen)), 25)
+        self.assertEqual(len(seen), 26)
+
+    def test_resuming_after_a_deleted_document(self):
+        page, _ = fetch_profiles_page(cursor=encode_cursor('2026-10-05T00:00:00', 'deleted'), db=self.db)
+        self.assertTrue(all(p['collection_date'] >= '2026-10-05T00:00:00' for p in page))
+
+
+class TestSaveToFirebase(unittest.TestCase):
+    def test_expired_deadline_does_not_drop_profiles(self):
+        with mock.patch.object(firebase_client, 'profile_writer') as writer:
+            firebase_client.save_to_firebase([{'a': 1}, {'b': 2}], deadline=Deadline(0))
+        writer.put_many.assert_called_once_with([{'a': 1}, {'b': 2}])
+        writer.put.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
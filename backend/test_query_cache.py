@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from ai import query_processor
+from ai.query_cache import QueryCache, normalize_query
+from ai.query_rules import parse_simple_query
+from jobs.deadline import Deadline
+
+
+class TestQueryRules(unittest.TestCase):
+    def test_title_location_company(self):
+        self.assertEqual(parse_simple_query("Find software engineers in San Francisco at Google"), {
+            'keywords': 'software engineer',
+            'title': 'software engineer',
+            'company': 'Google',
+            'location': 'San Francisco',
+            'industry': ''
+        })
+
+    def test_company_before_location(self):
+        result = parse_simple_query("Product Managers at Stripe in Dublin.")
+        self.assertEqual((result['title'], result['company'], result['location']),
+                         ('Product Manager', 'Stripe', 'Dublin'))
+
+    def test_titles_keep_their_casing_and_head_noun(self):
+        titles = {
+            "Head of Sales in London": 'Head of Sales',
+            "Heads of Sales in London": 'Head of Sales',
+            "VP of Operations at Acme": 'VP of Operations',
+            "CEOs in Berlin": 'CEO',
+            "Executive Secretaries in Paris": 'Executive Secretary',
+            "iOS developers in Oslo": 'iOS developer',
+        }
+        for query, title in titles.items():
+            self.assertEqual(parse_simple_query(query)['title'], title, query)
+
+    def test_unknown_head_nouns_go_to_the_model(self):
+        self.assertIsNone(parse_simple_query("Data Analytics in Berlin"))
+        self.assertIsNone(parse_simple_query("Sales in London"))
+
+    def test_complex_queries_go_to_the_model(self):
+        self.assertIsNone(parse_simple_query("Find software engineers in San Francisco working at startups"))
+        self.assertIsNone(parse_simple_query("Data scientists with ML experience in Seattle"))
+        self.assertIsNone(parse_simple_query("marketing directors"))
+
+
+class TestQueryCache(unittest.TestCase):
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query("  Data Scientists, with ML!  "), "data scientists with ml")
+
+    def test_lru_eviction(self):
+        cache = QueryCache(max_entries=2)
+        cache.set('a', {'v': 1})
+        cache.set('b', {'v': 2})
+        cache.get('a')
+        cache.set('c', {'v': 3})
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), {'v': 1})
+
+    def test_ttl_expiry(self):
+        cache = QueryCache(ttl_seconds=0)
+        cache.set('a', {'v': 1})
+        self.assertIsNone(cache.get('a'))
+
+    def test_survives_restart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache.db')
+            QueryCache(path=path)
+            self.assertFalse(os.path.exists(path))
+            QueryCache(path=path).set('a', {'v': 1})
+            self.assertEqual(QueryCache(path=path).get('a'), {'v': 1})
+
+
+class TestProcessQuery(unittest.TestCase):
+    def test_model_result_is_cached(self):
+        model_result = {'keywords': 'ml', 'title': 'Data Scientist', 'company': '', 'location': 'Seattle', 'industry': ''}
+        with mock.patch.object(query_processor, 'query_cache', QueryCache()), \
+                mock.patch.object(query_processor, '_process_query_with_model', return_value=model_result) as model:
+            query = "Data scientists with ML experience in Seattle"
+            self.assertEqual(query_processor.process_query(query), model_result)
+            self.assertEqual(query_processor.process_query(query.upper() + "!"), model_result)
+            self.assertEqual(model.call_count, 1)
+
+    def test_simple_query_skips_model(self):
+        with mock.patch.object(query_processor, '_process_query_with_model') as model:
+            result = query_processor.process_query("Marketing directors in California")
+            self.assertEqual(result['location'], 'California')
+            model.assert_not_called()
+
+    def test_model_call_with_deadline_is_not_retried(self):
+        client = mock.Mock()
+        client.with_options.return_value.chat.completions.create.return_value.choices = [
+            mock.Mock(message=mock.Mock(content='{"title": "Data Scientist"}'))]
+        query = "Data scientists with ML experience in Seattle"
+        with mock.patch.object(query_processor, 'query_cache', QueryCache()), \
+                mock.patch.object(query_processor, '_get_client', return_value=client):
+            self.assertEqual(query_processor.process_query(query, deadline=Deadline(10)), {'title': 'Data Scientist'})
+        client.with_options.assert_called_once_with(max_retries=0)
+        self.assertLessEqual(client.with_options.return_value.chat.completions.create.call_args[1]['timeout'], 10)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
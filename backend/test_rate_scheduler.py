@@ -0,0 +1,71 @@
+import time
+import threading
+import unittest
+from scraper.rate_scheduler import RateScheduler, RateLimitTimeout
+from jobs.deadline import Deadline
+
+
+class TestRateScheduler(unittest.TestCase):
+    def test_concurrent_scrapes_share_the_budget(self):
+        scheduler = RateScheduler(pages_per_minute=1200, burst=1)  # One page every 50ms
+        grants = []
+        lock = threading.Lock()
+
+        def job():
+            for _ in range(5):
+                scheduler.acquire('cookie')
+                with lock:
+                    grants.append(time.monotonic())
+
+        threads = [threading.Thread(target=job) for _ in range(3)]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        # 15 pages at 20/s: never faster than the budget, and not much slower either
+        self.assertGreaterEqual(elapsed, 14 * 0.05 - 0.02)
+        self.assertLess(elapsed, 1.5)
+        self.assertEqual(scheduler.stats['granted'], 15)
+
+    def test_sessions_have_separate_budgets(self):
+        scheduler = RateScheduler(pages_per_minute=6, burst=1)
+        scheduler.acquire('a')
+        started = time.monotonic()
+        scheduler.acquire('b')
+        self.assertLess(time.monotonic() - started, 0.05)
+
+    def test_higher_priority_is_served_first(self):
+        scheduler = RateScheduler(pages_per_minute=600, burst=1)  # One page every 100ms
+        scheduler.acquire('cookie')
+        order = []
+
+        def wait(priority, delay):
+            time.sleep(delay)
+            scheduler.acquire('cookie', priority)
+            order.append(priority)
+
+        threads = [threading.Thread(target=wait, args=('low', 0)), threading.Thread(target=wait, args=('low', 0.01)),
+                   threading.Thread(target=wait, args=('high', 0.02))]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        self.assertEqual(scheduler.queue_depth(), {'high': 1, 'normal': 0, 'low': 2})
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, ['high', 'low', 'low'])
+
+    def test_timeout_leaves_the_queue(self):
+        scheduler = RateScheduler(pages_per_minute=1, burst=1)
+        scheduler.acquire('cookie')
+        with self.assertRaises(RateLimitTimeout):
+            scheduler.acquire('cookie', timeout=0.05)
+        self.assertFalse(scheduler.pacer('cookie').wait(Deadline(0.05)))
+        self.assertEqual(sum(scheduler.queue_depth().values()), 0)
+        self.assertEqual(scheduler.stats['timeouts'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from database.record_store import RecordStore, InvalidCursor
+from scraper.records import Profile, apply_gdpr
+
+
+class TestRecordStore(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = RecordStore(os.path.join(tmp.name, 'records.sqlite3'))
+        profiles = []
+        for i in range(25):
+            profiles.extend(apply_gdpr([Profile(
+                name=f'User {i:02d}',
+                company='Acme' if i % 2 else 'Globex',
+                location='Berlin' if i % 3 else 'Paris',
+                profile_url=f'https://www.linkedin.com/in/user-{i}'
+            )], f'2026-10-{1 + i % 10:02d}T00:00:00'))
+        self.store.save_profiles(profiles)
+
+    def names(self, profiles):
+        return [profile['profile_data']['name'] for profile in profiles]
+
+    def test_store_is_created_on_first_use(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = RecordStore(os.path.join(tmp, 'nested', 'records.sqlite3'))
+            self.assertFalse(os.path.exists(store.path))
+            self.assertEqual(store.stats(), {'profiles': 0, 'comments': 0})
+            self.assertEqual(os.stat(store.path).st_mode & 0o777, 0o600)
+
+    def test_keyset_pages_cover_every_match_once(self):
+        seen, cursor = [], None
+        while True:
+            page, cursor = self.store.query_profiles(company='acme', page_size=4, cursor=cursor)
+            seen.extend(page)
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), 12)
+        self.assertEqual(len(set(self.names(seen))), 12)
+        dates = [profile['collection_date'] for profile in seen]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+
+    def test_filters_and_sort(self):
+        page, _ = self.store.query_profiles(location='Paris', collected_after='2026-10-04', collected_before='2026-10-08',
+                                            sort='name', order='asc')
+        self.assertEqual(self.names(page), ['User 03', 'User 06', 'User 15', 'User 24'])
+
+    def test_rescraped_profile_updates_its_row(self):
+        profile = apply_gdpr([Profile(name='User 00', company='Initech',
+                                      profile_url='https://linkedin.com/in/user-0/?trk=x')], '2026-10-20T00:00:00')
+        self.store.save_profiles(profile)
+        self.assertEqual(self.store.stats()['profiles'], 25)
+        page, _ = self.store.query_profiles(profile_url='https://www.linkedin.com/in/user-0')
+        self.assertEqual(page[0]['profile_data']['company'], 'Initech')
+
+    def test_cursor_is_tied_to_its_sort(self):
+        _, cursor = self.store.query_profiles(page_size=5)
+        with self.assertRaises(InvalidCursor):
+            self.store.query_profiles(sort='name', cursor=cursor)
+        with self.assertRaises(InvalidCursor):
+            self.store.query_profiles(cursor='not-a-cursor')
+
+    def test_comments_are_keyed_by_post_author_and_text(self):
+        comments = [{'name': 'A', 'comment': 'Nice', 'timestamp': '2h'}, {'name': 'B', 'comment': 'Great'}]
+        self.store.save_comments('https://www.linkedin.com/posts/p1', comments)
+        self.store.save_comments('https://www.linkedin.com/posts/p1', [dict(comments[0], timestamp='1d')])
+        self.store.save_comments('https://www.linkedin.com/posts/p2', comments[:1])
+        self.assertEqual(self.store.stats()['comments'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
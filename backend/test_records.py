@@ -0,0 +1,73 @@
+import json
+import hashlib
+import unittest
+from unittest import mock
+from scraper.dedup import DedupIndex, profile_key
+from scraper.records import Profile, Comment, apply_gdpr, json_default
+from scraper.utils import ensure_gdpr_compliance
+
+
+class TestRecords(unittest.TestCase):
+    def test_records_have_no_instance_dict(self):
+        comment = Comment(name='Jane', comment='Nice', timestamp='2h', likes=0)
+        self.assertFalse(hasattr(comment, '__dict__'))
+        self.assertEqual(comment['likes'], 0)
+        self.assertEqual(comment, {'name': 'Jane', 'comment': 'Nice', 'timestamp': '2h', 'likes': 0})
+
+    def test_unknown_fields_are_kept(self):
+        profile = Profile.from_dict({'name': 'Jane', 'headline_extra': 'x'})
+        self.assertEqual(profile.get('headline_extra'), 'x')
+        self.assertEqual(profile.to_dict(), {'name': 'Jane', 'headline_extra': 'x'})
+
+    def test_batch_gdpr_stamps_once_and_hashes_once(self):
+        profiles = [Profile(name=f'User {i}', email=f'user{i}@example.com') for i in range(3)]
+        with mock.patch('scraper.records.hash_email', wraps=lambda email: 'h:' + email) as hasher:
+            apply_gdpr(profiles)
+            apply_gdpr(profiles)
+            [profile.serialize() for profile in profiles]
+        self.assertEqual(hasher.call_count, 3)
+        self.assertEqual(len({profile.collection_date for profile in profiles}), 1)
+        self.assertTrue(all(profile.email is None for profile in profiles))
+
+    def test_serialized_shape_matches_ensure_gdpr_compliance(self):
+        raw = {'name': 'Jane', 'title': 'CTO', 'email': 'jane@example.com', 'collection_date': '2024-01-01'}
+        profile = apply_gdpr([Profile.from_dict(raw)])[0]
+        self.assertEqual(json.loads(json.dumps(profile, default=json_default)), ensure_gdpr_compliance(raw))
+
+    def test_fields_set_to_none_are_present(self):
+        profile = Profile.from_dict({'name': 'Jane', 'company': None})
+        self.assertIn('company', profile)
+        self.assertNotIn('title', profile)
+        self.assertIsNone(profile.get('company', 'n/a'))
+        self.assertEqual(profile.get('title', 'n/a'), 'n/a')
+        self.assertIsNone(profile['company'])
+        with self.assertRaises(KeyError):
+            profile['title']
+        self.assertEqual(profile.to_dict(), {'name': 'Jane', 'company': None})
+        profile['company'] = 'SAP'
+        profile.company = None
+        self.assertNotIn('company', profile)
+
+    def test_gdpr_shape_keeps_none_fields(self):
+        raw = {'name': 'Jane', 'title': None, 'location': None, 'email': 'jane@example.com',
+               'collection_date': '2024-01-01'}
+        profile = apply_gdpr([Profile.from_dict(raw)])[0]
+        self.assertEqual(profile.serialize(), {
+            'data_source': 'LinkedIn Public Profile',
+            'collection_date': '2024-01-01',
+            'legal_basis': 'Legitimate Interest',
+            'retention_period': '30 days',
+            'profile_data': {'name': 'Jane', 'title': None, 'location': None,
+                             'email_hash': hashlib.sha256(b'jane@example.com').hexdigest()}
+        })
+
+    def test_dedup_index_merges_records(self):
+        index = DedupIndex(profile_key)
+        index.add(Profile(name='Jane', profile_url='https://www.linkedin.com/in/jane'))
+        index.add(Profile(name='Jane', title='CTO', profile_url='https://linkedin.com/in/jane/'))
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.records()[0].title, 'CTO')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,18 +1,18 @@
 import unittest
-from scraper.linkedin_scraper import (
-    build_linkedin_url,
-    scrape_linkedin_profiles,
-    scrape_comments_from_post,
-)
-from backend.scraper.utils import validate_email, export_to_csv, ensure_gdpr_compliance
+from scraper.linkedin_profile_scraper import build_linkedin_url, scrape_linkedin_profiles
+from scraper.linkedin_comment_scraper import scrape_comments_from_post
+from scraper.utils import validate_email, export_to_csv, ensure_gdpr_compliance
 from ai.query_processor import process_query
 import json
 import os
 
+# Live scraping tests only run with a real li_at cookie, e.g.
+# LINKEDIN_COOKIE=... python -m pytest test_scraper.py
+LINKEDIN_COOKIE = os.getenv('LINKEDIN_COOKIE')
+
 class TestLinkedInScraper(unittest.TestCase):
     def setUp(self):
-        # You would need to replace this with valid LinkedIn cookies for testing
-        self.test_cookies = "AQEDATY_pmsAo6ciAAABk--OnCEAAAGUE5sgIU4ACS5CVkUYVrGrAoxfnJ2TA35hOr87kxxCKob2Q81JvskcsbvOz5HI7R--gSRRMuNcO3_RZ_Hq1uO2kZr0oSFIZFQiu_siqoAaG9yONr9s03qKyHJA"
+        self.test_cookies = LINKEDIN_COOKIE
 
     def test_url_builder(self):
         """Test LinkedIn URL builder"""
@@ -27,6 +27,7 @@ class TestLinkedInScraper(unittest.TestCase):
         self.assertTrue("linkedin.com" in url)
         self.assertTrue("keywords=software" in url)
 
+    @unittest.skipUnless(os.getenv('OPENAI_API_KEY'), "set OPENAI_API_KEY to run the model-backed query test")
     def test_query_processor(self):
         """Test AI query processor"""
         print("\nTesting query processor...")
@@ -78,22 +79,23 @@ class TestLinkedInScraper(unittest.TestCase):
         # Cleanup
         os.remove(test_filename)
 
-def test_profile_scraping(self):
-    print("\nTesting profile scraping...")
-    query_params = {
-        "keywords": "software engineer",
-        "location": "San Francisco"
-    }
-    try:
-        profiles = scrape_linkedin_profiles(query_params, self.test_cookies)
-        print(f"Scraped {len(profiles)} profiles")
-        self.assertTrue(isinstance(profiles, list))
-    except Exception as e:
-        print("Exception occurred during profile scraping test:")
-        print(str(e))  # Log the actual error
-        raise  # Re-raise the exception to see the full traceback
-
+    @unittest.skipUnless(LINKEDIN_COOKIE, "set LINKEDIN_COOKIE to run live scraping tests")
+    def test_profile_scraping(self):
+        print("\nTesting profile scraping...")
+        query_params = {
+            "keywords": "software engineer",
+            "location": "San Francisco"
+        }
+        try:
+            profiles = scrape_linkedin_profiles(query_params, self.test_cookies)
+            print(f"Scraped {len(profiles)} profiles")
+            self.assertTrue(isinstance(profiles, list))
+        except Exception as e:
+            print("Exception occurred during profile scraping test:")
+            print(str(e))  # Log the actual error
+            raise  # Re-raise the exception to see the full traceback
 
+    @unittest.skipUnless(LINKEDIN_COOKIE, "set LINKEDIN_COOKIE to run live scraping tests")
     def test_comment_scraping(self):
         """Test LinkedIn comment scraping"""
         print("\nTesting comment scraping...")
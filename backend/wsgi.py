@@ -1,5 +1,8 @@
-from app import app
+from app import app, resume_jobs
+from observability.request_context import configure_logging
 
 if __name__ == "__main__":
     from waitress import serve
+    configure_logging()
+    resume_jobs()
     serve(app, host="0.0.0.0", port=5000)
\ No newline at end of file